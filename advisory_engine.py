@@ -0,0 +1,360 @@
+"""
+Vectorized irrigation and spray advisory engine.
+
+Evaluates the same rule thresholds as calculate_irrigation_advisory and
+calculate_spray_advisory in weather.py, but over NumPy arrays, so every
+3-hour forecast step of many cities is evaluated at once.
+
+For a forecast step i the "current" values are those of step i, and the
+look-ahead windows cover the steps after it (i+1 .. i+8 for 24 hours of
+rain, i+1 .. i+4 for 12 hours), mirroring how the scalar functions pair
+the current weather with forecast steps 0 .. 7. The current-rain rule
+takes the 1-hour amount of current weather; a forecast step only has its
+3-hour total, so the timeline uses that total's hourly rate (rain / 3).
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+STEP_HOURS = 3
+RAIN_24H_STEPS = 8
+RAIN_12H_STEPS = 4
+
+# Irrigation codes, in rule order
+IRRIGATION_NOT_REQUIRED = 0
+IRRIGATION_REDUCE = 1
+IRRIGATION_INCREASE = 2
+IRRIGATION_NORMAL = 3
+
+IRRIGATION_STATUS = {
+    IRRIGATION_NOT_REQUIRED: ('❌ Not Required', 'Do not irrigate today'),
+    IRRIGATION_REDUCE: ('⚠️ Reduce Irrigation', 'Minimal irrigation recommended'),
+    IRRIGATION_INCREASE: ('🚿 Increase Irrigation', 'Extra irrigation required'),
+    IRRIGATION_NORMAL: ('✅ Normal Irrigation', 'Regular irrigation recommended'),
+}
+
+# Spray codes, in rule order
+SPRAY_WIND = 0
+SPRAY_RAIN = 1
+SPRAY_DELAY = 2
+SPRAY_SAFE = 3
+SPRAY_CAUTION = 4
+
+SPRAY_STATUS = {
+    SPRAY_WIND: ('❌ Not Recommended', 'Do not spray - High wind conditions'),
+    SPRAY_RAIN: ('❌ Not Recommended', 'Do not spray - Rain expected'),
+    SPRAY_DELAY: ('⚠️ Delay Spraying', 'Avoid spraying or wait for better conditions'),
+    SPRAY_SAFE: ('✅ Safe to Spray', 'Good conditions for spraying'),
+    SPRAY_CAUTION: ('⚠️ Proceed with Caution', 'Spraying possible but not ideal'),
+}
+
+OPTIMAL_SPRAY_TIME = 'Early morning (6-10 AM) or Evening (4-7 PM)'
+
+# Reason templates, filled with str.format; weather.py's reference rules use
+# the same ones, so both always word an advisory identically
+REASONS = {
+    'rain_today': 'Current rainfall: {} mm (sufficient moisture)',
+    'rain_forecast_24h': 'Expected rainfall: {} mm in next 24 hours',
+    'humid_evaporation': 'High humidity ({}%) reduces evaporation',
+    'humid_soil': 'Soil retains moisture longer in humid conditions',
+    'hot': 'High temperature ({}°C) increases water loss',
+    'dry': 'Low humidity ({}%) accelerates evaporation',
+    'normal_weather': 'Normal weather conditions',
+    'normal_schedule': 'Maintain regular irrigation schedule',
+    'wind_drift': 'Wind speed: {} km/h (causes spray drift)',
+    'drift_damage': 'Chemical drift can damage crops and waste pesticides',
+    'rain_expected': 'Rain expected within 12 hours',
+    'rain_washes': 'Rain will wash away chemicals, wasting money and resources',
+    'very_humid': 'Very high humidity ({}%)',
+    'poor_absorption': 'Reduces chemical absorption and increases fungal risk',
+    'wind_safe': 'Wind speed: {} km/h (safe range)',
+    'humidity_optimal': 'Humidity: {}% (optimal range)',
+    'no_rain': 'No rain forecast in next 12 hours',
+    'time_optimal': '✅ Current time is optimal for spraying',
+    'time_not_optimal': '⚠️ Consider spraying during morning or evening for best results',
+    'acceptable': 'Conditions are acceptable but not optimal',
+    'wind_moderate': 'Wind speed is moderate ({} km/h)',
+    'humidity_low': 'Humidity is low ({}%)',
+}
+
+
+# --- RULES (element-wise over arrays of any shape) ---
+
+def irrigation_codes(rain_now, rain_24h, humidity, temperature):
+    rain_now, rain_24h, humidity, temperature = np.broadcast_arrays(rain_now, rain_24h, humidity, temperature)
+    return np.select(
+        [
+            (rain_now >= 5) | (rain_24h >= 5),
+            humidity >= 75,
+            (temperature >= 35) & (humidity < 60),
+        ],
+        [IRRIGATION_NOT_REQUIRED, IRRIGATION_REDUCE, IRRIGATION_INCREASE],
+        default=IRRIGATION_NORMAL
+    )
+
+
+def spray_codes(wind_kmh, rain_12h, humidity):
+    wind_kmh, rain_12h, humidity = np.broadcast_arrays(wind_kmh, rain_12h, humidity)
+    return np.select(
+        [
+            wind_kmh >= 15,
+            rain_12h,
+            humidity >= 85,
+            (wind_kmh < 10) & (humidity >= 50) & (humidity <= 80),
+        ],
+        [SPRAY_WIND, SPRAY_RAIN, SPRAY_DELAY, SPRAY_SAFE],
+        default=SPRAY_CAUTION
+    )
+
+
+def optimal_spray_hours(hour):
+    hour = np.asarray(hour)
+    return ((hour >= 6) & (hour <= 10)) | ((hour >= 16) & (hour <= 19))
+
+
+def forward_window_sum(values, steps):
+    """Sum of values[..., i+1 : i+1+steps] for every i along the last axis
+
+    Adds the shifted arrays one at a time (rather than differencing a
+    cumulative sum) so the floating point result matches a left-to-right
+    Python sum exactly at the rule thresholds.
+    """
+    total = np.zeros(values.shape)
+    for shift in range(1, steps + 1):
+        total[..., :-shift] += values[..., shift:]
+    return total
+
+
+# --- ADVISORY DICTS (same shape and wording as weather.py) ---
+
+def irrigation_advisory(code, rain_today, rain_forecast_24h, humidity, temperature):
+    status, recommendation = IRRIGATION_STATUS[int(code)]
+    advisory = {
+        'status': status,
+        'recommendation': recommendation,
+        'reasons': [],
+        'data': {
+            'rain_today': round(rain_today, 1),
+            'rain_forecast_24h': round(rain_forecast_24h, 1),
+            'humidity': humidity,
+            'temperature': round(temperature, 1)
+        }
+    }
+    reasons = advisory['reasons']
+    if code == IRRIGATION_NOT_REQUIRED:
+        if rain_today >= 5:
+            reasons.append(REASONS['rain_today'].format(round(rain_today, 1)))
+        if rain_forecast_24h >= 5:
+            reasons.append(REASONS['rain_forecast_24h'].format(round(rain_forecast_24h, 1)))
+    elif code == IRRIGATION_REDUCE:
+        reasons.append(REASONS['humid_evaporation'].format(humidity))
+        reasons.append(REASONS['humid_soil'])
+    elif code == IRRIGATION_INCREASE:
+        reasons.append(REASONS['hot'].format(round(temperature, 1)))
+        reasons.append(REASONS['dry'].format(humidity))
+    else:
+        reasons.append(REASONS['normal_weather'])
+        reasons.append(REASONS['normal_schedule'])
+    return advisory
+
+
+def spray_advisory(code, wind_speed, humidity, rain_forecast_12h, is_optimal_time):
+    status, recommendation = SPRAY_STATUS[int(code)]
+    advisory = {
+        'status': status,
+        'recommendation': recommendation,
+        'reasons': [],
+        'optimal_time': OPTIMAL_SPRAY_TIME,
+        'data': {
+            'wind_speed': round(wind_speed, 1),
+            'humidity': humidity,
+            'rain_forecast_12h': rain_forecast_12h,
+            'current_time_optimal': is_optimal_time
+        }
+    }
+    reasons = advisory['reasons']
+    if code == SPRAY_WIND:
+        reasons.append(REASONS['wind_drift'].format(round(wind_speed, 1)))
+        reasons.append(REASONS['drift_damage'])
+    elif code == SPRAY_RAIN:
+        reasons.append(REASONS['rain_expected'])
+        reasons.append(REASONS['rain_washes'])
+    elif code == SPRAY_DELAY:
+        reasons.append(REASONS['very_humid'].format(humidity))
+        reasons.append(REASONS['poor_absorption'])
+    elif code == SPRAY_SAFE:
+        reasons.append(REASONS['wind_safe'].format(round(wind_speed, 1)))
+        reasons.append(REASONS['humidity_optimal'].format(humidity))
+        reasons.append(REASONS['no_rain'])
+        reasons.append(REASONS['time_optimal'] if is_optimal_time else REASONS['time_not_optimal'])
+    else:
+        reasons.append(REASONS['acceptable'])
+        if wind_speed >= 10:
+            reasons.append(REASONS['wind_moderate'].format(round(wind_speed, 1)))
+        if humidity < 50:
+            reasons.append(REASONS['humidity_low'].format(humidity))
+    return advisory
+
+
+def current_advisories(weather_data, forecast_data, hour=None):
+    """(irrigation, spray) advisories for current conditions
+
+    Produces the same dicts as calculate_irrigation_advisory and
+    calculate_spray_advisory.
+    """
+    return current_advisories_many([(weather_data, forecast_data)], hour)[0]
+
+
+def current_advisories_many(payloads, hour=None):
+    """current_advisories for a list of (weather_data, forecast_data) pairs
+
+    The rules run once over arrays of every city's conditions.
+    """
+    inputs = []
+    for weather_data, forecast_data in payloads:
+        steps = forecast_data['list']
+        rain_forecast_24h = 0
+        for step in steps[:RAIN_24H_STEPS]:
+            rain_forecast_24h += step.get('rain', {}).get('3h', 0)
+        inputs.append((
+            weather_data.get('rain', {}).get('1h', 0),
+            rain_forecast_24h,
+            weather_data['main']['humidity'],
+            weather_data['main']['temp'],
+            weather_data['wind']['speed'] * 3.6,
+            any(step.get('rain', {}).get('3h', 0) > 0 for step in steps[:RAIN_12H_STEPS]),
+        ))
+    if not inputs:
+        return []
+
+    rain_today, rain_24h, humidity, temperature, wind_speed, rain_12h = (np.array(column) for column in zip(*inputs))
+    irrigation = irrigation_codes(rain_today, rain_24h, humidity, temperature)
+    spray = spray_codes(wind_speed, rain_12h, humidity)
+
+    hour = datetime.now().hour if hour is None else hour
+    is_optimal_time = bool(optimal_spray_hours(hour))
+
+    return [
+        (
+            irrigation_advisory(irrigation[i], rain_today, rain_forecast_24h, humidity, temperature),
+            spray_advisory(spray[i], wind_speed, humidity, rain_forecast_12h, is_optimal_time)
+        )
+        for i, (rain_today, rain_forecast_24h, humidity, temperature, wind_speed, rain_forecast_12h)
+        in enumerate(inputs)
+    ]
+
+
+# --- 5-DAY TIMELINE ---
+
+def forecast_arrays(forecasts):
+    """Stack several OpenWeatherMap forecast payloads into (cities, steps) arrays
+
+    Cities with fewer steps are padded by repeating their last step; the
+    returned 'valid' mask marks real steps. A city without any steps is
+    all zeros and entirely invalid.
+    """
+    steps = max((len(forecast['list']) for forecast in forecasts), default=0)
+    shape = (len(forecasts), steps)
+    arrays = {
+        'dt': np.zeros(shape, dtype=np.int64),
+        'temperature': np.zeros(shape),
+        'humidity': np.zeros(shape),
+        'wind_kmh': np.zeros(shape),
+        'rain': np.zeros(shape),
+        'valid': np.zeros(shape, dtype=bool),
+        'utc_offset': np.zeros((len(forecasts), 1), dtype=np.int64),
+    }
+    for c, forecast in enumerate(forecasts):
+        arrays['utc_offset'][c, 0] = forecast.get('city', {}).get('timezone', 0)
+        items = forecast['list']
+        if not items:
+            continue
+        for i in range(steps):
+            item = items[min(i, len(items) - 1)]
+            arrays['dt'][c, i] = item['dt']
+            arrays['temperature'][c, i] = item['main']['temp']
+            arrays['humidity'][c, i] = item['main']['humidity']
+            arrays['wind_kmh'][c, i] = item['wind']['speed'] * 3.6
+            arrays['rain'][c, i] = item.get('rain', {}).get('3h', 0) if i < len(items) else 0
+            arrays['valid'][c, i] = i < len(items)
+    return arrays
+
+
+def evaluate_timeline(arrays):
+    """Evaluate both rule sets at every (city, step); returns code arrays"""
+    rain_24h = forward_window_sum(arrays['rain'], RAIN_24H_STEPS)
+    rain_12h = forward_window_sum(arrays['rain'], RAIN_12H_STEPS) > 0
+    local_hour = ((arrays['dt'] + arrays['utc_offset']) // 3600) % 24
+
+    # The 5 mm rule is for an hour of rain; a step's total covers STEP_HOURS
+    rain_hourly = arrays['rain'] / STEP_HOURS
+    irrigation = irrigation_codes(rain_hourly, rain_24h, arrays['humidity'], arrays['temperature'])
+    spray = spray_codes(arrays['wind_kmh'], rain_12h, arrays['humidity'])
+    optimal = optimal_spray_hours(local_hour)
+    return {
+        'irrigation': irrigation,
+        'spray': spray,
+        'spray_window': (spray == SPRAY_SAFE) & optimal & arrays['valid'],
+        'rain_24h': rain_24h,
+        'local_hour': local_hour,
+    }
+
+
+def _local_time(dt, utc_offset):
+    return datetime.fromtimestamp(int(dt), tz=timezone(timedelta(seconds=int(utc_offset))))
+
+
+def advisory_timeline(forecast_data):
+    """Per-step advisories, best spray windows and irrigation days for one city"""
+    arrays = forecast_arrays([forecast_data])
+    codes = evaluate_timeline(arrays)
+    offset = arrays['utc_offset'][0, 0]
+    count = int(arrays['valid'][0].sum())
+
+    steps = []
+    for i in range(count):
+        steps.append({
+            'dt': int(arrays['dt'][0, i]),
+            'time': _local_time(arrays['dt'][0, i], offset).isoformat(),
+            'irrigation': IRRIGATION_STATUS[int(codes['irrigation'][0, i])][0],
+            'spray': SPRAY_STATUS[int(codes['spray'][0, i])][0],
+            'spray_window': bool(codes['spray_window'][0, i]),
+            'rain_next_24h': round(float(codes['rain_24h'][0, i]), 1),
+        })
+
+    # Merge consecutive good spray steps into windows
+    windows = []
+    for i in range(count):
+        if not codes['spray_window'][0, i]:
+            continue
+        start = _local_time(arrays['dt'][0, i], offset)
+        end = start + timedelta(hours=STEP_HOURS)
+        if windows and windows[-1]['_end_index'] == i - 1:
+            windows[-1]['end'] = end.isoformat()
+            windows[-1]['_end_index'] = i
+        else:
+            windows.append({'start': start.isoformat(), 'end': end.isoformat(), '_end_index': i})
+    for window in windows:
+        del window['_end_index']
+
+    # A day takes the most restrictive irrigation rule that fired on it
+    days = {}
+    for i in range(count):
+        date = _local_time(arrays['dt'][0, i], offset).date().isoformat()
+        code = int(codes['irrigation'][0, i])
+        days[date] = min(days.get(date, code), code)
+    irrigation_days = [
+        {
+            'date': date,
+            'status': IRRIGATION_STATUS[code][0],
+            'irrigate': code != IRRIGATION_NOT_REQUIRED
+        }
+        for date, code in days.items()
+    ]
+
+    return {
+        'steps': steps,
+        'best_spray_windows': windows,
+        'irrigation_days': irrigation_days
+    }
@@ -0,0 +1,141 @@
+"""
+Dynamic micro-batching for model inference.
+
+Concurrent callers submit single preprocessed images; a background thread
+collects them into batches and runs one forward pass per batch.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+# Defaults can be tuned per deployment with environment variables
+BATCH_MAX_SIZE = int(os.getenv('BATCH_MAX_SIZE', '16'))
+BATCH_MAX_WAIT_MS = float(os.getenv('BATCH_MAX_WAIT_MS', '10'))
+
+
+class MicroBatcher:
+    """Collect concurrent inference requests into batches
+
+    `process_batch` receives a stacked (N, H, W, C) array and must return a
+    list of N per-image results, in order.
+
+    When traffic is low the first queued item is dispatched immediately
+    (batch size 1). The batcher only waits up to `max_wait_ms` for more
+    items once it has seen other requests queued behind the first one.
+    """
+
+    def __init__(self, process_batch, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS):
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+        # Stats
+        self._batches = 0
+        self._items = 0
+        self._max_queue_depth = 0
+        self._batch_size_counts = {}
+        self._total_wait = 0.0
+        self._total_inference = 0.0
+
+    def start(self):
+        """Start the background worker thread (idempotent)"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+                self._thread.start()
+
+    def submit(self, array):
+        """Queue one preprocessed image (H, W, C) and return a Future"""
+        self.start()
+        future = Future()
+        self._queue.put((array, future, time.perf_counter()))
+        depth = self._queue.qsize()
+        with self._lock:
+            if depth > self._max_queue_depth:
+                self._max_queue_depth = depth
+        return future
+
+    def predict(self, array, timeout=None):
+        """Submit one image and block until its result is ready"""
+        return self.submit(array).result(timeout=timeout)
+
+    def _collect(self):
+        """Block for the first item, then gather as many more as allowed"""
+        batch = [self._queue.get()]
+
+        # Take whatever is already waiting without blocking
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        # Only wait for stragglers when there is concurrent traffic
+        if len(batch) > 1 and self.max_wait > 0:
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            futures = [future for _, future, _ in batch]
+            started = time.perf_counter()
+
+            try:
+                stacked = np.stack([array for array, _, _ in batch])
+                results = self.process_batch(stacked)
+                if len(results) != len(batch):
+                    raise RuntimeError(f'Expected {len(batch)} results, got {len(results)}')
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                results = None
+
+            finished = time.perf_counter()
+            if results is not None:
+                for future, result in zip(futures, results):
+                    future.set_result(result)
+
+            with self._lock:
+                size = len(batch)
+                self._batches += 1
+                self._items += size
+                self._batch_size_counts[size] = self._batch_size_counts.get(size, 0) + 1
+                self._total_wait += sum(started - queued for _, _, queued in batch)
+                self._total_inference += finished - started
+
+    def stats(self):
+        """Return queue depth and batch size statistics"""
+        with self._lock:
+            batches = self._batches
+            items = self._items
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000.0,
+                'queue_depth': self._queue.qsize(),
+                'max_queue_depth': self._max_queue_depth,
+                'batches': batches,
+                'items': items,
+                'avg_batch_size': round(items / batches, 2) if batches else 0,
+                'batch_size_histogram': {str(k): v for k, v in sorted(self._batch_size_counts.items())},
+                'avg_queue_wait_ms': round(self._total_wait / items * 1000.0, 3) if items else 0,
+                'avg_inference_ms': round(self._total_inference / batches * 1000.0, 3) if batches else 0
+            }
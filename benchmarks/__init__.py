@@ -0,0 +1 @@
+"""Benchmark and measurement scripts, run with `python -m benchmarks.<name>`"""
@@ -0,0 +1,139 @@
+"""
+Parity and throughput of the vectorized advisory engine.
+
+1. Checks that advisory_engine.current_advisories (one city) and
+   current_advisories_many (all cases at once) return exactly the same
+   dicts as weather.calculate_irrigation_advisory / calculate_spray_advisory
+   on randomized (including threshold-edge) weather.
+2. Times the scalar functions against the vectorized engine for thousands
+   of city/time points.
+
+    python -m benchmarks.advisory_engine [--cases 5000] [--cities 1000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+import advisory_engine
+from weather import calculate_irrigation_advisory, calculate_spray_advisory
+
+# Values on and around every rule threshold
+EDGE_HUMIDITY = [49, 50, 59, 60, 74, 75, 80, 81, 84, 85, 90]
+EDGE_TEMPERATURE = [20.0, 34.94, 34.96, 35.0, 40.2]
+EDGE_WIND_MS = [0.0, 2.77, 2.78, 4.16, 4.17, 6.0]   # ~10 and ~15 km/h
+EDGE_RAIN = [0, 0.0, 0.1, 1.25, 4.96, 5, 7.3]
+
+
+def random_weather(rng):
+    def pick(edges, low, high):
+        return rng.choice(edges) if rng.random() < 0.5 else round(rng.uniform(low, high), 2)
+
+    weather = {
+        'main': {'temp': pick(EDGE_TEMPERATURE, 10, 45), 'humidity': int(pick(EDGE_HUMIDITY, 10, 100))},
+        'wind': {'speed': pick(EDGE_WIND_MS, 0, 8)},
+    }
+    if rng.random() < 0.5:
+        weather['rain'] = {'1h': pick(EDGE_RAIN, 0, 10)}
+
+    steps = []
+    for i in range(40):
+        step = {
+            'dt': 1700000000 + i * 10800,
+            'main': {'temp': pick(EDGE_TEMPERATURE, 10, 45), 'humidity': int(pick(EDGE_HUMIDITY, 10, 100))},
+            'wind': {'speed': pick(EDGE_WIND_MS, 0, 8)},
+        }
+        if rng.random() < 0.15:
+            step['rain'] = {'3h': pick(EDGE_RAIN, 0, 4)}
+        steps.append(step)
+    return weather, {'list': steps, 'city': {'timezone': 19800}}
+
+
+def check_parity(cases):
+    rng = random.Random(0)
+    hour = datetime.now().hour
+    mismatches = 0
+    payloads, all_expected = [], []
+    for _ in range(cases):
+        weather, forecast = random_weather(rng)
+        expected = (calculate_irrigation_advisory(weather, forecast), calculate_spray_advisory(weather, forecast))
+        actual = advisory_engine.current_advisories(weather, forecast, hour=hour)
+        if actual != expected:
+            mismatches += 1
+            if mismatches <= 3:
+                print(f"  mismatch:\n    expected {expected}\n    actual   {actual}")
+        payloads.append((weather, forecast))
+        all_expected.append(expected)
+    # All cases at once, as /api/dashboard evaluates every city
+    batched = advisory_engine.current_advisories_many(payloads, hour=hour)
+    mismatches += sum(actual != expected for actual, expected in zip(batched, all_expected))
+    return mismatches
+
+
+def step_as_now(item):
+    """A forecast step as current weather, its 3-hour rain as an hourly rate"""
+    rain = item.get('rain', {}).get('3h', 0) / advisory_engine.STEP_HOURS
+    return {'main': item['main'], 'wind': item['wind'], 'rain': {'1h': rain}}
+
+
+def benchmark(cities):
+    rng = random.Random(1)
+    forecasts = [random_weather(rng)[1] for _ in range(cities)]
+    points = cities * 40
+
+    # Scalar: evaluate each step as "now", feeding the steps after it as the forecast
+    start = time.perf_counter()
+    for forecast in forecasts:
+        items = forecast['list']
+        for i, item in enumerate(items):
+            now = step_as_now(item)
+            window = {'list': items[i + 1:]}
+            calculate_irrigation_advisory(now, window)
+            calculate_spray_advisory(now, window)
+    scalar = time.perf_counter() - start
+
+    start = time.perf_counter()
+    arrays = advisory_engine.forecast_arrays(forecasts)
+    parse = time.perf_counter() - start
+    start = time.perf_counter()
+    codes = advisory_engine.evaluate_timeline(arrays)
+    vectorized = time.perf_counter() - start
+
+    # The two paths must agree on the rule that fired for every point
+    scalar_codes = []
+    irrigation_by_status = {status: code for code, (status, _) in advisory_engine.IRRIGATION_STATUS.items()}
+    for forecast in forecasts[:50]:
+        items = forecast['list']
+        for i, item in enumerate(items):
+            now = step_as_now(item)
+            scalar_codes.append(irrigation_by_status[calculate_irrigation_advisory(now, {'list': items[i + 1:]})['status']])
+    agree = np.array_equal(np.array(scalar_codes), codes['irrigation'][:50].ravel())
+
+    print(f"\n{points} city/time points ({cities} cities x 40 steps)")
+    print(f"  scalar functions   {scalar * 1000:9.1f} ms   {points / scalar:12,.0f} points/s")
+    print(f"  engine (rules)     {vectorized * 1000:9.1f} ms   {points / vectorized:12,.0f} points/s")
+    print(f"  engine (+parsing)  {(vectorized + parse) * 1000:9.1f} ms   {points / (vectorized + parse):12,.0f} points/s")
+    print(f"  irrigation codes agree with scalar path: {agree}")
+    return agree
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cases', type=int, default=5000, help='randomized parity cases')
+    parser.add_argument('--cities', type=int, default=1000, help='cities in the throughput run')
+    args = parser.parse_args()
+
+    print(f"Parity on {args.cases} randomized current-conditions cases")
+    mismatches = check_parity(args.cases)
+    print(f"  mismatches: {mismatches}")
+
+    agree = benchmark(args.cities)
+    sys.exit(1 if mismatches or not agree else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Latency of model.predict versus the compiled tf.function inference path.
+
+    python -m benchmarks.compiled_inference [--iterations 50] [--batch-sizes 1 16]
+
+Thread counts can be varied with INFERENCE_INTRA_OP_THREADS and
+INFERENCE_INTER_OP_THREADS.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from inference_backends import MODEL_PATHS, KerasBackend
+
+
+def measure(predict, batch, iterations):
+    """Return (first call ms, p50 ms, p95 ms)"""
+    start = time.perf_counter()
+    predict(batch)
+    first = (time.perf_counter() - start) * 1000.0
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        predict(batch)
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return first, float(np.percentile(timings, 50)), float(np.percentile(timings, 95))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 16])
+    parser.add_argument('--model', default=MODEL_PATHS['keras'])
+    args = parser.parse_args()
+
+    variants = {
+        'model.predict': KerasBackend(args.model, compiled=False),
+        'tf.function': KerasBackend(args.model, compiled=True, jit_compile=False),
+        'tf.function+XLA': KerasBackend(args.model, compiled=True, jit_compile=True),
+    }
+
+    rng = np.random.default_rng(0)
+    print(f"{'path':<17}{'batch':>6}{'first ms':>11}{'p50 ms':>10}{'p95 ms':>10}{'speedup':>9}")
+    for batch_size in args.batch_sizes:
+        batch = rng.random((batch_size, 224, 224, 3), dtype=np.float32)
+        baseline = None
+        reference = variants['model.predict'].predict(batch)
+        for name, backend in variants.items():
+            first, p50, p95 = measure(backend.predict, batch, args.iterations)
+            baseline = baseline or p50
+            drift = float(np.abs(backend.predict(batch) - reference).max())
+            print(f"{name:<17}{batch_size:>6}{first:>11.1f}{p50:>10.2f}{p95:>10.2f}{baseline / p50:>8.2f}x"
+                  f"   max |diff| {drift:.1e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+"""
+Behaviour checks of db_pool.ConnectionPool with a fake DB-API driver.
+
+The fake driver's connections record whether they were closed and can be
+made to fail their ping, so no database is needed. Checked:
+
+  timeout      a checkout with every connection in use raises PoolTimeout
+               after the timeout; a waiter gets a connection released meanwhile
+  ping         an idle connection that fails its ping is closed and replaced
+  discard      a connection whose `with` block raised is closed, not reused
+  recycle      a connection older than `recycle` is replaced
+  fork         a forked child never reuses the parent's connections
+  fallbacks    drivers without ping() are checked with SELECT 1; a failed
+               connect gives the slot back
+
+Exits 1 if a check fails.
+
+    python -m benchmarks.db_pool
+"""
+
+import itertools
+import os
+import sys
+import threading
+import time
+
+from db_pool import ConnectionPool, PoolTimeout
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, query, params=()):
+        if not self.connection.alive:
+            raise OSError('Lost connection to server')
+        self.connection.queries.append(query)
+
+    def fetchall(self):
+        return [(1,)]
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """A DB-API connection whose liveness the checks control"""
+
+    ids = itertools.count(1)
+
+    def __init__(self):
+        self.id = next(self.ids)
+        self.pid = os.getpid()
+        self.alive = True
+        self.closed = False
+        self.queries = []
+
+    def cursor(self, dictionary=False):
+        return FakeCursor(self)
+
+    def ping(self):
+        if not self.alive:
+            raise OSError('Lost connection to server')
+
+    def close(self):
+        self.closed = True
+
+
+class NoPingConnection(FakeConnection):
+    ping = None
+
+
+class Checks:
+    def __init__(self):
+        self.failed = 0
+
+    def check(self, name, ok, detail=''):
+        print(f"  {'✓' if ok else '✗'} {name}{f'  ({detail})' if detail else ''}")
+        if not ok:
+            self.failed += 1
+
+
+def check_timeout(checks):
+    print("Checkout timeout")
+    pool = ConnectionPool(FakeConnection, size=2, timeout=0.2)
+    first, second = pool.acquire(), pool.acquire()
+    start = time.monotonic()
+    try:
+        pool.acquire()
+        timed_out = False
+    except PoolTimeout:
+        timed_out = True
+    elapsed = time.monotonic() - start
+    checks.check('full pool raises PoolTimeout after the timeout', timed_out and 0.18 <= elapsed < 0.5,
+                 f'after {elapsed:.2f}s')
+
+    threading.Timer(0.05, pool.release, args=(first,)).start()
+    third = pool.acquire()
+    checks.check('a waiter gets the connection released meanwhile', third is first,
+                 f"waits={pool.stats()['waits']}")
+    pool.release(second)
+    pool.release(third)
+
+
+def check_ping(checks):
+    print("Idle ping")
+    pool = ConnectionPool(FakeConnection, size=2, ping_after=0)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as again:
+        pass
+    checks.check('a healthy idle connection is reused', again is first)
+
+    first.alive = False
+    with pool.connection() as replacement:
+        pass
+    stats = pool.stats()
+    checks.check('a connection failing its ping is closed and replaced',
+                 replacement is not first and first.closed and stats['failed_pings'] == 1 and stats['open'] == 1,
+                 f"failed_pings={stats['failed_pings']}, open={stats['open']}")
+
+
+def check_discard(checks):
+    print("Discard on error")
+    pool = ConnectionPool(FakeConnection, size=1)
+    try:
+        with pool.connection() as broken:
+            raise ValueError('query failed mid-result')
+    except ValueError:
+        pass
+    with pool.connection() as fresh:
+        pass
+    stats = pool.stats()
+    checks.check('the connection of a raising block is closed, not reused',
+                 broken.closed and fresh is not broken and stats['discarded'] == 1 and stats['in_use'] == 0,
+                 f"discarded={stats['discarded']}, in_use={stats['in_use']}")
+
+
+def check_recycle(checks):
+    print("Recycle age")
+    pool = ConnectionPool(FakeConnection, size=1, recycle=0.1)
+    with pool.connection() as old:
+        pass
+    with pool.connection() as young:
+        pass
+    checks.check('a connection younger than recycle is reused', young is old)
+    time.sleep(0.15)
+    with pool.connection() as new:
+        pass
+    checks.check('a connection older than recycle is replaced', new is not old and old.closed)
+
+
+def check_fork(checks):
+    print("Fork")
+    if not hasattr(os, 'fork'):
+        print("  - skipped, no os.fork on this platform")
+        return
+    pool = ConnectionPool(FakeConnection, size=1, timeout=0.2)
+    with pool.connection() as parent_connection:
+        pass
+    # Also hold the only slot, as a request in flight at fork time would
+    held = pool.acquire()
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            with pool.connection() as child_connection:
+                ok = child_connection.pid == os.getpid() and child_connection is not parent_connection
+            stats = pool.stats()
+            ok = ok and stats['open'] == 1 and stats['in_use'] == 0
+        except Exception:
+            ok = False
+        os.write(write_fd, b'1' if ok else b'0')
+        os._exit(0)
+    os.close(write_fd)
+    result = os.read(read_fd, 1)
+    os.close(read_fd)
+    os.waitpid(pid, 0)
+    pool.release(held)
+    checks.check("the child opens its own connection and gets a slot", result == b'1')
+    checks.check("the parent's pool is untouched", not parent_connection.closed and pool.stats()['open'] == 1)
+
+
+def check_fallbacks(checks):
+    print("Fallbacks")
+    pool = ConnectionPool(NoPingConnection, size=1, ping_after=0)
+    with pool.connection() as connection:
+        pass
+    ok = pool.ping()
+    checks.check('a driver without ping() is checked with SELECT 1',
+                 ok and bool(connection.queries) and set(connection.queries) == {'SELECT 1'})
+
+    def refuse():
+        raise OSError('Connection refused')
+
+    pool = ConnectionPool(refuse, size=1, timeout=0.1)
+    results = [pool.ping(timeout=0.1) for _ in range(3)]
+    stats = pool.stats()
+    checks.check('a failed connect gives its slot back',
+                 results == [False] * 3 and stats['connect_errors'] == 3 and stats['timeouts'] == 0,
+                 f"connect_errors={stats['connect_errors']}, timeouts={stats['timeouts']}")
+
+
+def main():
+    checks = Checks()
+    check_timeout(checks)
+    check_ping(checks)
+    check_discard(checks)
+    check_recycle(checks)
+    check_fork(checks)
+    check_fallbacks(checks)
+
+    print(f"\n{'All checks passed' if not checks.failed else f'{checks.failed} check(s) failed'}")
+    sys.exit(1 if checks.failed else 0)
+
+
+if __name__ == '__main__':
+    main()
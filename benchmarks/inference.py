@@ -0,0 +1,257 @@
+"""
+Latency, throughput and accuracy of the /api/predict serving path.
+
+Runs a deterministic sample of datasets/PlantVillage through the code the
+endpoints use (ImagePreprocessor, inference.predict_batch,
+inference.decode_predictions and inference.get_prediction with its
+micro-batcher) and reports:
+
+    - per-stage latency (decode, resize, inference, postprocess) at p50/p95/p99
+    - images/sec through predict_batch at several batch sizes
+    - images/sec through get_prediction at several client thread counts
+    - per-class accuracy and a confusion matrix
+
+    python -m benchmarks.inference [--per-class 10] [--batch-sizes 1 8 32] [--threads 1 4 16]
+    python -m benchmarks.inference --save-baseline
+
+With a baseline (benchmarks/inference_baseline.json by default) the run
+exits with status 1 when accuracy drops, or p50/p95 latency or throughput
+get worse, by more than the tolerances. Latency numbers are machine
+specific: record the baseline on the machine that runs the check.
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+import inference
+from inference_backends import INFERENCE_BACKEND
+from model_registry import ModelRegistry
+from plantvillage import folder_label_map, sample_images
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'inference_baseline.json')
+REPORT_PATH = 'inference_report.json'
+
+STAGES = ('decode', 'resize', 'inference', 'postprocess', 'total')
+PERCENTILES = (50, 95, 99)
+# Percentiles compared against the baseline; p99 of a few hundred images is too noisy
+CHECKED_PERCENTILES = (50, 95)
+
+
+def load_samples(per_class, seed, class_labels):
+    """[(path, folder, expected class index, file bytes)] for the labelled folders"""
+    labels_by_folder = folder_label_map(class_labels)
+    samples = []
+    for path, folder in sample_images(per_class, seed=seed):
+        if labels_by_folder.get(folder) is None:
+            continue
+        with open(path, 'rb') as f:
+            samples.append((path, folder, labels_by_folder[folder], f.read()))
+    return samples
+
+
+def percentiles(timings):
+    timings_ms = np.array(timings) * 1000.0
+    return {f'p{q}': round(float(np.percentile(timings_ms, q)), 3) for q in PERCENTILES}
+
+
+def measure_stages(samples, handle):
+    """Time each stage of a single-image prediction; return (stage percentiles, predicted indices)"""
+    preprocessor = inference.preprocessor
+    timings = {stage: [] for stage in STAGES}
+    predictions = []
+    batch = np.empty((1, preprocessor.size, preprocessor.size, 3), dtype=np.float32)
+
+    for _, _, _, data in samples:
+        start = time.perf_counter()
+        image = preprocessor.decode(Image.open(io.BytesIO(data)))
+        decoded = time.perf_counter()
+        preprocessor.preprocess(image, out=batch[0])
+        resized = time.perf_counter()
+        probabilities = handle.model.predict(batch)
+        inferred = time.perf_counter()
+        inference.decode_predictions(probabilities[0], handle.class_labels)
+        finished = time.perf_counter()
+
+        timings['decode'].append(decoded - start)
+        timings['resize'].append(resized - decoded)
+        timings['inference'].append(inferred - resized)
+        timings['postprocess'].append(finished - inferred)
+        timings['total'].append(finished - start)
+        predictions.append(int(np.argmax(probabilities[0])))
+
+    return {stage: percentiles(values) for stage, values in timings.items()}, predictions
+
+
+def batch_throughput(samples, batch_size):
+    """Images/sec of decode + preprocess_batch + predict_batch in chunks of `batch_size`"""
+    def run(chunk):
+        images = [Image.open(io.BytesIO(data)) for _, _, _, data in chunk]
+        inference.predict_batch(inference.preprocessor.preprocess_batch(images))
+
+    run(samples[:batch_size])
+    start = time.perf_counter()
+    for offset in range(0, len(samples), batch_size):
+        run(samples[offset:offset + batch_size])
+    return round(len(samples) / (time.perf_counter() - start), 2)
+
+
+def thread_throughput(samples, threads):
+    """Images/sec of `threads` concurrent clients calling get_prediction"""
+    def run(sample):
+        return inference.get_prediction(Image.open(io.BytesIO(sample[3])))
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(run, samples[:threads]))
+        start = time.perf_counter()
+        list(pool.map(run, samples))
+        return round(len(samples) / (time.perf_counter() - start), 2)
+
+
+def accuracy_report(samples, predictions, class_labels):
+    """Overall and per-class accuracy plus a confusion matrix over the model's classes"""
+    num_classes = len(class_labels)
+    confusion = np.zeros((num_classes, num_classes), dtype=np.int64)
+    for (_, _, expected, _), predicted in zip(samples, predictions):
+        confusion[expected, predicted] += 1
+
+    per_class = {}
+    for index in range(num_classes):
+        total = int(confusion[index].sum())
+        if total:
+            per_class[class_labels[str(index)]] = round(float(confusion[index, index]) / total, 4)
+
+    return {
+        'accuracy': round(float(np.trace(confusion)) / max(1, len(samples)), 4),
+        'per_class': per_class,
+        'labels': [class_labels[str(i)] for i in range(num_classes)],
+        'confusion_matrix': confusion.tolist()
+    }
+
+
+def check_regressions(report, baseline, latency_tolerance, accuracy_tolerance):
+    """Return a list of human readable regressions against `baseline`"""
+    failures = []
+
+    drop = baseline['accuracy'] - report['accuracy']
+    if drop > accuracy_tolerance:
+        failures.append(f"accuracy {report['accuracy']:.4f} < baseline {baseline['accuracy']:.4f}")
+
+    for stage, values in baseline['latency_ms'].items():
+        for q in CHECKED_PERCENTILES:
+            key = f'p{q}'
+            old = values.get(key)
+            new = report['latency_ms'].get(stage, {}).get(key)
+            if old and new is not None and new > old * (1 + latency_tolerance):
+                failures.append(f"{stage} {key} {new:.2f} ms > baseline {old:.2f} ms")
+
+    for kind in ('batch_size', 'threads'):
+        for size, old in baseline['images_per_sec'].get(kind, {}).items():
+            new = report['images_per_sec'][kind].get(size)
+            if new is not None and new < old * (1 - latency_tolerance):
+                failures.append(f"{kind}={size} {new:.1f} img/s < baseline {old:.1f} img/s")
+    return failures
+
+
+def print_confusion(accuracy):
+    """Print only the rows/columns of classes that occur in the sample"""
+    matrix = np.array(accuracy['confusion_matrix'])
+    used = np.flatnonzero(matrix.sum(axis=0) + matrix.sum(axis=1))
+    print("\nConfusion matrix (rows: true, columns: predicted)")
+    for n, index in enumerate(used):
+        print(f"  [{n:>2}] {accuracy['labels'][index]}")
+    print('      ' + ''.join(f'{n:>5}' for n in range(len(used))))
+    for n, index in enumerate(used):
+        print(f'  {n:>3} ' + ''.join(f'{matrix[index, j]:>5}' for j in used))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--per-class', type=int, default=10, help='images sampled from every class folder')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--backend', default=INFERENCE_BACKEND)
+    parser.add_argument('--model-version', default=None,
+                        help='model registry version (default: the served one), e.g. before activating it')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='store this run as the baseline')
+    parser.add_argument('--latency-tolerance', type=float, default=0.25,
+                        help='allowed fractional latency increase / throughput decrease')
+    parser.add_argument('--accuracy-tolerance', type=float, default=0.01, help='allowed absolute accuracy drop')
+    args = parser.parse_args()
+
+    # Serve the chosen version through the same registry the endpoints use
+    inference.registry = ModelRegistry(backend_name=args.backend, poll_interval=0)
+    handle = inference.registry.activate(args.model_version or inference.registry.requested_version())
+
+    samples = load_samples(args.per_class, args.seed, handle.class_labels)
+    if not samples:
+        sys.exit("No labelled images found in datasets/PlantVillage")
+    print(f"Benchmarking '{args.backend}' version {handle.version} on {len(samples)} images...")
+
+    latency, predictions = measure_stages(samples, handle)
+    report = {
+        'backend': args.backend,
+        'model_version': handle.version,
+        'samples': len(samples),
+        'per_class': args.per_class,
+        'seed': args.seed,
+        'latency_ms': latency,
+        'images_per_sec': {
+            'batch_size': {str(b): batch_throughput(samples, b) for b in args.batch_sizes},
+            'threads': {str(t): thread_throughput(samples, t) for t in args.threads}
+        },
+        'batcher': inference.batcher.stats(),
+        **accuracy_report(samples, predictions, handle.class_labels)
+    }
+
+    with open(REPORT_PATH, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'stage':<13}" + ''.join(f"{f'p{q} ms':>10}" for q in PERCENTILES))
+    for stage, values in latency.items():
+        print(f"{stage:<13}" + ''.join(f"{values[f'p{q}']:>10.2f}" for q in PERCENTILES))
+    print()
+    for kind, results in report['images_per_sec'].items():
+        for size, rate in results.items():
+            print(f"{kind + '=' + size:<14}{rate:>10.1f} img/s")
+    print(f"\nAccuracy: {report['accuracy']:.4f}")
+    for label, value in sorted(report['per_class'].items(), key=lambda item: item[1]):
+        print(f"  {value:.3f}  {label}")
+    print_confusion(report)
+    print(f"\n✓ Report saved as '{REPORT_PATH}'")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Baseline saved as '{args.baseline}'")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against (run with --save-baseline)")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if (baseline.get('backend'), baseline.get('per_class'), baseline.get('seed')) != \
+            (report['backend'], report['per_class'], report['seed']):
+        print("⚠️ Baseline was recorded with a different backend or sample; comparing anyway")
+
+    failures = check_regressions(report, baseline, args.latency_tolerance, args.accuracy_tolerance)
+    if failures:
+        print("\n❌ Regressions against the baseline:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("✅ No regressions against the baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Cost of the metrics instrumentation.
+
+Reports the time of one histogram observation (through a kept child, a
+timer and a per-call label lookup), of metrics.init_app's per-request
+hooks, the added latency per Flask test-client request, and the time to
+render /metrics.
+
+    python -m benchmarks.metrics_overhead [--iterations 200000] [--requests 5000]
+"""
+
+import argparse
+import time
+
+from flask import Flask
+
+import metrics
+
+
+def per_call_ns(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e9
+
+
+def request_us(app, requests):
+    client = app.test_client()
+    for _ in range(200):
+        client.get('/ping')
+    start = time.perf_counter()
+    for _ in range(requests):
+        client.get('/ping')
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def make_app(instrumented):
+    app = Flask(__name__)
+
+    @app.route('/ping')
+    def ping():
+        return 'ok'
+
+    if instrumented:
+        app.before_request(metrics._start_timer)
+        app.after_request(metrics._record_request)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200000)
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    registry = metrics.MetricsRegistry()
+    stage = registry.register(metrics.Histogram('bench_seconds', 'benchmark', ['stage']))
+    child = stage.labels(stage='decode')
+
+    def timed():
+        with child.time():
+            pass
+
+    baseline = per_call_ns(lambda: None, args.iterations)
+    print(f"{'operation':<34}{'ns/call':>10}")
+    print(f"{'empty call (loop cost)':<34}{baseline:>10.0f}")
+    print(f"{'child.observe(value)':<34}{per_call_ns(lambda: child.observe(0.003), args.iterations):>10.0f}")
+    print(f"{'with child.time()':<34}{per_call_ns(timed, args.iterations):>10.0f}")
+    print(f"{'histogram.observe(value, stage=)':<34}"
+          f"{per_call_ns(lambda: stage.observe(0.003, stage='decode'), args.iterations):>10.0f}")
+
+    def hooks():
+        metrics._start_timer()
+        metrics._record_request(response)
+
+    app = make_app(False)
+    with app.test_request_context('/ping') as context:
+        context.match_request()
+        response = app.make_response('ok')
+        print(f"{'request hooks (before + after)':<34}{per_call_ns(hooks, args.iterations):>10.0f}")
+
+    # End to end through the test client; noisier, the hooks are a small part of it
+    plain = request_us(make_app(False), args.requests)
+    instrumented = request_us(make_app(True), args.requests)
+    print(f"\nFlask request without hooks  {plain:8.1f} us")
+    print(f"Flask request with hooks     {instrumented:8.1f} us  ({instrumented - plain:+.1f} us)")
+
+    # A realistic scrape: every route x method x status plus the app's histograms
+    for route in range(40):
+        for status in (200, 400, 500):
+            metrics.REQUEST_SECONDS.labels(method='GET', route=f'/api/r{route}', status=status).observe(0.01)
+    start = time.perf_counter()
+    body = metrics.REGISTRY.render()
+    print(f"\nRender /metrics ({body.count(chr(10))} lines)  {(time.perf_counter() - start) * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Compare the preprocessing engine with the original preprocess_image path.
+
+Checks numerical parity on PlantVillage samples and a synthetic 12 MP
+phone photo, and reports per-image latency for both paths.
+
+    python -m benchmarks.preprocessing [--samples 50]
+"""
+
+import argparse
+import glob
+import io
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+from preprocessing import IMG_SIZE, ImagePreprocessor
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, 'datasets', 'PlantVillage')
+
+# Tolerances on [0, 1] pixel values. Full-resolution decodes must match the
+# legacy path almost exactly; draft (DCT-scaled) decodes are allowed a small
+# mean error since libjpeg downsamples before the bicubic resize.
+FULL_DECODE_MAX_ABS = 1e-6
+DRAFT_DECODE_MEAN_ABS = 0.02
+
+
+def legacy_preprocess(image):
+    """The original main.py preprocess_image implementation"""
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    image = image.resize((IMG_SIZE, IMG_SIZE))
+    img_array = np.array(image)
+    img_array = img_array / 255.0
+    return np.expand_dims(img_array, axis=0)
+
+
+def synthetic_photo(width=4000, height=3000):
+    """A 12 MP JPEG with enough texture to make decoding realistic"""
+    rng = np.random.default_rng(0)
+    small = rng.integers(0, 256, size=(height // 16, width // 16, 3), dtype=np.uint8)
+    image = Image.fromarray(small).resize((width, height), Image.BILINEAR)
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def time_path(fn, payloads, repeat=3):
+    """Median seconds per image over `repeat` passes"""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for data in payloads:
+            fn(Image.open(io.BytesIO(data)))
+        runs.append((time.perf_counter() - start) / len(payloads))
+    return sorted(runs)[len(runs) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--samples', type=int, default=50, help='PlantVillage images to check')
+    args = parser.parse_args()
+
+    engine = ImagePreprocessor(IMG_SIZE)
+    failures = 0
+
+    paths = sorted(glob.glob(os.path.join(DATA_DIR, '*', '*')))[::97][:args.samples]
+    dataset = [open(path, 'rb').read() for path in paths]
+    large = [synthetic_photo()]
+
+    print(f"Parity on {len(dataset)} PlantVillage images (full decode)")
+    worst = 0.0
+    for data in dataset:
+        expected = legacy_preprocess(Image.open(io.BytesIO(data)))
+        actual = engine.preprocess_batch([Image.open(io.BytesIO(data))])
+        assert actual.dtype == np.float32 and actual.shape == expected.shape
+        worst = max(worst, float(np.abs(actual - expected).max()))
+    status = 'OK' if worst <= FULL_DECODE_MAX_ABS else 'FAIL'
+    failures += status == 'FAIL'
+    print(f"  max abs diff: {worst:.2e} [{status}]")
+
+    print("Parity on synthetic 4000x3000 JPEG (draft decode)")
+    expected = legacy_preprocess(Image.open(io.BytesIO(large[0])))
+    actual = engine.preprocess_batch([Image.open(io.BytesIO(large[0]))])
+    mean_diff = float(np.abs(actual - expected).mean())
+    status = 'OK' if mean_diff <= DRAFT_DECODE_MEAN_ABS else 'FAIL'
+    failures += status == 'FAIL'
+    print(f"  mean abs diff: {mean_diff:.4f}, max abs diff: {float(np.abs(actual - expected).max()):.4f} [{status}]")
+
+    print("\nLatency per image (median of 3 passes)")
+    for name, payloads in (('PlantVillage', dataset), ('12 MP JPEG', large)):
+        legacy = time_path(legacy_preprocess, payloads)
+        buffer = np.empty((IMG_SIZE, IMG_SIZE, 3), dtype=np.float32)
+        current = time_path(lambda image: engine.preprocess(image, out=buffer), payloads)
+        print(f"  {name:<14} legacy {legacy * 1000:8.2f} ms   engine {current * 1000:8.2f} ms   "
+              f"speedup {legacy / current:5.1f}x")
+
+    print(f"\nOutput memory per image: legacy float64 {IMG_SIZE * IMG_SIZE * 3 * 8 // 1024} KiB, "
+          f"engine float32 {IMG_SIZE * IMG_SIZE * 3 * 4 // 1024} KiB")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Latency of /api/search on a synthetically enlarged Book1 sheet.
+
+Book1.xlsx's rows are repeated (with generated district names mixed in)
+up to --rows rows and written to a temporary xlsx. Three paths are timed
+for the same dropdown selections:
+
+  before        read_excel per request + str.contains + iterrows (the old view)
+  before-cached the old filtering and iterrows on an already-loaded frame
+  after         RegionalIndex lookups + column-wise serialization
+
+    python -m benchmarks.regional_search [--rows 100000] [--repeat 20]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import pandas as pd
+
+from regional_store import RegionalIndex, RegionalStore
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def build_sheet(rows, path):
+    base = pd.read_excel(os.path.join(BASE_DIR, 'Book1.xlsx'))
+    base.columns = base.columns.str.strip()
+    rng = random.Random(0)
+    districts = [f'District{i}' for i in range(2000)]
+
+    df = pd.concat([base] * (rows // len(base) + 1), ignore_index=True).iloc[:rows].copy()
+    extra = [', '.join(rng.sample(districts, rng.randint(0, 2))) for _ in range(rows)]
+    df['district'] = [f'{d}, {e}' if e else d for d, e in zip(df['district'].astype(str), extra)]
+    df.to_excel(path, index=False)
+    return df
+
+
+def legacy_search(df, state, region, district):
+    """The previous /api/search filtering and serialization, without the prints"""
+    filtered_df = df.copy()
+    if state and 'states' in df.columns:
+        filtered_df = filtered_df[filtered_df['states'].str.strip() == state]
+    if region and 'priority_region' in df.columns:
+        filtered_df = filtered_df[filtered_df['priority_region'].str.strip() == region]
+    if district and 'district' in df.columns:
+        filtered_df = filtered_df[
+            filtered_df['district'].astype(str).str.contains(district, case=False, na=False)
+        ]
+    items = []
+    for _, row in filtered_df.iterrows():
+        items.append({
+            'state': str(row.get('states', 'N/A')),
+            'priority_region': str(row.get('priority_region', 'N/A')),
+            'priority_level': str(row.get('priority_level', 'N/A')),
+            'district': str(row.get('district', 'N/A')),
+            'target_crops': str(row.get('Target_crops', 'N/A')),
+            'main_problem': str(row.get('main problem', 'N/A')),
+            'notes': str(row.get('Notes', 'N/A'))
+        })
+    return items
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20, help='runs per query (median reported)')
+    parser.add_argument('--limit', type=int, default=50, help='page size for the paginated query')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'Book1.xlsx')
+        print(f"Writing a {args.rows}-row sheet...")
+        df = build_sheet(args.rows, path)
+
+        start = time.perf_counter()
+        pd.read_excel(path)
+        read_ms = (time.perf_counter() - start) * 1000
+
+        store = RegionalStore(path, snapshot_path=os.path.join(tmp, 'snapshot.pkl'))
+        start = time.perf_counter()
+        store.get()
+        cold_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        index = RegionalIndex(pd.read_pickle(store.snapshot_path)['df'])
+        snapshot_ms = (time.perf_counter() - start) * 1000
+
+        print(f"\nread_excel (paid by every request before): {read_ms:9.1f} ms")
+        print(f"store cold load (xlsx + index + snapshot):  {cold_ms:9.1f} ms")
+        print(f"index rebuild from snapshot:                {snapshot_ms:9.1f} ms")
+
+        state = str(df['states'].iloc[0]).strip()
+        region = str(df['priority_region'].iloc[0]).strip()
+        district = 'Ratlam'
+        queries = [
+            ('all rows', '', '', '', None),
+            ('state', state, '', '', None),
+            ('state+region', state, region, '', None),
+            ('district', '', '', district, None),
+            ('partial name', '', '', 'District1', None),
+            ('district, 1 page', '', '', district, args.limit),
+        ]
+
+        print(f"\n{'query':18} {'rows':>8} {'before-cached':>14} {'after':>10} {'rows':>8} {'speedup':>8}")
+        for name, s, r, d, limit in queries:
+            repeat = max(1, args.repeat // 5) if not (s or r or d) else args.repeat
+            before_ms, before_rows = timed(lambda: legacy_search(df, s, r, d), repeat)
+            after_ms, after_rows = timed(
+                lambda: index.items(index.positions(state=s, region=r, district=d)[:limit]), repeat)
+            print(f"{name:18} {before_rows:8} {before_ms:11.1f} ms {after_ms:7.2f} ms {after_rows:8} "
+                  f"{before_ms / after_ms:7.0f}x")
+        print(f"\n'before' requests also paid read_excel ({read_ms:.0f} ms) each.")
+        print("District rows differ where the old substring match hit partial names.")
+
+
+if __name__ == '__main__':
+    main()
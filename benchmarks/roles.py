@@ -0,0 +1,88 @@
+"""
+Import time and memory of the app for different APP_ROLES configurations.
+
+Each configuration runs in a fresh interpreter, which imports main (so
+create_app registers only the selected roles) and reports wall time,
+resident memory and which heavy libraries ended up imported.
+
+    python -m benchmarks.roles [--wait-ready] [--roles pages,weather inference ...]
+
+With --wait-ready, configurations that include inference also wait for the
+background model load and count its memory.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_CONFIGS = [
+    'pages',
+    'pages,weather',
+    'regional',
+    'catalogue',
+    'inference',
+    'all',
+]
+
+HEAVY_MODULES = ['tensorflow', 'pandas', 'mysql.connector', 'numpy', 'PIL']
+
+PROBE = r'''
+import json, sys, time
+start = time.perf_counter()
+import main
+import_seconds = time.perf_counter() - start
+
+if WAIT_READY and 'inference' in main.app.config['ROLES']:
+    import inference
+    while inference.model_state == 'loading':
+        time.sleep(0.05)
+
+rss_kb = 0
+with open('/proc/self/status') as f:
+    for line in f:
+        if line.startswith('VmRSS:'):
+            rss_kb = int(line.split()[1])
+
+print(json.dumps({
+    'import_seconds': import_seconds,
+    'ready_seconds': time.perf_counter() - start,
+    'rss_mb': rss_kb / 1024.0,
+    'modules': [name for name in HEAVY_MODULES if name in sys.modules],
+}))
+'''
+
+
+def measure(roles, wait_ready):
+    env = dict(os.environ, APP_ROLES=roles)
+    code = f"WAIT_READY = {wait_ready!r}\nHEAVY_MODULES = {HEAVY_MODULES!r}\n" + PROBE
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=BASE_DIR, env=env,
+        capture_output=True, text=True, check=True
+    )
+    # The app prints startup messages; the measurement is the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--roles', nargs='+', default=DEFAULT_CONFIGS, help='APP_ROLES values to measure')
+    parser.add_argument('--wait-ready', action='store_true', help='Include background model loading')
+    args = parser.parse_args()
+
+    print(f"{'APP_ROLES':<20}{'import s':>10}{'ready s':>10}{'RSS MB':>10}   heavy modules")
+    for roles in args.roles:
+        try:
+            result = measure(roles, args.wait_ready)
+        except subprocess.CalledProcessError as e:
+            print(f"{roles:<20}   failed: {e.stderr.strip().splitlines()[-1] if e.stderr else e}")
+            continue
+        print(f"{roles:<20}{result['import_seconds']:>10.2f}{result['ready_seconds']:>10.2f}"
+              f"{result['rss_mb']:>10.1f}   {', '.join(result['modules']) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
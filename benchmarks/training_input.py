@@ -0,0 +1,99 @@
+"""
+Input pipeline throughput: the notebook's ImageDataGenerator vs train.py's tf.data.
+
+Both produce augmented (batch, 224, 224, 3) float32 training batches from
+datasets/PlantVillage; no model runs, so the numbers are the most images
+per second each pipeline can feed to training.
+
+The tf.data pipeline is measured on its first epoch (decoding every file)
+and on a second epoch served from its cache. With --data-cache, the
+pipeline streaming from a dataset_cache.py build is measured too.
+
+    python -m benchmarks.training_input [--batches 100] [--batch-size 32] [--data-cache DIR]
+"""
+
+import argparse
+import os
+import time
+
+import tensorflow as tf
+
+import train
+from plantvillage import DATA_DIR
+
+
+def images_per_second(batches, count):
+    """Time pulling `count` batches from an iterator (after one warmup batch)"""
+    iterator = iter(batches)
+    next(iterator)
+    images = 0
+    start = time.perf_counter()
+    for _ in range(count):
+        images += len(next(iterator)[0])
+    return images / (time.perf_counter() - start)
+
+
+def legacy_generator(data_dir, batch_size):
+    """ImageDataGenerator configured as in models/Untitled1.ipynb"""
+    from tensorflow.keras.preprocessing.image import ImageDataGenerator
+
+    datagen = ImageDataGenerator(
+        rescale=1./255,
+        rotation_range=20,
+        width_shift_range=0.2,
+        height_shift_range=0.2,
+        shear_range=0.2,
+        zoom_range=0.2,
+        horizontal_flip=True,
+        validation_split=0.2,
+        fill_mode='nearest'
+    )
+    return datagen.flow_from_directory(
+        data_dir,
+        target_size=(train.IMG_SIZE, train.IMG_SIZE),
+        batch_size=batch_size,
+        class_mode='categorical',
+        subset='training'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--batches', type=int, default=100, help='batches timed per pipeline')
+    parser.add_argument('--batch-size', type=int, default=train.BATCH_SIZE)
+    parser.add_argument('--data-cache', default=None, help='dataset_cache.py directory to benchmark as well')
+    args = parser.parse_args()
+
+    print(f"CPU cores: {os.cpu_count()}")
+
+    generator = legacy_generator(args.data_dir, args.batch_size)
+    legacy = images_per_second(generator, args.batches)
+
+    # Cache only the timed subset so the "cached" epoch really is served from memory
+    train_files, _, class_names = train.split_files(args.data_dir)
+    subset = train_files[:(args.batches + 1) * args.batch_size]
+    ds = train.make_dataset(subset, len(class_names), args.batch_size, training=True,
+                            cache='memory', augmenter=train.build_augmenter())
+    cold = images_per_second(ds, args.batches)
+    warm = images_per_second(ds, args.batches)
+
+    print(f"\n{args.batches} batches of {args.batch_size}, images/sec")
+    print(f"  ImageDataGenerator          {legacy:8.1f}")
+    print(f"  tf.data, first epoch        {cold:8.1f}   ({cold / legacy:.1f}x)")
+    print(f"  tf.data, cached epochs      {warm:8.1f}   ({warm / legacy:.1f}x)")
+
+    if args.data_cache:
+        from dataset_cache import DatasetCache
+
+        cache = DatasetCache(args.data_cache)
+        train_indices, _ = cache.split()
+        ds = train.make_cached_dataset(cache, train_indices, len(cache.classes), args.batch_size,
+                                       training=True, augmenter=train.build_augmenter())
+        mapped = images_per_second(ds, args.batches)
+        print(f"  tf.data, memory-mapped cache {mapped:7.1f}   ({mapped / legacy:.1f}x)")
+    print(f"\nTensorFlow {tf.__version__}")
+
+
+if __name__ == '__main__':
+    main()
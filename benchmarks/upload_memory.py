@@ -0,0 +1,139 @@
+"""
+Peak memory of /api/predict's upload handling under concurrent large uploads.
+
+Every case runs in a fresh process in which N threads handle one upload
+each at the same time (cache key, open, decode and preprocess, as the
+endpoint does before the forward pass). The process's peak RSS above its
+starting RSS is reported.
+
+    legacy     file.read(), make_key(bytes), Image.open(BytesIO(bytes))
+    streaming  uploads.read_upload + uploads.open_image
+
+Uploads are read from files on disk, as werkzeug spools them. The "bomb"
+case is a small PNG declaring more pixels than MAX_IMAGE_PIXELS.
+
+    python -m benchmarks.upload_memory [--concurrency 8] [--megapixels 24]
+"""
+
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+
+import numpy as np
+from PIL import Image
+
+from prediction_cache import PredictionCache
+from preprocessing import ImagePreprocessor
+from uploads import MAX_IMAGE_PIXELS, UploadError, open_image, read_upload
+
+MODEL_VERSION = 'benchmark'
+
+
+def rss_kb(field):
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def legacy_handle(path, preprocessor):
+    with open(path, 'rb') as f:
+        image_bytes = f.read()
+    PredictionCache.make_key(image_bytes, MODEL_VERSION)
+    image = Image.open(io.BytesIO(image_bytes))
+    return preprocessor.preprocess(image)
+
+
+def streaming_handle(path, preprocessor):
+    with open(path, 'rb') as f:
+        read_upload(f, MODEL_VERSION, max_bytes=float('inf'))
+        with open_image(f) as image:
+            return preprocessor.preprocess(image)
+
+
+def run_child(variant, path, concurrency):
+    """Handle `concurrency` simultaneous uploads of `path`; print a JSON result"""
+    preprocessor = ImagePreprocessor()
+    handle = legacy_handle if variant == 'legacy' else streaming_handle
+    barrier = threading.Barrier(concurrency)
+    outcomes = []
+
+    def worker():
+        barrier.wait()
+        try:
+            handle(path, preprocessor)
+            outcomes.append('ok')
+        except UploadError as e:
+            outcomes.append(f'rejected {e.status}')
+
+    start_rss = rss_kb('VmRSS')
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(json.dumps({
+        'peak_mb': round((rss_kb('VmHWM') - start_rss) / 1024.0, 1),
+        'outcomes': sorted(set(outcomes))
+    }))
+
+
+def make_photo(path, megapixels):
+    """A noisy gradient JPEG, about as hard to compress as a real photo"""
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+    rng = np.random.default_rng(0)
+    gradient = np.linspace(0, 200, width, dtype=np.float32)[None, :, None]
+    pixels = gradient + rng.normal(0, 25, (height, width, 3)).astype(np.float32)
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(path, 'JPEG', quality=95)
+
+
+def make_bomb(path):
+    side = int((MAX_IMAGE_PIXELS * 1.25) ** 0.5)
+    Image.new('L', (side, side)).save(path, 'PNG')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--megapixels', type=float, default=24)
+    parser.add_argument('--bomb-concurrency', type=int, default=2,
+                        help='the legacy path decodes every bomb in full, keep this small')
+    parser.add_argument('--child', nargs=3, metavar=('VARIANT', 'PATH', 'CONCURRENCY'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        variant, path, concurrency = args.child
+        run_child(variant, path, int(concurrency))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        photo = os.path.join(tmp, 'photo.jpg')
+        bomb = os.path.join(tmp, 'bomb.png')
+        make_photo(photo, args.megapixels)
+        make_bomb(bomb)
+
+        cases = [
+            (f'{args.megapixels:g} MP JPEG ({os.path.getsize(photo) / 2 ** 20:.1f} MB)', photo, args.concurrency),
+            (f'PNG bomb ({os.path.getsize(bomb) / 2 ** 10:.0f} KB)', bomb, args.bomb_concurrency),
+        ]
+        print(f"{'upload':<28}{'threads':>8}{'variant':>11}{'peak MB':>10}  outcome")
+        for name, path, concurrency in cases:
+            for variant in ('legacy', 'streaming'):
+                output = subprocess.run(
+                    [sys.executable, '-m', 'benchmarks.upload_memory', '--child', variant, path, str(concurrency)],
+                    capture_output=True, text=True, check=True
+                ).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                print(f"{name:<28}{concurrency:>8}{variant:>11}{result['peak_mb']:>10.1f}  "
+                      f"{', '.join(result['outcomes'])}")
+
+
+if __name__ == '__main__':
+    main()
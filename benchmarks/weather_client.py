@@ -0,0 +1,230 @@
+"""
+Behaviour checks of the OpenWeatherMap client against a local stand-in.
+
+An http.server on 127.0.0.1 plays OpenWeatherMap (configurable delay,
+error status and Retry-After) and records every call. Checked:
+
+  ttl            a second get within WEATHER_CACHE_TTL is a cache hit; after
+                 it expires the city is fetched again
+  single-flight  N concurrent misses for a city make one upstream fetch
+                 (one weather + one forecast call) per city
+  stale          when upstream errors or times out, the last good data is
+                 served marked stale
+  rate limit     the prefetcher spaces refreshes by the call budget and
+                 pauses for Retry-After on a 429
+
+Exits 1 if a check fails.
+
+    python -m benchmarks.weather_client [--concurrency 20]
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from weather_client import OpenWeatherClient, WeatherPrefetcher
+
+WEATHER = {'main': {'temp': 30, 'humidity': 60}, 'wind': {'speed': 2}}
+FORECAST = {'list': [{'dt': 1700000000, 'main': {'temp': 30, 'humidity': 60}, 'wind': {'speed': 2}}]}
+
+
+class StandIn:
+    """Settings and call log shared with the request handler"""
+
+    def __init__(self):
+        self.delay = 0.0
+        self.status = 200
+        self.retry_after = None
+        self.calls = []      # (monotonic time, endpoint, lat)
+        self.lock = threading.Lock()
+
+    def reset(self, delay=0.0, status=200, retry_after=None):
+        with self.lock:
+            self.delay, self.status, self.retry_after = delay, status, retry_after
+            self.calls = []
+
+    def count(self, endpoint=None):
+        with self.lock:
+            return sum(1 for _, e, _ in self.calls if endpoint is None or e == endpoint)
+
+
+def make_handler(stand_in):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            endpoint = url.path.rsplit('/', 1)[-1]
+            with stand_in.lock:
+                stand_in.calls.append((time.monotonic(), endpoint, parse_qs(url.query).get('lat', [''])[0]))
+                delay, status, retry_after = stand_in.delay, stand_in.status, stand_in.retry_after
+            time.sleep(delay)
+
+            body = json.dumps(WEATHER if endpoint == 'weather' else FORECAST).encode('utf-8')
+            try:
+                self.send_response(status)
+                if retry_after is not None:
+                    self.send_header('Retry-After', str(retry_after))
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except OSError:
+                # The client timed out and hung up
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class Checks:
+    def __init__(self):
+        self.failed = 0
+
+    def check(self, name, ok, detail=''):
+        print(f"  {'✓' if ok else '✗'} {name}{f'  ({detail})' if detail else ''}")
+        if not ok:
+            self.failed += 1
+
+
+def make_client(base_url, **kwargs):
+    return OpenWeatherClient('test-key', f'{base_url}/weather', f'{base_url}/forecast', **kwargs)
+
+
+def check_ttl(checks, stand_in, base_url):
+    print("TTL")
+    stand_in.reset()
+    client = make_client(base_url, ttl=0.5)
+    first = client.get('Bhopal', 23.26, 77.41)
+    second = client.get('Bhopal', 23.26, 77.41)
+    checks.check('second get within the TTL is a cache hit',
+                 not first.cached and second.cached and stand_in.count() == 2,
+                 f'{stand_in.count()} upstream calls')
+    time.sleep(0.6)
+    third = client.get('Bhopal', 23.26, 77.41)
+    checks.check('get after the TTL fetches again', not third.cached and stand_in.count() == 4,
+                 f'{stand_in.count()} upstream calls')
+
+
+def check_single_flight(checks, stand_in, base_url, concurrency):
+    print(f"Single-flight ({concurrency} concurrent misses for each of 2 cities)")
+    stand_in.reset(delay=0.3)
+    client = make_client(base_url)
+    barrier = threading.Barrier(2 * concurrency)
+    errors = []
+
+    def get(city, lat):
+        barrier.wait()
+        try:
+            client.get(city, lat, 77.0)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=get, args=(city, lat))
+               for city, lat in (('Bhopal', 23.26), ('Indore', 22.72)) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = client.stats()
+    checks.check('one weather and one forecast call per city',
+                 not errors and stand_in.count('weather') == 2 and stand_in.count('forecast') == 2,
+                 f"{stand_in.count()} upstream calls, {stats['coalesced']} coalesced, {len(errors)} errors")
+
+
+def check_stale(checks, stand_in, base_url):
+    print("Stale fallback")
+    stand_in.reset()
+    client = make_client(base_url, ttl=0.2, timeout=0.5)
+    client.get('Bhopal', 23.26, 77.41)
+    time.sleep(0.3)
+
+    stand_in.reset(status=502)
+    result = client.get('Bhopal', 23.26, 77.41)
+    checks.check('upstream 502 serves the last good data as stale',
+                 result.stale and result.weather == WEATHER and result.error is not None, result.error or '')
+
+    stand_in.reset(delay=3.0)
+    start = time.monotonic()
+    result = client.get('Bhopal', 23.26, 77.41)
+    elapsed = time.monotonic() - start
+    checks.check('upstream timeout serves the last good data as stale',
+                 result.stale and result.weather == WEATHER and elapsed < 2 * client.timeout + 0.5,
+                 f'answered after {elapsed:.2f}s')
+
+    stand_in.reset(status=502)
+    cold = make_client(base_url, timeout=0.5)
+    try:
+        cold.get('Bhopal', 23.26, 77.41)
+        raised = False
+    except requests.exceptions.RequestException:
+        raised = True
+    checks.check('without a cached copy the error is raised', raised)
+
+
+def refresh_starts(stand_in):
+    """Monotonic start time of every prefetch refresh (its weather call)"""
+    with stand_in.lock:
+        return sorted(t for t, endpoint, _ in stand_in.calls if endpoint == 'weather')
+
+
+def check_rate_limit(checks, stand_in, base_url):
+    print("Prefetcher rate limit")
+    cities = {f'City{i}': {'lat': 20.0 + i, 'lon': 77.0} for i in range(6)}
+
+    # 600 calls/minute at two calls per refresh: one refresh every 0.2s
+    stand_in.reset()
+    prefetcher = WeatherPrefetcher(make_client(base_url), cities, interval=60, concurrency=3,
+                                   jitter=0, max_calls_per_minute=600)
+    prefetcher.refresh_all()
+    starts = refresh_starts(stand_in)
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    checks.check('refreshes are spaced by the call budget',
+                 len(starts) == len(cities) and min(gaps) >= prefetcher.min_spacing - 0.02,
+                 f'smallest gap {min(gaps):.3f}s, budget {prefetcher.min_spacing:.3f}s')
+
+    # A 429 pauses every refresh for Retry-After seconds
+    stand_in.reset(status=429, retry_after=1)
+    prefetcher = WeatherPrefetcher(make_client(base_url), cities, interval=60, concurrency=1,
+                                   jitter=0, max_calls_per_minute=0)
+    prefetcher.refresh_all()
+    starts = refresh_starts(stand_in)
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    checks.check('a 429 pauses refreshes for Retry-After',
+                 len(starts) == len(cities) and min(gaps) >= 0.98,
+                 f'smallest gap {min(gaps):.2f}s after 429 with Retry-After: 1')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=20, help='concurrent misses per city')
+    args = parser.parse_args()
+
+    stand_in = StandIn()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(stand_in))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+
+    checks = Checks()
+    try:
+        check_ttl(checks, stand_in, base_url)
+        check_single_flight(checks, stand_in, base_url, args.concurrency)
+        check_stale(checks, stand_in, base_url)
+        check_rate_limit(checks, stand_in, base_url)
+    finally:
+        server.shutdown()
+
+    print(f"\n{'All checks passed' if not checks.failed else f'{checks.failed} check(s) failed'}")
+    sys.exit(1 if checks.failed else 0)
+
+
+if __name__ == '__main__':
+    main()
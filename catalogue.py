@@ -0,0 +1,328 @@
+"""
+Disease catalogue backed by MySQL (crops, disease and treatment tables).
+"""
+
+from flask import Blueprint, jsonify, request
+import mysql.connector
+import base64
+import json
+import os
+import threading
+import time
+from mysql.connector import Error
+
+from catalogue_search import CatalogueSearch
+from db_pool import ConnectionPool, PoolTimeout
+from logger import fields as log_fields, get_logger
+from metrics import histogram
+from response_cache import ResponseCache
+
+catalogue_bp = Blueprint('catalogue', __name__)
+log = get_logger('catalogue')
+
+QUERY_SECONDS = histogram('mysql_query_seconds', 'MySQL execute + fetch time', ['query'])
+
+# Database configuration from environment variables
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'user': os.getenv('DB_USER', 'root'),
+    'password': os.getenv('DB_PASSWORD', 'kanmysql'),
+    'database': os.getenv('DB_NAME', 'crop_disease_db')
+}
+
+def connect():
+    """Open a new database connection for the pool
+
+    Autocommit keeps a reused connection from reading through a stale
+    REPEATABLE READ snapshot left open by its previous SELECT.
+    """
+    return mysql.connector.connect(autocommit=True, **DB_CONFIG)
+
+# Connections are opened on first use and reused across requests
+db_pool = ConnectionPool(connect)
+
+def run_query(name, query, params=(), dictionary=False):
+    """Run `query` on a pooled connection and return every row, timed as `name`"""
+    with db_pool.connection() as connection:
+        cursor = connection.cursor(dictionary=dictionary)
+        with QUERY_SECONDS.time(query=name):
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+        cursor.close()
+    return rows
+
+# Serialized responses are reused until the TTL passes or the tables change
+CATALOGUE_CACHE_TTL = float(os.getenv('CATALOGUE_CACHE_TTL', '300'))
+CATALOGUE_CHECK_INTERVAL = float(os.getenv('CATALOGUE_CHECK_INTERVAL', '10'))
+# Index lookups on updated_at (db/migrations/002) catch inserts and edits;
+# the counts catch deletes. Cheap enough to run every few seconds.
+CATALOGUE_VERSION_QUERY = os.getenv('CATALOGUE_VERSION_QUERY', (
+    'SELECT (SELECT MAX(updated_at) FROM crops), (SELECT COUNT(*) FROM crops), '
+    '(SELECT MAX(updated_at) FROM disease), (SELECT COUNT(*) FROM disease), '
+    '(SELECT MAX(updated_at) FROM treatment), (SELECT COUNT(*) FROM treatment)'
+))
+
+class CatalogueVersion:
+    """Result of the change-detection query; differs whenever the tables change
+
+    The response cache and the search index both poll it; the query runs
+    at most once per `interval` seconds in a process and both share the
+    result.
+    """
+
+    def __init__(self, query, interval):
+        self.query = query
+        self.interval = interval
+        self._value = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            if self._value is None or time.monotonic() - self._checked_at >= self.interval:
+                self._value = repr(run_query('version', self.query))
+                self._checked_at = time.monotonic()
+            return self._value
+
+catalogue_version = CatalogueVersion(CATALOGUE_VERSION_QUERY, CATALOGUE_CHECK_INTERVAL)
+
+response_cache = ResponseCache(ttl=CATALOGUE_CACHE_TTL, version=catalogue_version,
+                               check_interval=CATALOGUE_CHECK_INTERVAL)
+
+# Columns /api/explore can return, in response order
+EXPLORE_COLUMNS = {
+    'disease_id': 'd.disease_id',
+    'disease_name': 'd.disease_name',
+    'symptoms': 'd.symptoms',
+    'prevention': 'd.prevention',
+    'crop_id': 'c.crop_id',
+    'crop_name': 'c.crop_name',
+    'crop_image_url': 'c.crop_image_url',
+    'crop_description': 'c.description',
+    'treatment_id': 't.treatment_id',
+    'treatment_name': 't.treatment_name',
+    'dosage': 't.dosage',
+    'application_method': 't.application_method',
+    'precautions': 't.precautions',
+}
+# Sort key of the catalogue; always returned so pages can be continued
+EXPLORE_KEY = ('crop_name', 'disease_name', 'disease_id')
+EXPLORE_MAX_LIMIT = int(os.getenv('EXPLORE_MAX_LIMIT', '200'))
+
+def encode_cursor(row):
+    """Opaque keyset cursor pointing just after `row`"""
+    key = json.dumps([row[k] for k in EXPLORE_KEY], default=str).encode('utf-8')
+    return base64.urlsafe_b64encode(key).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        crop_name, disease_name, disease_id = json.loads(
+            base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        )
+        return str(crop_name), str(disease_name), int(disease_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid 'after' cursor")
+
+def parse_explore_args(args):
+    """Validate /api/explore query parameters; raise ValueError with a message"""
+    crop = args.get('crop', '').strip() or None
+
+    fields = [f.strip() for f in args.get('fields', '').split(',') if f.strip()]
+    unknown = [f for f in fields if f not in EXPLORE_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {unknown}")
+
+    limit = args.get('limit', '').strip()
+    if limit:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError("'limit' must be an integer")
+        if not 1 <= limit <= EXPLORE_MAX_LIMIT:
+            raise ValueError(f"'limit' must be between 1 and {EXPLORE_MAX_LIMIT}")
+    else:
+        limit = None
+
+    after = args.get('after', '').strip()
+    after = decode_cursor(after) if after else None
+    return crop, fields, limit, after
+
+def load_diseases(crop=None, fields=None, limit=None, after=None):
+    """Run the catalogue join and return the /api/explore payload
+
+    `crop` filters on crop_name, `fields` projects the columns (the sort key
+    is always included), and `limit`/`after` page through the results in
+    (crop_name, disease_name, disease_id) order. Without a limit every
+    matching row is returned.
+    """
+    names = list(EXPLORE_COLUMNS)
+    if fields:
+        names = [n for n in names if n in fields or n in EXPLORE_KEY]
+    columns = ',\n                '.join(f'{EXPLORE_COLUMNS[n]} AS {n}' for n in names)
+
+    conditions = []
+    params = []
+    if crop:
+        conditions.append('c.crop_name = %s')
+        params.append(crop)
+    if after:
+        # Expanded row comparison, which MySQL can resolve with index ranges
+        conditions.append(
+            '(c.crop_name > %s OR (c.crop_name = %s AND '
+            '(d.disease_name > %s OR (d.disease_name = %s AND d.disease_id > %s))))'
+        )
+        crop_name, disease_name, disease_id = after
+        params.extend([crop_name, crop_name, disease_name, disease_name, disease_id])
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    page = ''
+    if limit:
+        # One extra row tells us whether there is a next page
+        page = 'LIMIT %s'
+        params.append(limit + 1)
+
+    # SQL Query joining all three tables
+    query = f"""
+        SELECT 
+            {columns}
+        FROM disease d
+        INNER JOIN crops c ON d.crop_id = c.crop_id
+        INNER JOIN treatment t ON d.treatment_id = t.treatment_id
+        {where}
+        ORDER BY c.crop_name, d.disease_name, d.disease_id
+        {page}
+    """
+    results = run_query('explore', query, tuple(params), dictionary=True)
+    
+    next_cursor = None
+    if limit and len(results) > limit:
+        results = results[:limit]
+        next_cursor = encode_cursor(results[-1])
+    
+    return {
+        'success': True,
+        'count': len(results),
+        'data': results,
+        'next_cursor': next_cursor
+    }
+
+def load_crops():
+    """Return the /api/crops payload"""
+    # Explicit columns: updated_at is for change detection, not the API
+    results = run_query(
+        'crops',
+        "SELECT crop_id, crop_name, crop_image_url, description, created_at FROM crops ORDER BY crop_name",
+        dictionary=True
+    )
+    
+    return {
+        'success': True,
+        'count': len(results),
+        'data': results
+    }
+
+# Columns indexed for /api/explore/search and returned with each hit
+SEARCH_FIELDS = ['disease_name', 'symptoms', 'prevention', 'crop_image_url', 'treatment_name']
+SEARCH_MAX_LIMIT = 50
+SEARCH_READY_TIMEOUT = float(os.getenv('SEARCH_READY_TIMEOUT', '5'))
+
+search_index = CatalogueSearch(lambda: load_diseases(fields=SEARCH_FIELDS)['data'], catalogue_version,
+                               check_interval=CATALOGUE_CHECK_INTERVAL)
+
+@catalogue_bp.route('/api/explore', methods=['GET'])
+def get_diseases():
+    """
+    Fetch all crop diseases with related crop and treatment information
+    Returns JSON with joined data from crops, disease, and treatment tables
+
+    Query parameters (all optional):
+        crop    - only diseases of this crop_name
+        fields  - comma-separated columns to return
+        limit   - page size; the response's next_cursor fetches the next page
+        after   - next_cursor from the previous page
+    """
+    try:
+        crop, fields, limit, after = parse_explore_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e), 'fields': list(EXPLORE_COLUMNS)}), 400
+    
+    # One cache entry per distinct page
+    key = f"explore|{crop}|{','.join(sorted(fields))}|{limit}|{request.args.get('after', '')}"
+    try:
+        return response_cache.respond(key, lambda: load_diseases(crop, fields, limit, after))
+    except PoolTimeout as e:
+        log.warning("Database pool exhausted", extra=log_fields(error=e))
+        return jsonify({'error': 'Database busy, try again'}), 503
+    except Error as e:
+        log.error("Error executing query", extra=log_fields(error=e))
+        return jsonify({'error': f'Query execution failed: {str(e)}'}), 500
+
+@catalogue_bp.route('/api/health', methods=['GET'])
+def check():
+    """Health check endpoint to verify API is running"""
+    if db_pool.ping():
+        return jsonify({
+            'status': 'healthy',
+            'database': 'connected',
+            'pool': db_pool.stats()
+        }), 200
+    else:
+        return jsonify({
+            'status': 'unhealthy',
+            'database': 'disconnected',
+            'pool': db_pool.stats()
+        }), 500
+
+@catalogue_bp.route('/api/crops', methods=['GET'])
+def get_crops():
+    """Get all crops"""
+    try:
+        return response_cache.respond('crops', load_crops)
+    except PoolTimeout:
+        return jsonify({'error': 'Database busy, try again'}), 503
+    except Error as e:
+        return jsonify({'error': f'Query failed: {str(e)}'}), 500
+
+@catalogue_bp.route('/api/explore/search', methods=['GET'])
+def search_diseases():
+    """
+    Rank diseases by how well their name, symptoms and prevention match `q`
+    Optional: `crop` (crop_name filter) and `limit` (default 10, max 50)
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': "Missing search text 'q'"}), 400
+    try:
+        limit = int(request.args.get('limit', 10))
+    except ValueError:
+        return jsonify({'error': "'limit' must be an integer"}), 400
+    if not 1 <= limit <= SEARCH_MAX_LIMIT:
+        return jsonify({'error': f"'limit' must be between 1 and {SEARCH_MAX_LIMIT}"}), 400
+    crop = request.args.get('crop', '').strip() or None
+    
+    search_index.start()
+    if not search_index.ready.wait(SEARCH_READY_TIMEOUT):
+        response = jsonify({'error': 'Search index is loading', 'detail': search_index.stats()['last_error']})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    
+    start = time.perf_counter()
+    results = search_index.search(query, limit=limit, crop=crop)
+    took_ms = (time.perf_counter() - start) * 1000
+    
+    return jsonify({
+        'success': True,
+        'query': query,
+        'count': len(results),
+        'took_ms': round(took_ms, 3),
+        'data': results
+    }), 200
+
+@catalogue_bp.route('/api/explore/search/stats', methods=['GET'])
+def search_stats():
+    """Search index size and refresh counters"""
+    return jsonify(search_index.stats())
+
+@catalogue_bp.route('/api/explore/cache', methods=['GET'])
+def explore_cache_stats():
+    """Response cache hit/miss/304 counters"""
+    return jsonify(response_cache.stats())
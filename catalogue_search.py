@@ -0,0 +1,223 @@
+"""
+In-memory full-text search over the disease catalogue.
+
+Diseases are indexed by disease_name, crop_name, symptoms and prevention
+in an inverted index and ranked with BM25, with name matches weighted
+above symptoms and symptoms above prevention. Queries never touch MySQL.
+
+CatalogueSearch keeps the index current from a background thread: every
+CATALOGUE_CHECK_INTERVAL seconds it runs the catalogue's change-detection
+query and, when that changes, reloads the rows and re-indexes only the
+diseases whose content changed (and drops deleted ones).
+"""
+
+import hashlib
+import heapq
+import math
+import re
+import threading
+import time
+from collections import Counter
+
+from logger import fields, get_logger
+
+log = get_logger('catalogue_search')
+
+# Field weights for the term frequencies (a simple BM25F)
+FIELD_WEIGHTS = {
+    'disease_name': 2.0,
+    'crop_name': 1.5,
+    'symptoms': 1.0,
+    'prevention': 0.5,
+}
+
+STOPWORDS = frozenset('''
+    a an and are as at be by for from has have in into is it its of on or the
+    their then there these this to was were which with
+'''.split())
+
+_TOKEN = re.compile(r'\w+')
+
+
+def stem(token):
+    """Crude plural folding so 'spots'/'spot' and 'leaves'/'leaf' match"""
+    if len(token) > 4 and token.endswith('ies'):
+        return token[:-3] + 'y'
+    if len(token) > 4 and token.endswith('ves'):
+        return token[:-3] + 'f'
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    return [stem(t) for t in _TOKEN.findall(str(text or '').lower()) if t not in STOPWORDS]
+
+
+class SearchIndex:
+    """BM25 inverted index supporting per-document upserts and removals"""
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}     # term -> {doc_id: weighted term frequency}
+        self.lengths = {}      # doc_id -> weighted document length
+        self.documents = {}    # doc_id -> stored row returned with results
+        self.doc_terms = {}    # doc_id -> terms it is posted under, for removals
+        self.total_length = 0.0
+
+    def __len__(self):
+        return len(self.documents)
+
+    def remove(self, doc_id):
+        if doc_id not in self.documents:
+            return
+        for term in self.doc_terms.pop(doc_id):
+            docs = self.postings[term]
+            del docs[doc_id]
+            if not docs:
+                del self.postings[term]
+        self.total_length -= self.lengths.pop(doc_id)
+        del self.documents[doc_id]
+
+    def upsert(self, doc_id, fields, document):
+        """(Re)index `doc_id` from its text `fields`; `document` is returned with hits"""
+        self.remove(doc_id)
+        frequencies = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(fields.get(field)):
+                frequencies[token] += weight
+        for term, frequency in frequencies.items():
+            self.postings.setdefault(term, {})[doc_id] = frequency
+        length = sum(frequencies.values())
+        self.doc_terms[doc_id] = list(frequencies)
+        self.lengths[doc_id] = length
+        self.total_length += length
+        self.documents[doc_id] = document
+
+    def search(self, query, limit=10, where=None):
+        """Top `limit` (score, doc_id) pairs for `query`, optionally filtered by `where(document)`"""
+        terms = set(tokenize(query))
+        if not terms or not self.documents:
+            return []
+
+        n = len(self.documents)
+        average_length = self.total_length / n or 1.0
+        scores = {}
+        for term in terms:
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, frequency in docs.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        if where is not None:
+            scores = {d: s for d, s in scores.items() if where(self.documents[d])}
+        return heapq.nlargest(limit, ((s, d) for d, s in scores.items()), key=lambda pair: pair[0])
+
+
+class CatalogueSearch:
+    """A SearchIndex kept in sync with the catalogue tables"""
+
+    def __init__(self, load_rows, version, check_interval=10.0):
+        """`load_rows()` returns catalogue rows (dicts with disease_id and the
+        FIELD_WEIGHTS columns); `version()` returns a value that changes with them
+        """
+        self.load_rows = load_rows
+        self.version = version
+        self.check_interval = check_interval
+
+        self.index = SearchIndex()
+        self.ready = threading.Event()
+        self._lock = threading.RLock()
+        self._hashes = {}
+        self._version = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        self.refreshes = 0
+        self.updated = 0
+        self.removed = 0
+        self.errors = 0
+        self.last_refresh = None
+        self.last_error = None
+
+    def start(self):
+        """Start the refresh thread (idempotent, also after a fork)"""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='catalogue-search', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+                log.warning("Catalogue search refresh failed", extra=fields(error=e))
+            time.sleep(self.check_interval)
+
+    def refresh(self, force=False):
+        """Re-index changed rows if the catalogue version moved"""
+        try:
+            version = self.version()
+        except Exception as e:
+            # Without change detection, reload every interval; the diff keeps it cheap
+            self.last_error = str(e)
+            version = None
+        if not force and version is not None and version == self._version and self.ready.is_set():
+            return False
+
+        rows = self.load_rows()
+        hashes = {}
+        changed = []
+        for row in rows:
+            doc_id = row['disease_id']
+            digest = hashlib.blake2b(repr(sorted(row.items())).encode('utf-8'), digest_size=16).digest()
+            hashes[doc_id] = digest
+            if self._hashes.get(doc_id) != digest:
+                changed.append(row)
+
+        with self._lock:
+            removed = [doc_id for doc_id in self._hashes if doc_id not in hashes]
+            for doc_id in removed:
+                self.index.remove(doc_id)
+            for row in changed:
+                self.index.upsert(row['disease_id'], row, row)
+            self._hashes = hashes
+            self._version = version
+
+        self.refreshes += 1
+        self.updated += len(changed)
+        self.removed += len(removed)
+        self.last_refresh = time.time()
+        if changed or removed:
+            log.info("Catalogue search index refreshed",
+                     extra=fields(updated=len(changed), removed=len(removed), diseases=len(self.index)))
+        self.ready.set()
+        return True
+
+    def search(self, query, limit=10, crop=None):
+        """Ranked catalogue rows (with a `score`) matching `query`"""
+        where = (lambda document: document.get('crop_name') == crop) if crop else None
+        with self._lock:
+            hits = self.index.search(query, limit, where)
+            return [dict(self.index.documents[doc_id], score=round(score, 4)) for score, doc_id in hits]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'ready': self.ready.is_set(),
+                'documents': len(self.index),
+                'terms': len(self.index.postings),
+                'refreshes': self.refreshes,
+                'documents_updated': self.updated,
+                'documents_removed': self.removed,
+                'errors': self.errors,
+                'last_refresh': self.last_refresh,
+                'last_error': self.last_error
+            }
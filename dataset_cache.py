@@ -0,0 +1,307 @@
+"""
+Preprocessed, memory-mapped cache of datasets/PlantVillage.
+
+Every image is decoded and resized once, with the serving preprocessor,
+into (N, 224, 224, 3) uint8 shards saved as .npy files. Training and
+evaluation open them with np.load(mmap_mode='r'), so reading a batch is a
+page-cache copy instead of a JPEG decode.
+
+    python dataset_cache.py [--data-dir datasets/PlantVillage] [--cache-dir ...] [--compact]
+
+Layout of the cache directory:
+
+    manifest.json       classes, shards and one entry per image:
+                        relative path, content hash, file size/mtime,
+                        class folder, shard and row
+    shard-00000.npy     up to SHARD_SIZE images each
+
+Rebuilding is incremental. Files whose size and mtime match the manifest
+are not read; changed files are re-hashed and only re-decoded if their
+content changed. New and changed images go into new shards, deleted ones
+are dropped from the manifest. Shards are never modified after they are
+written and the manifest is replaced atomically, so readers always see a
+consistent cache. --compact rewrites the shards without dead rows.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from plantvillage import DATA_DIR, is_validation, list_classes, list_images, relative_image_path
+from preprocessing import ImagePreprocessor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_CACHE_DIR = os.getenv('DATASET_CACHE_DIR', os.path.join(BASE_DIR, 'datasets', 'PlantVillage_cache'))
+
+IMG_SIZE = 224
+SHARD_SIZE = 1024
+MANIFEST_VERSION = 1
+# Recorded in the manifest; a cache built with a different preprocessing is rebuilt
+PREPROCESSING = f'pil-bicubic-{IMG_SIZE}'
+# Compact automatically once this fraction of shard rows is dead
+COMPACT_THRESHOLD = 0.25
+
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+def _write_json_atomic(path, data):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+class DatasetCache:
+    """Read side: memory-mapped images plus labels from a built cache"""
+
+    def __init__(self, cache_dir=DATASET_CACHE_DIR):
+        self.cache_dir = cache_dir
+        with open(os.path.join(cache_dir, 'manifest.json')) as f:
+            self.manifest = json.load(f)
+
+        self.classes = self.manifest['classes']
+        class_index = {name: i for i, name in enumerate(self.classes)}
+        entries = sorted(self.manifest['entries'].items())
+        self.paths = [path for path, _ in entries]
+        self.hashes = [entry['hash'] for _, entry in entries]
+        self.labels = np.array([class_index[entry['class']] for _, entry in entries], dtype=np.int64)
+        self._shard_of = np.array([entry['shard'] for _, entry in entries], dtype=np.int64)
+        self._row_of = np.array([entry['row'] for _, entry in entries], dtype=np.int64)
+        # Map every shard now: a later rebuild may delete files this manifest
+        # refers to, but an existing mapping stays valid
+        self._shards = {
+            int(shard_id): np.load(os.path.join(cache_dir, f'shard-{int(shard_id):05d}.npy'), mmap_mode='r')
+            for shard_id in self.manifest['shards']
+        }
+
+    def __len__(self):
+        return len(self.paths)
+
+    def images(self, indices):
+        """uint8 (len(indices), 224, 224, 3) array for the given image indices"""
+        indices = np.asarray(indices, dtype=np.int64)
+        out = np.empty((len(indices), IMG_SIZE, IMG_SIZE, 3), dtype=np.uint8)
+        shard_ids = self._shard_of[indices]
+        rows = self._row_of[indices]
+        for shard_id in np.unique(shard_ids):
+            mask = shard_ids == shard_id
+            # Sorted rows read each shard front to back
+            order = np.argsort(rows[mask])
+            positions = np.flatnonzero(mask)[order]
+            out[positions] = self._shards[int(shard_id)][rows[mask][order]]
+        return out
+
+    def split(self, validation_split=None):
+        """(train, val) index arrays using plantvillage.is_validation"""
+        args = () if validation_split is None else (validation_split,)
+        val = np.array([is_validation(path, *args) for path in self.paths], dtype=bool)
+        return np.flatnonzero(~val), np.flatnonzero(val)
+
+    def iter_batches(self, indices=None, batch_size=32, shuffle=False, seed=None):
+        """Yield (uint8 images, labels) batches over `indices` (default: all)"""
+        indices = np.arange(len(self)) if indices is None else np.asarray(indices)
+        if shuffle:
+            indices = np.random.default_rng(seed).permutation(indices)
+        for start in range(0, len(indices), batch_size):
+            batch = indices[start:start + batch_size]
+            yield self.images(batch), self.labels[batch]
+
+
+def _empty_manifest(data_dir):
+    return {
+        'version': MANIFEST_VERSION,
+        'preprocessing': PREPROCESSING,
+        'data_dir': data_dir,
+        'classes': [],
+        'next_shard': 0,
+        'shards': {},      # shard id -> row count
+        'entries': {},     # relative path -> entry
+        'skipped': {}      # relative path -> {size, mtime_ns} of unreadable files
+    }
+
+
+def _load_image(entry, preprocessor, open_shard):
+    if 'source' in entry:
+        # Compaction: copy the already decoded row
+        shard_id, row = entry['source']
+        return np.array(open_shard(shard_id)[row])
+    path = entry['abs_path']
+    try:
+        with Image.open(path) as image:
+            return preprocessor.load(image)
+    except Exception as e:
+        print(f"⚠️ Skipping unreadable image {path}: {e}")
+        return None
+
+
+def _write_shards(cache_dir, manifest, pending, preprocessor, workers):
+    """Decode `pending` [(relative path, entry)] into new shards, filling in shard/row"""
+    written = []
+    shards = {}
+
+    def open_shard(shard_id):
+        if shard_id not in shards:
+            shards[shard_id] = np.load(os.path.join(cache_dir, f'shard-{shard_id:05d}.npy'), mmap_mode='r')
+        return shards[shard_id]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, len(pending), SHARD_SIZE):
+            chunk = pending[start:start + SHARD_SIZE]
+            arrays = list(pool.map(lambda item: _load_image(item[1], preprocessor, open_shard), chunk))
+
+            good = [(item, array) for item, array in zip(chunk, arrays) if array is not None]
+            for (relative, entry), array in zip(chunk, arrays):
+                if array is None:
+                    manifest['skipped'][relative] = {'size': entry['size'], 'mtime_ns': entry['mtime_ns']}
+            if not good:
+                continue
+
+            shard_id = manifest['next_shard']
+            manifest['next_shard'] += 1
+            path = os.path.join(cache_dir, f'shard-{shard_id:05d}.npy')
+            tmp_path = f'{path}.tmp.npy'
+            shard = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.uint8,
+                                              shape=(len(good), IMG_SIZE, IMG_SIZE, 3))
+            for row, ((relative, entry), array) in enumerate(good):
+                shard[row] = array
+                entry.pop('abs_path', None)
+                entry.pop('source', None)
+                entry['shard'] = shard_id
+                entry['row'] = row
+                manifest['entries'][relative] = entry
+            shard.flush()
+            del shard
+            os.replace(tmp_path, path)
+            manifest['shards'][str(shard_id)] = len(good)
+            written.append(shard_id)
+            print(f"✓ Wrote shard {shard_id} ({len(good)} images, {start + len(chunk)}/{len(pending)})")
+    return written
+
+
+def _live_rows(manifest):
+    return len(manifest['entries'])
+
+
+def _total_rows(manifest):
+    return sum(manifest['shards'].values())
+
+
+def build_cache(data_dir=DATA_DIR, cache_dir=DATASET_CACHE_DIR, compact=False, workers=None):
+    """Create or incrementally update the cache; return a summary dict"""
+    started = time.perf_counter()
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest_path = os.path.join(cache_dir, 'manifest.json')
+    preprocessor = ImagePreprocessor(IMG_SIZE)
+    workers = workers or os.cpu_count() or 4
+
+    manifest = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest.get('version') != MANIFEST_VERSION or manifest.get('preprocessing') != PREPROCESSING:
+            print("Cache was built with different settings, rebuilding")
+            manifest = None
+    if manifest is None:
+        manifest = _empty_manifest(data_dir)
+
+    old_entries = manifest['entries']
+    old_skipped = manifest['skipped']
+    manifest['entries'] = {}
+    manifest['skipped'] = {}
+    manifest['classes'] = list_classes(data_dir)
+
+    pending = []
+    unchanged = rehashed = 0
+    for path, folder in list_images(data_dir):
+        relative = relative_image_path(path, data_dir)
+        stat = os.stat(path)
+        old = old_entries.get(relative)
+
+        skipped = old_skipped.get(relative)
+        if skipped and skipped == {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}:
+            manifest['skipped'][relative] = skipped
+            continue
+
+        if old and old['size'] == stat.st_size and old['mtime_ns'] == stat.st_mtime_ns:
+            manifest['entries'][relative] = old
+            unchanged += 1
+            continue
+
+        digest = file_hash(path)
+        entry = {'hash': digest, 'class': folder, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        if old and old['hash'] == digest:
+            # Touched but identical: keep the decoded copy
+            manifest['entries'][relative] = dict(old, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            rehashed += 1
+            continue
+        entry['abs_path'] = path
+        pending.append((relative, entry))
+
+    removed = len(set(old_entries) - set(manifest['entries']) - {r for r, _ in pending})
+
+    total_after = _total_rows(manifest) + len(pending)
+    if compact or (total_after and 1 - (_live_rows(manifest) + len(pending)) / total_after > COMPACT_THRESHOLD):
+        # Copy every live row into fresh, dense shards
+        for relative, entry in manifest['entries'].items():
+            entry = dict(entry, source=(entry['shard'], entry['row']))
+            pending.append((relative, entry))
+        manifest['entries'] = {}
+        manifest['shards'] = {}
+        compact = True
+
+    new_shards = _write_shards(cache_dir, manifest, pending, preprocessor, workers)
+
+    # Drop shards no entry points to any more
+    used = {str(entry['shard']) for entry in manifest['entries'].values()}
+    stale = [shard_id for shard_id in manifest['shards'] if shard_id not in used]
+    for shard_id in stale:
+        del manifest['shards'][shard_id]
+
+    manifest['data_dir'] = data_dir
+    manifest['updated_at'] = time.time()
+    _write_json_atomic(manifest_path, manifest)
+
+    # Only delete files after the new manifest stops referencing them
+    referenced = {f'shard-{int(shard_id):05d}.npy' for shard_id in manifest['shards']}
+    for name in os.listdir(cache_dir):
+        if name.startswith('shard-') and name.endswith('.npy') and name not in referenced:
+            os.remove(os.path.join(cache_dir, name))
+
+    summary = {
+        'images': _live_rows(manifest),
+        'written': sum(manifest['shards'].get(str(s), 0) for s in new_shards),
+        'unchanged': unchanged,
+        'rehashed_unchanged': rehashed,
+        'removed': removed,
+        'skipped': len(manifest['skipped']),
+        'shards': len(manifest['shards']),
+        'dead_rows': _total_rows(manifest) - _live_rows(manifest),
+        'compacted': compact,
+        'seconds': round(time.perf_counter() - started, 2)
+    }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--cache-dir', default=DATASET_CACHE_DIR)
+    parser.add_argument('--compact', action='store_true', help='rewrite shards without deleted rows')
+    parser.add_argument('--workers', type=int, default=None, help='decode threads (default: CPU count)')
+    args = parser.parse_args()
+
+    summary = build_cache(args.data_dir, args.cache_dir, args.compact, args.workers)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
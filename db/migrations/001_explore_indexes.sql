@@ -0,0 +1,11 @@
+-- Indexes for /api/explore crop filtering and keyset pagination.
+-- Run once against databases created from the README schema:
+--     mysql crop_disease_db < db/migrations/001_explore_indexes.sql
+
+-- Resolve ?crop= by name and walk crops in crop_name order
+CREATE INDEX idx_crops_name ON crops (crop_name, crop_id);
+
+-- Diseases of one crop in (disease_name, disease_id) order, so keyset
+-- pages within a crop are an index range scan with no filesort. It also
+-- serves the crop_id foreign key.
+CREATE INDEX idx_disease_crop_page ON disease (crop_id, disease_name, disease_id);
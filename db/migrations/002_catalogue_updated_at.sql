@@ -0,0 +1,17 @@
+-- Row change timestamps for the catalogue's change-detection query
+-- (CATALOGUE_VERSION_QUERY in catalogue.py). Run once:
+--     mysql crop_disease_db < db/migrations/002_catalogue_updated_at.sql
+
+-- Microsecond precision, so two edits within one second are still told
+-- apart; the index makes MAX(updated_at) a single index lookup.
+ALTER TABLE crops
+    ADD COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD INDEX idx_crops_updated (updated_at);
+
+ALTER TABLE treatment
+    ADD COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD INDEX idx_treatment_updated (updated_at);
+
+ALTER TABLE disease
+    ADD COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD INDEX idx_disease_updated (updated_at);
@@ -0,0 +1,52 @@
+-- Schema of crop_disease_db, the disease catalogue behind /api/explore
+-- and /api/crops. Existing databases: apply db/migrations/ in order.
+
+CREATE DATABASE IF NOT EXISTS crop_disease_db;
+USE crop_disease_db;
+
+-- Table 1: crops
+
+CREATE TABLE crops (
+    crop_id INT PRIMARY KEY AUTO_INCREMENT,
+    crop_name VARCHAR(100) NOT NULL,
+    crop_image_url VARCHAR(255),
+    description TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Change detection: MAX(updated_at) is one index lookup
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    -- /api/explore?crop= lookups and the crop_name sort
+    INDEX idx_crops_name (crop_name, crop_id),
+    INDEX idx_crops_updated (updated_at)
+);
+
+-- Table 2: treatment
+
+CREATE TABLE treatment (
+    treatment_id INT PRIMARY KEY AUTO_INCREMENT,
+    treatment_name VARCHAR(150) NOT NULL,
+    dosage VARCHAR(100),
+    application_method TEXT,
+    precautions TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    INDEX idx_treatment_updated (updated_at)
+);
+
+-- Table 3: disease (with foreign keys to crops and treatment)
+
+CREATE TABLE disease (
+    disease_id INT PRIMARY KEY AUTO_INCREMENT,
+    disease_name VARCHAR(150) NOT NULL,
+    crop_id INT NOT NULL,
+    treatment_id INT NOT NULL,
+    symptoms TEXT,
+    prevention TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    FOREIGN KEY (crop_id) REFERENCES crops(crop_id) ON DELETE CASCADE,
+    FOREIGN KEY (treatment_id) REFERENCES treatment(treatment_id) ON DELETE CASCADE,
+    -- Diseases of one crop in page order: keyset pages within a crop are
+    -- an index range scan with no filesort
+    INDEX idx_disease_crop_page (crop_id, disease_name, disease_id),
+    INDEX idx_disease_updated (updated_at)
+);
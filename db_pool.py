@@ -0,0 +1,224 @@
+"""
+Bounded pool of DB-API connections for the catalogue endpoints.
+
+    pool = ConnectionPool(lambda: mysql.connector.connect(**DB_CONFIG))
+    with pool.connection() as connection:
+        cursor = connection.cursor(dictionary=True)
+        ...
+
+- At most DB_POOL_SIZE connections are open; a checkout waits up to
+  DB_POOL_TIMEOUT seconds for one to be returned, then raises PoolTimeout.
+- A connection idle for more than DB_POOL_PING_AFTER seconds is pinged
+  before it is handed out and replaced with a new one if the ping fails.
+  Connections older than DB_POOL_RECYCLE seconds are replaced, so MySQL's
+  wait_timeout never closes one under us.
+- The context manager always returns the connection, or discards it if the
+  block raised, since the connection may be left mid-result or broken.
+
+Connections are opened lazily, so importing the module (or forking a
+gunicorn worker) never touches the database.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from logger import fields, get_logger
+
+log = get_logger('db')
+
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '5'))
+DB_POOL_PING_AFTER = float(os.getenv('DB_POOL_PING_AFTER', '30'))
+DB_POOL_RECYCLE = float(os.getenv('DB_POOL_RECYCLE', '3600'))
+
+
+class PoolTimeout(Exception):
+    """No connection became free within the checkout timeout"""
+
+
+class _PooledConnection:
+    """A raw connection plus the bookkeeping the pool needs"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+def ping_connection(connection):
+    """Cheap liveness check; raises if the connection is unusable"""
+    ping = getattr(connection, 'ping', None)
+    if ping is not None:
+        ping()
+        return
+    cursor = connection.cursor()
+    try:
+        cursor.execute('SELECT 1')
+        cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+class ConnectionPool:
+    """Hand out connections created by `connect`, keeping at most `size` open"""
+
+    def __init__(self, connect, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT,
+                 ping_after=DB_POOL_PING_AFTER, recycle=DB_POOL_RECYCLE):
+        self.connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self.recycle = recycle
+
+        self._idle = deque()          # most recently returned on the right
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+        self.open = 0
+        self.in_use = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.created = 0
+        self.discarded = 0
+        self.failed_pings = 0
+        self.connect_errors = 0
+        self.wait_seconds = 0.0
+
+    def _check_fork(self):
+        # Sockets inherited from the parent must not be shared; forget them
+        if os.getpid() != self._pid:
+            with self._lock:
+                if os.getpid() != self._pid:
+                    self._pid = os.getpid()
+                    self._idle.clear()
+                    self._slots = threading.BoundedSemaphore(self.size)
+                    self.open = self.in_use = 0
+
+    def _close(self, pooled):
+        with self._lock:
+            self.open -= 1
+            self.discarded += 1
+        try:
+            pooled.raw.close()
+        except Exception:
+            pass
+
+    def _new_connection(self):
+        try:
+            raw = self.connect()
+        except Exception:
+            with self._lock:
+                self.connect_errors += 1
+            raise
+        with self._lock:
+            self.open += 1
+            self.created += 1
+        return _PooledConnection(raw)
+
+    def _take_idle(self):
+        """Pop the freshest idle connection that is still usable, or None"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                pooled = self._idle.pop()
+
+            now = time.monotonic()
+            if now - pooled.created_at > self.recycle:
+                self._close(pooled)
+                continue
+            if now - pooled.last_used > self.ping_after:
+                try:
+                    ping_connection(pooled.raw)
+                except Exception:
+                    with self._lock:
+                        self.failed_pings += 1
+                    self._close(pooled)
+                    continue
+            return pooled
+
+    def acquire(self, timeout=None):
+        """Check out a connection; prefer `connection()` which always returns it"""
+        self._check_fork()
+        timeout = self.timeout if timeout is None else timeout
+
+        slots = self._slots
+        start = time.monotonic()
+        if not slots.acquire(blocking=False):
+            with self._lock:
+                self.waits += 1
+            if not slots.acquire(timeout=timeout):
+                with self._lock:
+                    self.timeouts += 1
+                raise PoolTimeout(f'No database connection free after {timeout:g}s '
+                                  f'(pool size {self.size})')
+        waited = time.monotonic() - start
+
+        try:
+            pooled = self._take_idle() or self._new_connection()
+        except Exception:
+            slots.release()
+            raise
+
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.wait_seconds += waited
+        pooled.slots = slots
+        return pooled
+
+    def release(self, pooled, discard=False):
+        """Return a checked-out connection, or close it if `discard`"""
+        with self._lock:
+            self.in_use -= 1
+        if discard or pooled.slots is not self._slots:
+            self._close(pooled)
+        else:
+            pooled.last_used = time.monotonic()
+            with self._lock:
+                self._idle.append(pooled)
+        pooled.slots.release()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Borrow a raw connection for the duration of a `with` block"""
+        pooled = self.acquire(timeout)
+        try:
+            yield pooled.raw
+        except BaseException:
+            self.release(pooled, discard=True)
+            raise
+        else:
+            self.release(pooled)
+
+    def ping(self, timeout=1.0):
+        """True if a pooled connection answers a ping (connecting one if needed)"""
+        try:
+            with self.connection(timeout) as connection:
+                ping_connection(connection)
+            return True
+        except Exception as e:
+            log.warning("Database ping failed", extra=fields(error=e))
+            return False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self.size,
+                'open': self.open,
+                'idle': len(self._idle),
+                'in_use': self.in_use,
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'timeouts': self.timeouts,
+                'avg_wait_ms': round(1000 * self.wait_seconds / self.checkouts, 3) if self.checkouts else 0.0,
+                'created': self.created,
+                'discarded': self.discarded,
+                'failed_pings': self.failed_pings,
+                'connect_errors': self.connect_errors
+            }
@@ -0,0 +1,141 @@
+"""
+Export crop_disease_model_best.h5 to quantized TFLite models and compare them.
+
+Produces:
+    crop_disease_model_fp16.tflite  - float16 weights
+    crop_disease_model_int8.tflite  - full integer quantization, calibrated
+                                      on a sample of datasets/PlantVillage
+    tflite_report.json              - accuracy delta and per-image latency
+                                      of each backend against Keras
+
+Serve an export with INFERENCE_BACKEND=tflite-fp16 or tflite-int8.
+
+    python export_tflite.py [--calibration-per-class 20] [--eval-per-class 20]
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+from PIL import Image
+
+from inference_backends import MODEL_PATHS, load_backend
+from plantvillage import folder_label_map, load_class_labels, sample_images
+from preprocessing import ImagePreprocessor
+
+REPORT_PATH = 'tflite_report.json'
+
+# Different seeds alone would still overlap; the evaluation sample is drawn
+# from the images left after removing the calibration sample, so the
+# report is never measured on an image the quantizer saw
+CALIBRATION_SEED = 7
+EVAL_SEED = 42
+
+
+def load_batch(paths, preprocessor):
+    return preprocessor.preprocess_batch([Image.open(path) for path in paths])
+
+
+def export_fp16(model, path):
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.target_spec.supported_types = [tf.float16]
+    with open(path, 'wb') as f:
+        f.write(converter.convert())
+    print(f"✓ Wrote {path}")
+
+
+def export_int8(model, path, calibration_paths, preprocessor):
+    import tensorflow as tf
+
+    def representative_dataset():
+        for image_path in calibration_paths:
+            yield [load_batch([image_path], preprocessor)]
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.int8
+    converter.inference_output_type = tf.int8
+    with open(path, 'wb') as f:
+        f.write(converter.convert())
+    print(f"✓ Wrote {path} (calibrated on {len(calibration_paths)} images)")
+
+
+def evaluate(backend, samples, labels_by_folder, preprocessor):
+    """Return top-1 predictions, accuracy and per-image latency for one backend"""
+    predictions = []
+    latencies = []
+
+    # One warmup call so lazy initialization is not counted
+    backend.predict(load_batch([samples[0][0]], preprocessor))
+
+    for path, _ in samples:
+        batch = load_batch([path], preprocessor)
+        start = time.perf_counter()
+        probabilities = backend.predict(batch)
+        latencies.append(time.perf_counter() - start)
+        predictions.append(int(np.argmax(probabilities[0])))
+
+    expected = [labels_by_folder[folder] for _, folder in samples]
+    correct = sum(p == e for p, e in zip(predictions, expected))
+    latencies_ms = np.array(latencies) * 1000.0
+    return predictions, {
+        'accuracy': round(correct / len(samples), 4),
+        'latency_ms_p50': round(float(np.percentile(latencies_ms, 50)), 3),
+        'latency_ms_p95': round(float(np.percentile(latencies_ms, 95)), 3),
+        'latency_ms_mean': round(float(latencies_ms.mean()), 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calibration-per-class', type=int, default=20)
+    parser.add_argument('--eval-per-class', type=int, default=20)
+    parser.add_argument('--skip-export', action='store_true', help='Only rebuild the comparison report')
+    args = parser.parse_args()
+
+    preprocessor = ImagePreprocessor()
+    keras_backend = load_backend('keras')
+
+    # Drawn even with --skip-export: the evaluation sample must exclude it
+    calibration = [path for path, _ in sample_images(args.calibration_per_class, seed=CALIBRATION_SEED)]
+    if not args.skip_export:
+        export_fp16(keras_backend.model, MODEL_PATHS['tflite-fp16'])
+        export_int8(keras_backend.model, MODEL_PATHS['tflite-int8'], calibration, preprocessor)
+
+    labels_by_folder = folder_label_map(load_class_labels())
+    samples = [
+        (path, folder) for path, folder in sample_images(args.eval_per_class, seed=EVAL_SEED, exclude=calibration)
+        if labels_by_folder.get(folder) is not None
+    ]
+    print(f"\nEvaluating on {len(samples)} images...")
+
+    report = {'samples': len(samples), 'backends': {}}
+    reference, report['backends']['keras'] = evaluate(keras_backend, samples, labels_by_folder, preprocessor)
+
+    for name in ('tflite-fp16', 'tflite-int8'):
+        predictions, result = evaluate(load_backend(name), samples, labels_by_folder, preprocessor)
+        result['accuracy_delta'] = round(result['accuracy'] - report['backends']['keras']['accuracy'], 4)
+        result['top1_agreement_with_keras'] = round(
+            sum(p == r for p, r in zip(predictions, reference)) / len(samples), 4
+        )
+        report['backends'][name] = result
+
+    with open(REPORT_PATH, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'backend':<13}{'accuracy':>10}{'delta':>9}{'p50 ms':>9}{'p95 ms':>9}")
+    for name, result in report['backends'].items():
+        delta = result.get('accuracy_delta', 0.0)
+        print(f"{name:<13}{result['accuracy']:>10.4f}{delta:>+9.4f}"
+              f"{result['latency_ms_p50']:>9.2f}{result['latency_ms_p95']:>9.2f}")
+    print(f"\n✓ Report saved as '{REPORT_PATH}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Cache of MobileNetV2 bottleneck features for the PlantVillage images.
+
+The classifier's MobileNetV2 base is frozen during training, so its pooled
+1280-d output for an image never changes. This module computes it once per
+image and stores it in memory-mappable float32 chunks, keyed by the
+image's content hash (from dataset_cache.py's manifest) under a directory
+named after the backbone version (a hash of its weights, input shape and
+the input resizing and scaling). Features computed with a different
+backbone or preprocessing are never read back, and retraining
+the head (train.py --head-only) does not run the backbone at all.
+
+    datasets/PlantVillage_features/<backbone version>/
+        index.json          image hash -> [chunk, row]
+        features-00000.npy  (N, 1280) float32
+
+Extraction is incremental: only images whose hash is not in the index are
+run through the backbone.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from dataset_cache import PREPROCESSING
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FEATURE_CACHE_DIR = os.getenv('FEATURE_CACHE_DIR', os.path.join(BASE_DIR, 'datasets', 'PlantVillage_features'))
+
+# Features written per chunk file
+CHUNK_SIZE = 4096
+# The cached uint8 images are divided by this before the backbone
+INPUT_SCALE = 255.0
+
+
+def build_backbone(img_size=224):
+    """MobileNetV2 base (as in train.create_model) plus global average pooling
+
+    Returns (feature_model, base_model).
+    """
+    from tensorflow import keras
+    from tensorflow.keras import layers
+
+    base_model = keras.applications.MobileNetV2(
+        input_shape=(img_size, img_size, 3),
+        include_top=False,
+        weights='imagenet'
+    )
+    base_model.trainable = False
+    feature_model = keras.Sequential([base_model, layers.GlobalAveragePooling2D()], name='bottleneck')
+    return feature_model, base_model
+
+
+def backbone_version(base_model):
+    """'mobilenetv2_1.00_224-<hash>' identifying the backbone's weights and input"""
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(repr(tuple(base_model.input_shape)).encode('utf-8'))
+    # Resize method and scaling: the same image preprocessed differently gives different features
+    digest.update(f'{PREPROCESSING} scale={INPUT_SCALE!r}'.encode('utf-8'))
+    for weights in base_model.get_weights():
+        digest.update(np.ascontiguousarray(weights).tobytes())
+    return f'{base_model.name}-{digest.hexdigest()}'
+
+
+class FeatureCache:
+    """Features keyed by image hash for one backbone version"""
+
+    def __init__(self, version, root=FEATURE_CACHE_DIR):
+        self.version = version
+        self.cache_dir = os.path.join(root, version)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.index_path = os.path.join(self.cache_dir, 'index.json')
+
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+        self._chunks = {}
+
+    def _chunk_path(self, chunk_id):
+        return os.path.join(self.cache_dir, f'features-{chunk_id:05d}.npy')
+
+    def _chunk(self, chunk_id):
+        chunk = self._chunks.get(chunk_id)
+        if chunk is None:
+            chunk = self._chunks[chunk_id] = np.load(self._chunk_path(chunk_id), mmap_mode='r')
+        return chunk
+
+    def missing(self, hashes):
+        """The distinct hashes without cached features, in first-seen order"""
+        return [h for h in dict.fromkeys(hashes) if h not in self.index]
+
+    def add(self, hashes, features):
+        """Store a chunk of features, then publish them in the index atomically"""
+        features = np.asarray(features, dtype=np.float32)
+        chunk_id = 1 + max((chunk for chunk, _ in self.index.values()), default=-1)
+        path = self._chunk_path(chunk_id)
+        tmp_path = f'{path}.tmp.npy'
+        np.save(tmp_path, features)
+        os.replace(tmp_path, path)
+
+        for row, image_hash in enumerate(hashes):
+            self.index[image_hash] = [chunk_id, row]
+        tmp_index = f'{self.index_path}.{os.getpid()}.tmp'
+        with open(tmp_index, 'w') as f:
+            json.dump(self.index, f)
+        os.replace(tmp_index, self.index_path)
+
+    def load(self, hashes):
+        """(len(hashes), dim) float32 features, in the order of `hashes`"""
+        locations = np.array([self.index[h] for h in hashes], dtype=np.int64).reshape(-1, 2)
+        if not len(locations):
+            return np.zeros((0, 0), dtype=np.float32)
+        dim = self._chunk(int(locations[0, 0])).shape[1]
+        out = np.empty((len(hashes), dim), dtype=np.float32)
+        for chunk_id in np.unique(locations[:, 0]):
+            mask = locations[:, 0] == chunk_id
+            out[mask] = self._chunk(int(chunk_id))[locations[mask, 1]]
+        return out
+
+
+def extract_features(dataset, feature_cache, feature_model, batch_size=64):
+    """Run the backbone on every image of a DatasetCache missing from `feature_cache`
+
+    Images are scaled to [0, 1], exactly as the served model receives them.
+    Returns the number of images processed.
+    """
+    missing = set(feature_cache.missing(dataset.hashes))
+    if not missing:
+        return 0
+
+    # One dataset index per missing hash
+    todo = {}
+    for i, image_hash in enumerate(dataset.hashes):
+        if image_hash in missing and image_hash not in todo:
+            todo[image_hash] = i
+    hashes = list(todo)
+    indices = np.array(list(todo.values()), dtype=np.int64)
+
+    print(f"Extracting features for {len(hashes)} images ({feature_cache.version})")
+    for start in range(0, len(indices), CHUNK_SIZE):
+        chunk_indices = indices[start:start + CHUNK_SIZE]
+        features = []
+        for batch_start in range(0, len(chunk_indices), batch_size):
+            images = dataset.images(chunk_indices[batch_start:batch_start + batch_size])
+            batch = images.astype(np.float32) / INPUT_SCALE
+            features.append(np.asarray(feature_model.predict_on_batch(batch)))
+        feature_cache.add(hashes[start:start + CHUNK_SIZE], np.concatenate(features))
+        print(f"✓ {min(start + CHUNK_SIZE, len(indices))}/{len(indices)} images")
+    return len(hashes)
@@ -0,0 +1,510 @@
+"""
+Crop disease detection: model loading, preprocessing, batching, caching
+and the /api/predict endpoints.
+"""
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from werkzeug.exceptions import RequestEntityTooLarge
+import numpy as np
+import hmac
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import as_completed
+from batching import MicroBatcher
+from preprocessing import ImagePreprocessor
+from inference_backends import INFERENCE_BACKEND, MODEL_PATHS
+from inference_service import ServiceUnavailable
+from logger import fields, get_logger
+from metrics import histogram
+from model_registry import ModelRegistry
+from prediction_cache import PredictionCache
+from uploads import (FORM_OVERHEAD_BYTES, MAX_BATCH_UPLOAD_BYTES, UploadError, limit_request, open_image,
+                     read_upload, read_zip_member)
+
+inference_bp = Blueprint('inference', __name__)
+log = get_logger('inference')
+
+# --- CONFIGURATION & PATH FIXES ---
+# Get the absolute path to the folder where this script runs
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Define paths relative to the script location
+# INFERENCE_BACKEND selects keras (default), tflite-fp16 or tflite-int8
+MODEL_PATH = MODEL_PATHS[INFERENCE_BACKEND] if INFERENCE_BACKEND in MODEL_PATHS else MODEL_PATHS['keras']
+LABELS_PATH = os.path.join(BASE_DIR, 'class_labels.json')
+IMG_SIZE = 224
+
+# decode and preprocess are per image; inference and postprocess per forward pass
+PREDICT_STAGE_SECONDS = histogram('predict_stage_seconds', 'Time per prediction stage', ['stage'])
+DECODE_SECONDS = PREDICT_STAGE_SECONDS.labels(stage='decode')
+PREPROCESS_SECONDS = PREDICT_STAGE_SECONDS.labels(stage='preprocess')
+INFERENCE_SECONDS = PREDICT_STAGE_SECONDS.labels(stage='inference')
+POSTPROCESS_SECONDS = PREDICT_STAGE_SECONDS.labels(stage='postprocess')
+BATCH_SIZE = histogram('predict_batch_size', 'Images per forward pass',
+                       buckets=(1, 2, 4, 8, 16, 32, 64)).labels()
+
+# --- LOAD MODEL & LABELS ---
+log.debug("Inference paths", extra=fields(backend=INFERENCE_BACKEND, model=MODEL_PATH, labels=LABELS_PATH))
+
+class_labels = {}
+
+# The served model, its labels and version. New versions are swapped in
+# without a restart (see model_registry.py).
+registry = ModelRegistry()
+
+# Requests to /api/admin/models* must send this in X-Admin-Token; unset disables them
+MODEL_ADMIN_TOKEN = os.getenv('MODEL_ADMIN_TOKEN', '')
+
+# The model is loaded and warmed up in a background thread so workers can
+# serve pages immediately. States: 'loading' -> 'ready' or 'failed'.
+model_state = 'loading'
+model_error = None
+model_loader = None
+model_loader_lock = threading.Lock()
+MODEL_RETRY_AFTER = int(os.getenv('MODEL_RETRY_AFTER', '5'))
+
+# 1. Load the Labels (cheap, done at import)
+if os.path.exists(LABELS_PATH):
+    with open(LABELS_PATH, 'r') as f:
+        class_labels = json.load(f)
+    log.info("Loaded class labels", extra=fields(count=len(class_labels)))
+else:
+    # Fallback if JSON is missing (prevents crash)
+    log.warning("Labels file not found, using fallback numeric labels", extra=fields(path=LABELS_PATH))
+    class_labels = {str(i): f"Class {i}" for i in range(10)}
+
+def load_model():
+    """Load and warm up the model, then mark it ready"""
+    global model_state, model_error
+    
+    try:
+        # 2. Load the Model (the registry checks the files exist, validates the
+        #    labels and runs warmup forward passes; the service backend waits
+        #    for the service)
+        log.info("Loading model...")
+        while True:
+            try:
+                registry.activate(registry.requested_version())
+                break
+            except ServiceUnavailable as e:
+                # Still 'loading': requests get 503 + Retry-After meanwhile
+                model_error = str(e)
+                log.warning("Inference service not ready, retrying", extra=fields(error=e))
+                time.sleep(MODEL_RETRY_AFTER)
+        model_state = 'ready'
+        model_error = None
+    
+    except Exception as e:
+        model_error = str(e)
+        model_state = 'failed'
+        log.error("Error during model loading", extra=fields(error=e))
+    
+    # Picks up versions published later, including a fix for a failed one
+    registry.start_watching()
+
+def ensure_model_loading():
+    """Start the background loader unless it is running or finished
+
+    Also restarts it in a forked gunicorn worker, where the thread started
+    by the parent process does not exist.
+    """
+    global model_loader
+    
+    if model_state != 'loading' or (model_loader is not None and model_loader.is_alive()):
+        return
+    with model_loader_lock:
+        if model_loader is None or not model_loader.is_alive():
+            model_loader = threading.Thread(target=load_model, name='model-loader', daemon=True)
+            model_loader.start()
+
+def model_unavailable():
+    """Return an error response if the model cannot serve yet, else None"""
+    if registry.current is not None:
+        return None
+    if model_state == 'loading':
+        response = jsonify({'error': 'Model is loading, retry shortly'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(MODEL_RETRY_AFTER)
+        return response
+    return jsonify({'error': 'Model not loaded. Check server console for paths.'}), 500
+
+@inference_bp.before_app_request
+def start_model_loading():
+    ensure_model_loading()
+    if model_state != 'loading':
+        # Restarts the version watcher in a forked worker
+        registry.start_watching()
+
+@inference_bp.record_once
+def on_register(state):
+    # Start loading as soon as the inference role is enabled in an app
+    ensure_model_loading()
+    # Hard cap on any request body, enforced by werkzeug while it streams;
+    # /api/predict lowers it per request
+    if state.app.config.get('MAX_CONTENT_LENGTH') is None:
+        state.app.config['MAX_CONTENT_LENGTH'] = MAX_BATCH_UPLOAD_BYTES + FORM_OVERHEAD_BYTES
+
+@inference_bp.app_errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    return jsonify({'error': 'Upload exceeds the size limit'}), 413
+
+# --- HELPER FUNCTIONS ---
+
+preprocessor = ImagePreprocessor(IMG_SIZE)
+
+def prepare_image(image, out):
+    """Decode and preprocess one image into `out`, timing both stages"""
+    with DECODE_SECONDS.time():
+        image = preprocessor.decode(image)
+    with PREPROCESS_SECONDS.time():
+        return preprocessor.preprocess(image, out=out)
+
+def preprocess_image(image):
+    """Preprocess image for prediction"""
+    # Returns a float32 (1, IMG_SIZE, IMG_SIZE, 3) array scaled to [0, 1]
+    batch = np.empty((1, IMG_SIZE, IMG_SIZE, 3), dtype=np.float32)
+    prepare_image(image, batch[0])
+    return batch
+
+def decode_predictions(probabilities, class_labels):
+    """Turn one row of class probabilities into (class, confidence, top 3)"""
+    predicted_class_idx = int(np.argmax(probabilities))
+    confidence = float(probabilities[predicted_class_idx])
+    
+    # Get class name
+    # We cast to str() because JSON keys are usually strings
+    predicted_class = class_labels.get(str(predicted_class_idx), f"Class {predicted_class_idx}")
+    
+    # Get top 3 predictions
+    top_3_idx = np.argsort(probabilities)[-3:][::-1]
+    top_3_predictions = [
+        {
+            'class': class_labels.get(str(idx), f"Class {idx}"),
+            'confidence': float(probabilities[idx])
+        }
+        for idx in top_3_idx
+    ]
+    
+    return predicted_class, confidence, top_3_predictions
+
+def predict_batch(batch):
+    """Run one forward pass over a stacked batch and decode every row
+
+    Each result is (class, confidence, top 3, model version). The handle is
+    read once so a concurrent swap cannot mix one version's outputs with
+    another's labels.
+    """
+    handle = registry.current
+    BATCH_SIZE.observe(len(batch))
+    with INFERENCE_SECONDS.time():
+        predictions = handle.model.predict(batch)
+    with POSTPROCESS_SECONDS.time():
+        return [decode_predictions(row, handle.class_labels) + (handle.version,) for row in predictions]
+
+# Concurrent /api/predict calls share forward passes through this scheduler
+batcher = MicroBatcher(predict_batch)
+
+# Repeated uploads of the same photo are answered from this cache, keyed
+# on the model version that produced the result
+prediction_cache = PredictionCache()
+
+def current_version():
+    handle = registry.current
+    return handle.version if handle is not None else None
+
+def current_labels():
+    """Labels of the served model, or class_labels.json before it has loaded"""
+    handle = registry.current
+    return handle.class_labels if handle is not None else class_labels
+
+def get_prediction(image):
+    """Get prediction from model: (class, confidence, top 3, model version)"""
+    if registry.current is None:
+        return None, None, None, None
+    
+    # Preprocess into a pooled buffer; the batcher copies it when stacking
+    with preprocessor.pool.buffer(1) as processed_img:
+        prepare_image(image, processed_img[0])
+        
+        # Predict (batched with any concurrent requests)
+        return batcher.predict(processed_img[0])
+
+# --- ROUTES ---
+
+@inference_bp.route('/api/health2', methods=['GET'])
+def health():
+    """Health check endpoint"""
+    handle = registry.current
+    return jsonify({
+        'status': 'healthy',
+        'model_loaded': handle is not None,
+        'model_state': 'ready' if handle is not None else model_state,
+        'model_error': model_error,
+        'model_version': handle.version if handle is not None else None,
+        'backend': handle.model.name if handle is not None else INFERENCE_BACKEND,
+        'model_path_checked': handle.model_path if handle is not None else MODEL_PATH,
+        'num_classes': len(current_labels())
+    })
+
+@inference_bp.route('/api/health2/live', methods=['GET'])
+def liveness():
+    """Liveness probe: the process is up and serving requests"""
+    return jsonify({'status': 'alive'})
+
+@inference_bp.route('/api/health2/ready', methods=['GET'])
+def readiness():
+    """Readiness probe: only 200 once the model is loaded and warmed up"""
+    if registry.current is not None:
+        return jsonify({'status': 'ready', 'model_state': 'ready', 'model_version': current_version()})
+    response = jsonify({'status': 'not ready', 'model_state': model_state, 'model_error': model_error})
+    response.status_code = 503
+    if model_state == 'loading':
+        response.headers['Retry-After'] = str(MODEL_RETRY_AFTER)
+    return response
+
+@inference_bp.route('/api/predict/stats', methods=['GET'])
+def predict_stats():
+    """Micro-batching queue depth and batch size statistics"""
+    return jsonify(batcher.stats())
+
+@inference_bp.route('/api/predict/cache', methods=['GET'])
+def predict_cache_stats():
+    """Prediction cache hit/miss/eviction counters"""
+    return jsonify({'model_version': current_version(), **prediction_cache.stats()})
+
+@inference_bp.route('/api/predict', methods=['POST'])
+def predict():
+    """Prediction endpoint"""
+    unavailable = model_unavailable()
+    if unavailable is not None:
+        return unavailable
+    
+    try:
+        # Before request.files, which would receive the whole body
+        limit_request(request)
+    except UploadError as e:
+        return jsonify({'error': str(e)}), e.status
+    
+    if 'image' not in request.files:
+        return jsonify({'error': 'No image provided'}), 400
+    
+    file = request.files['image']
+    
+    if file.filename == '':
+        return jsonify({'error': 'No image selected'}), 400
+    
+    try:
+        # Streamed from werkzeug's spool file, never held in memory whole
+        model_version = current_version()
+        cache_key = read_upload(file.stream, model_version)
+        cached = prediction_cache.get(cache_key)
+        
+        if cached is not None:
+            predicted_class, confidence, top_3 = cached
+        else:
+            # Header checks first; pixels are only decoded by the preprocessor
+            with open_image(file.stream) as image:
+                predicted_class, confidence, top_3, used_version = get_prediction(image)
+            # A version swapped in meanwhile answered; its result is not this key's
+            if used_version == model_version:
+                prediction_cache.put(cache_key, [predicted_class, confidence, top_3])
+            model_version = used_version
+        
+        return jsonify({
+            'success': True,
+            'prediction': predicted_class,
+            'confidence': confidence,
+            'top_predictions': top_3,
+            'model_version': model_version,
+            'cached': cached is not None
+        })
+    
+    except UploadError as e:
+        return jsonify({'error': str(e)}), e.status
+    except ServiceUnavailable as e:
+        response = jsonify({'error': f'Prediction unavailable: {str(e)}'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(MODEL_RETRY_AFTER)
+        return response
+    except Exception as e:
+        return jsonify({'error': f'Prediction failed: {str(e)}'}), 500
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif', '.webp', '.tif', '.tiff')
+
+def collect_uploads():
+    """Copy uploaded files out of the request so they outlive the view
+
+    Flask closes request files when the view returns, before a streamed
+    response body is generated.
+    """
+    uploads = []
+    for file in request.files.getlist('images') + request.files.getlist('image'):
+        if file.filename == '':
+            continue
+        spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        shutil.copyfileobj(file.stream, spooled)
+        spooled.seek(0)
+        uploads.append((file.filename, spooled))
+    return uploads
+
+def iter_uploaded_images(uploads):
+    """Yield (filename, seekable image stream, error) for every uploaded file or zip member
+
+    A stream is only valid until the next item is requested.
+    """
+    for filename, stream in uploads:
+        with stream:
+            if not filename.lower().endswith('.zip'):
+                yield filename, stream, None
+                continue
+            try:
+                with zipfile.ZipFile(stream) as archive:
+                    for info in archive.infolist():
+                        if info.is_dir() or not info.filename.lower().endswith(IMAGE_EXTENSIONS):
+                            continue
+                        try:
+                            member = read_zip_member(archive, info)
+                        except UploadError as e:
+                            yield info.filename, None, str(e)
+                            continue
+                        yield info.filename, member, None
+            except zipfile.BadZipFile as e:
+                yield filename, None, f'Invalid zip archive: {str(e)}'
+
+def result_line(index, filename, result, model_version, cached):
+    """Build one NDJSON line of the batch endpoint"""
+    predicted_class, confidence, top_3 = result[:3]
+    return {
+        'index': index,
+        'filename': filename,
+        'success': True,
+        'prediction': predicted_class,
+        'confidence': confidence,
+        'top_predictions': top_3,
+        'model_version': model_version,
+        'cached': cached
+    }
+
+@inference_bp.route('/api/predict/batch', methods=['POST'])
+def predict_batch_endpoint():
+    """Classify many images, streaming one JSON line per image"""
+    unavailable = model_unavailable()
+    if unavailable is not None:
+        return unavailable
+    
+    try:
+        limit_request(request, MAX_BATCH_UPLOAD_BYTES)
+    except UploadError as e:
+        return jsonify({'error': str(e)}), e.status
+    
+    uploads = collect_uploads()
+    if not uploads:
+        return jsonify({'error': 'No images provided'}), 400
+    
+    def generate():
+        index = 0
+        pending = []
+        
+        def flush():
+            # Images of a chunk are submitted together so they share forward passes
+            futures = {}
+            for i, filename, cache_key, model_version, array in pending:
+                futures[batcher.submit(array)] = (i, filename, cache_key, model_version)
+            for future in as_completed(futures):
+                i, filename, cache_key, model_version = futures[future]
+                try:
+                    result = future.result()
+                    used_version = result[3]
+                    if used_version == model_version:
+                        prediction_cache.put(cache_key, list(result[:3]))
+                    line = result_line(i, filename, result, used_version, False)
+                except Exception as e:
+                    line = {'index': i, 'filename': filename, 'error': f'Prediction failed: {str(e)}'}
+                yield json.dumps(line) + '\n'
+            pending.clear()
+        
+        for filename, stream, error in iter_uploaded_images(uploads):
+            cached = None
+            if error is None:
+                try:
+                    model_version = current_version()
+                    cache_key = read_upload(stream, model_version)
+                    cached = prediction_cache.get(cache_key)
+                    if cached is None:
+                        with open_image(stream) as image:
+                            pending.append((index, filename, cache_key, model_version, preprocess_image(image)[0]))
+                except UploadError as e:
+                    error = str(e)
+                except Exception as e:
+                    error = f'Invalid image: {str(e)}'
+            if cached is not None:
+                yield json.dumps(result_line(index, filename, cached, model_version, True)) + '\n'
+            if error is not None:
+                yield json.dumps({'index': index, 'filename': filename, 'error': error}) + '\n'
+            index += 1
+            if len(pending) >= batcher.max_batch_size:
+                yield from flush()
+        yield from flush()
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@inference_bp.route('/api/classes', methods=['GET'])
+def get_classes():
+    """Get all available classes"""
+    labels = current_labels()
+    return jsonify({
+        'classes': list(labels.values()),
+        'num_classes': len(labels),
+        'model_version': current_version()
+    })
+
+def admin_forbidden():
+    """Return an error response unless the request carries MODEL_ADMIN_TOKEN, else None"""
+    if not MODEL_ADMIN_TOKEN:
+        return jsonify({'error': 'Model admin is disabled (set MODEL_ADMIN_TOKEN)'}), 403
+    token = request.headers.get('X-Admin-Token', '')
+    if not hmac.compare_digest(token.encode('utf-8'), MODEL_ADMIN_TOKEN.encode('utf-8')):
+        return jsonify({'error': 'Invalid admin token'}), 403
+    return None
+
+@inference_bp.route('/api/admin/models', methods=['GET'])
+def list_models():
+    """Served, requested and available model versions"""
+    forbidden = admin_forbidden()
+    if forbidden is not None:
+        return forbidden
+    return jsonify(registry.stats())
+
+@inference_bp.route('/api/admin/models/reload', methods=['POST'])
+def reload_model():
+    """
+    Switch every worker to a registry version: {"version": "<name>"}
+    The version is loaded, validated and warmed in the background; requests
+    keep being served by the current version until it is swapped in. Check
+    progress with GET /api/admin/models.
+    """
+    forbidden = admin_forbidden()
+    if forbidden is not None:
+        return forbidden
+    
+    data = request.get_json(silent=True) or {}
+    version = data.get('version')
+    if not version:
+        return jsonify({'error': "Missing 'version'", 'versions': registry.versions()}), 400
+    if version not in registry.versions():
+        return jsonify({'error': f"Unknown model version '{version}'", 'versions': registry.versions()}), 404
+    
+    # Loaded here first; CURRENT (which the other workers follow) is only
+    # updated once it validated
+    if not registry.activate_in_background(version, publish=True):
+        return jsonify({'error': f"Model version '{registry.loading}' is already loading"}), 409
+    return jsonify({
+        'status': 'loading',
+        'version': version,
+        'current': current_version()
+    }), 202
@@ -0,0 +1,197 @@
+"""
+Inference backends for the crop disease classifier.
+
+Every backend takes a float32 (N, 224, 224, 3) batch scaled to [0, 1] and
+returns an (N, num_classes) array of class probabilities. Select one with
+the INFERENCE_BACKEND environment variable:
+
+    keras        - crop_disease_model_best.h5 via keras.models.load_model
+    tflite-fp16  - float16 quantized TFLite export
+    tflite-int8  - full integer quantized TFLite export
+    service      - forward to the shared model process pool in
+                   inference_service.py
+
+The TFLite files are produced by `python export_tflite.py`.
+"""
+
+import os
+import threading
+
+import numpy as np
+
+from logger import fields, get_logger
+
+log = get_logger('inference')
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'keras')
+INFERENCE_THREADS = int(os.getenv('INFERENCE_THREADS', '0')) or None
+
+# Keras backend: run a traced tf.function instead of model.predict
+INFERENCE_COMPILED = os.getenv('INFERENCE_COMPILED', '1') == '1'
+INFERENCE_XLA = os.getenv('INFERENCE_XLA', '0') == '1'
+INFERENCE_INTRA_OP_THREADS = int(os.getenv('INFERENCE_INTRA_OP_THREADS', '0'))
+INFERENCE_INTER_OP_THREADS = int(os.getenv('INFERENCE_INTER_OP_THREADS', '0'))
+
+MODEL_PATHS = {
+    'keras': os.path.join(BASE_DIR, 'crop_disease_model_best.h5'),
+    'tflite-fp16': os.path.join(BASE_DIR, 'crop_disease_model_fp16.tflite'),
+    'tflite-int8': os.path.join(BASE_DIR, 'crop_disease_model_int8.tflite'),
+}
+
+
+def configure_tf_threads(intra_op=INFERENCE_INTRA_OP_THREADS, inter_op=INFERENCE_INTER_OP_THREADS):
+    """Set TensorFlow thread pools; 0 keeps TensorFlow's default
+
+    Must run before TensorFlow executes its first op.
+    """
+    import tensorflow as tf
+
+    try:
+        if intra_op:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+        if inter_op:
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+    except RuntimeError as e:
+        # TensorFlow was already initialized by an earlier model load
+        log.warning("Could not set TensorFlow thread counts", extra=fields(error=e))
+
+
+class KerasBackend:
+    """Run the Keras .h5 model
+
+    By default inference goes through a tf.function traced once with a fixed
+    (None, 224, 224, 3) float32 signature, which skips model.predict's
+    per-call data adapter and callback setup. Set INFERENCE_XLA=1 to JIT
+    compile it with XLA, or INFERENCE_COMPILED=0 to use model.predict.
+    """
+
+    name = 'keras'
+
+    def __init__(self, model_path, compiled=INFERENCE_COMPILED, jit_compile=INFERENCE_XLA):
+        import tensorflow as tf
+        from tensorflow import keras
+
+        configure_tf_threads()
+
+        self.model_path = model_path
+        self.model = keras.models.load_model(model_path)
+        self.compiled = compiled
+        self._infer = None
+
+        if compiled:
+            model = self.model
+            input_shape = (None,) + tuple(model.input_shape[1:])
+
+            @tf.function(input_signature=[tf.TensorSpec(input_shape, tf.float32)], jit_compile=jit_compile)
+            def infer(batch):
+                return model(batch, training=False)
+
+            self._infer = infer
+
+    @property
+    def num_classes(self):
+        return int(self.model.output_shape[-1])
+
+    def predict(self, batch):
+        if self._infer is None:
+            return np.asarray(self.model.predict(batch, verbose=0))
+        return self._infer(np.asarray(batch, dtype=np.float32)).numpy()
+
+    def warmup(self, batch_sizes=(1,)):
+        """Run dummy batches so tracing/compilation is not paid by a user request"""
+        for batch_size in batch_sizes:
+            self.predict(np.zeros((batch_size,) + tuple(self.model.input_shape[1:]), dtype=np.float32))
+
+
+def _load_tflite_interpreter(model_path, num_threads):
+    """Prefer the small tflite_runtime package, fall back to full TensorFlow"""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        from tensorflow.lite import Interpreter
+    return Interpreter(model_path=model_path, num_threads=num_threads)
+
+
+class TFLiteBackend:
+    """Run a (possibly quantized) TFLite export of the model
+
+    Integer-quantized inputs and outputs are (de)quantized with the scale
+    and zero point stored in the model, so callers always pass and receive
+    float32 arrays.
+    """
+
+    def __init__(self, model_path, num_threads=INFERENCE_THREADS):
+        self.model_path = model_path
+        self.name = 'tflite'
+        self.interpreter = _load_tflite_interpreter(model_path, num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = int(self._input['shape'][0])
+        # A TFLite interpreter is not safe to invoke from several threads
+        self._lock = threading.Lock()
+
+    @property
+    def num_classes(self):
+        return int(self._output['shape'][-1])
+
+    def _resize(self, batch_size):
+        if batch_size != self._batch_size:
+            shape = list(self._input['shape'])
+            shape[0] = batch_size
+            self.interpreter.resize_tensor_input(self._input['index'], shape)
+            self.interpreter.allocate_tensors()
+            self._input = self.interpreter.get_input_details()[0]
+            self._output = self.interpreter.get_output_details()[0]
+            self._batch_size = batch_size
+
+    def predict(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        with self._lock:
+            self._resize(len(batch))
+
+            input_dtype = self._input['dtype']
+            if input_dtype != np.float32:
+                scale, zero_point = self._input['quantization']
+                info = np.iinfo(input_dtype)
+                batch = np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(input_dtype)
+
+            self.interpreter.set_tensor(self._input['index'], batch)
+            self.interpreter.invoke()
+            output = self.interpreter.get_tensor(self._output['index'])
+
+        if output.dtype != np.float32:
+            scale, zero_point = self._output['quantization']
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output
+
+    def warmup(self, batch_sizes=(1,)):
+        for batch_size in batch_sizes:
+            self.predict(np.zeros((batch_size,) + tuple(self._input['shape'][1:]), dtype=np.float32))
+
+
+def load_backend(name=INFERENCE_BACKEND, model_path=None, warmup_batch_sizes=(1,)):
+    """Create the backend called `name`, loading its default model file, and
+    warm it up at `warmup_batch_sizes`
+    """
+    if name == 'service':
+        from inference_service import ServiceBackend
+        return ServiceBackend()
+
+    if name not in MODEL_PATHS:
+        raise ValueError(f"Unknown INFERENCE_BACKEND '{name}', expected one of {sorted(MODEL_PATHS) + ['service']}")
+
+    model_path = model_path or MODEL_PATHS[name]
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model file not found at {model_path}")
+
+    if name == 'keras':
+        backend = KerasBackend(model_path)
+    else:
+        backend = TFLiteBackend(model_path)
+        backend.name = name
+
+    backend.warmup(warmup_batch_sizes)
+    return backend
@@ -0,0 +1,401 @@
+"""
+Out-of-process inference service.
+
+A fixed pool of model processes serves every web worker on the machine, so
+adding gunicorn workers does not add model copies. Run it next to the web
+app and point the app at it with INFERENCE_BACKEND=service:
+
+    python inference_service.py
+    INFERENCE_BACKEND=service gunicorn main:app
+
+Pixel data never goes through pickle or the socket. The client writes the
+preprocessed (N, 224, 224, 3) float32 batch into a shared memory segment
+and sends only its name and shape; a worker process attaches to the
+segment, runs the model and writes the (N, num_classes) probabilities back
+into the same segment.
+
+Crashed workers are restarted by the service; a request whose worker died
+mid-batch is retried once on a fresh worker. Every wait is bounded: if no
+worker becomes free (or none ever loads) the client gets ServiceUnavailable,
+which the endpoints answer with 503.
+"""
+
+import json
+import multiprocessing
+import os
+import queue
+import signal
+import socket
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from logger import fields, get_logger
+
+log = get_logger('inference_service')
+
+INFERENCE_SERVICE_SOCKET = os.getenv('INFERENCE_SERVICE_SOCKET', '/tmp/crop-disease-inference.sock')
+INFERENCE_SERVICE_WORKERS = int(os.getenv('INFERENCE_SERVICE_WORKERS', '2'))
+INFERENCE_SERVICE_BACKEND = os.getenv('INFERENCE_SERVICE_BACKEND', 'keras')
+INFERENCE_SERVICE_TIMEOUT = float(os.getenv('INFERENCE_SERVICE_TIMEOUT', '30'))
+INFERENCE_SERVICE_CONNECT_TIMEOUT = float(os.getenv('INFERENCE_SERVICE_CONNECT_TIMEOUT', '120'))
+# A predict waits up to INFERENCE_SERVICE_TIMEOUT for an idle worker, then
+# as long for each of at most two attempts
+INFERENCE_SERVICE_CLIENT_TIMEOUT = float(
+    os.getenv('INFERENCE_SERVICE_CLIENT_TIMEOUT', str(3 * INFERENCE_SERVICE_TIMEOUT + 5))
+)
+
+_HEADER = struct.Struct('!I')
+
+
+class ServiceUnavailable(RuntimeError):
+    """The service has no model worker to run the request in time"""
+
+
+# --- WIRE PROTOCOL (length-prefixed JSON) ---
+
+def send_message(sock, message):
+    data = json.dumps(message).encode('utf-8')
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError('Connection closed')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def recv_message(sock):
+    (length,) = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+    return json.loads(_recv_exactly(sock, length))
+
+
+def attach_shared_memory(name):
+    """Attach to a segment owned by another process without adopting it
+
+    Before Python 3.13 attaching registers the segment with this process's
+    resource tracker, which would unlink it when the worker exits.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        from multiprocessing import resource_tracker
+
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+# --- MODEL WORKER PROCESS ---
+
+def worker_main(conn, backend_name):
+    """Load the model, then serve batches described by messages on `conn`"""
+    # Ctrl+C is handled by the service process, which terminates workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from inference_backends import load_backend
+
+    backend = load_backend(backend_name)
+    conn.send(('ready', backend.num_classes))
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+
+        shm = None
+        try:
+            shm = attach_shared_memory(task['shm'])
+            shape = tuple(task['shape'])
+            count = int(np.prod(shape))
+            inputs = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+            outputs = np.ndarray((shape[0], backend.num_classes), dtype=np.float32,
+                                 buffer=shm.buf, offset=count * 4)
+            outputs[...] = backend.predict(inputs)
+            del inputs, outputs
+            conn.send(('ok', None))
+        except Exception as e:
+            conn.send(('error', str(e)))
+        finally:
+            if shm is not None:
+                shm.close()
+
+
+class WorkerHandle:
+    """One model process and the parent end of its pipe"""
+
+    def __init__(self, worker_id, backend_name, context):
+        self.worker_id = worker_id
+        self.backend_name = backend_name
+        self.context = context
+        self.process = None
+        self.conn = None
+        self.num_classes = None
+        self.start()
+
+    def start(self):
+        parent_conn, child_conn = self.context.Pipe()
+        self.process = self.context.Process(
+            target=worker_main, args=(child_conn, self.backend_name),
+            name=f'inference-worker-{self.worker_id}', daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        self.num_classes = None
+
+    def wait_ready(self):
+        """Block until the worker has loaded its model"""
+        status, num_classes = self.conn.recv()
+        if status != 'ready':
+            raise RuntimeError(f'Worker {self.worker_id} failed to start')
+        self.num_classes = num_classes
+        return num_classes
+
+    def restart(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+        self.start()
+
+    def run(self, task, timeout):
+        """Send one task and wait for its reply; raise ConnectionError if the worker dies"""
+        self.conn.send(task)
+        deadline = time.monotonic() + timeout
+        while not self.conn.poll(0.1):
+            if not self.process.is_alive():
+                raise ConnectionError(f'Worker {self.worker_id} died (exit code {self.process.exitcode})')
+            if time.monotonic() > deadline:
+                raise TimeoutError(f'Worker {self.worker_id} timed out')
+        try:
+            return self.conn.recv()
+        except EOFError:
+            raise ConnectionError(f'Worker {self.worker_id} died')
+
+
+# --- SERVICE PROCESS ---
+
+class InferenceService:
+    """Accept client connections and dispatch batches to idle model workers"""
+
+    def __init__(self, socket_path=INFERENCE_SERVICE_SOCKET, num_workers=INFERENCE_SERVICE_WORKERS,
+                 backend_name=INFERENCE_SERVICE_BACKEND, timeout=INFERENCE_SERVICE_TIMEOUT):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        # TensorFlow is not fork-safe, so workers always start from a fresh interpreter
+        context = multiprocessing.get_context('spawn')
+        self.workers = [WorkerHandle(i, backend_name, context) for i in range(num_workers)]
+        self.idle = queue.Queue()
+        self.num_classes = None
+        self.ready = threading.Event()
+        self.restarts = 0
+        self.requests = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def _start_worker(self, worker):
+        """Wait for a (re)started worker to load its model, then make it idle"""
+        try:
+            num_classes = worker.wait_ready()
+        except (EOFError, OSError, RuntimeError) as e:
+            log.error("Inference worker failed to load", extra=fields(worker=worker.worker_id, error=e))
+            time.sleep(1)
+            self._restart(worker)
+            return
+        self.num_classes = num_classes
+        self.ready.set()
+        log.info("Inference worker ready", extra=fields(worker=worker.worker_id, pid=worker.process.pid))
+        self.idle.put(worker)
+
+    def _restart(self, worker):
+        with self._lock:
+            self.restarts += 1
+        log.warning("Restarting inference worker", extra=fields(worker=worker.worker_id))
+        try:
+            worker.restart()
+        except OSError as e:
+            # Keep the slot: the next attempt starts the process again
+            log.error("Could not restart inference worker", extra=fields(worker=worker.worker_id, error=e))
+        threading.Thread(target=self._start_worker, args=(worker,), daemon=True).start()
+
+    def predict(self, task):
+        """Run a task on an idle worker, retrying once if the worker crashes
+
+        Raises ServiceUnavailable if no worker becomes idle within the timeout.
+        """
+        with self._lock:
+            self.requests += 1
+        deadline = time.monotonic() + self.timeout
+        for attempt in range(2):
+            try:
+                worker = self.idle.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                with self._lock:
+                    self.failures += 1
+                raise ServiceUnavailable(f'No inference worker available within {self.timeout:g}s')
+            if not worker.process.is_alive():
+                self._restart(worker)
+                continue
+            try:
+                status, error = worker.run(task, self.timeout)
+            except (ConnectionError, TimeoutError, OSError) as e:
+                log.error("Inference worker failed", extra=fields(worker=worker.worker_id, error=e))
+                self._restart(worker)
+                continue
+            self.idle.put(worker)
+            if status == 'ok':
+                return None
+            with self._lock:
+                self.failures += 1
+            return error
+        with self._lock:
+            self.failures += 1
+        return 'Inference worker crashed'
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': len(self.workers),
+                'idle_workers': self.idle.qsize(),
+                'num_classes': self.num_classes,
+                'requests': self.requests,
+                'failures': self.failures,
+                'restarts': self.restarts
+            }
+
+    def handle_client(self, conn):
+        with conn:
+            while True:
+                try:
+                    message = recv_message(conn)
+                except (ConnectionError, OSError, ValueError):
+                    return
+                if message.get('op') == 'info':
+                    if self.ready.wait(self.timeout):
+                        send_message(conn, {'ok': True, **self.stats()})
+                    else:
+                        send_message(conn, {'ok': False, 'unavailable': True,
+                                            'error': 'No inference worker has loaded the model yet'})
+                elif message.get('op') == 'predict':
+                    try:
+                        error = self.predict({'shm': message['shm'], 'shape': message['shape']})
+                    except ServiceUnavailable as e:
+                        send_message(conn, {'ok': False, 'unavailable': True, 'error': str(e)})
+                        continue
+                    send_message(conn, {'ok': error is None, 'error': error})
+                else:
+                    send_message(conn, {'ok': False, 'error': f"Unknown op {message.get('op')!r}"})
+
+    def serve_forever(self):
+        for worker in self.workers:
+            threading.Thread(target=self._start_worker, args=(worker,), daemon=True).start()
+
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket_path)
+        server.listen(128)
+        log.info("Inference service listening", extra=fields(socket=self.socket_path, workers=len(self.workers)))
+
+        try:
+            while True:
+                conn, _ = server.accept()
+                threading.Thread(target=self.handle_client, args=(conn,), daemon=True).start()
+        except KeyboardInterrupt:
+            log.info("Stopping inference service...")
+        finally:
+            server.close()
+            os.remove(self.socket_path)
+            for worker in self.workers:
+                worker.process.kill()
+
+
+# --- CLIENT ---
+
+class ServiceBackend:
+    """Inference backend that forwards batches to the inference service"""
+
+    name = 'service'
+
+    def __init__(self, socket_path=INFERENCE_SERVICE_SOCKET, connect_timeout=INFERENCE_SERVICE_CONNECT_TIMEOUT,
+                 timeout=INFERENCE_SERVICE_CLIENT_TIMEOUT):
+        self.socket_path = socket_path
+        self.connect_timeout = connect_timeout
+        self.timeout = timeout
+        self._sock = None
+        self._lock = threading.Lock()
+        self.num_classes = self._request({'op': 'info'})['num_classes']
+
+    def _connect(self):
+        """Connect, waiting for the service to come up if necessary"""
+        deadline = time.monotonic() + self.connect_timeout
+        while True:
+            try:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.settimeout(self.timeout)
+                sock.connect(self.socket_path)
+                return sock
+            except OSError:
+                sock.close()
+                if time.monotonic() > deadline:
+                    raise ServiceUnavailable(f'Inference service not reachable at {self.socket_path}')
+                time.sleep(0.5)
+
+    def _request(self, message):
+        """Send `message` and return the reply; raise ServiceUnavailable if the
+        service is unreachable, does not answer in time or has no worker for it
+        """
+        with self._lock:
+            for attempt in range(2):
+                if self._sock is None:
+                    self._sock = self._connect()
+                try:
+                    send_message(self._sock, message)
+                    reply = recv_message(self._sock)
+                except socket.timeout:
+                    # A late reply would be read as the next request's; start over
+                    self._sock.close()
+                    self._sock = None
+                    raise ServiceUnavailable(f'Inference service did not answer within {self.timeout:g}s')
+                except (ConnectionError, OSError) as e:
+                    # The service restarted; reconnect once
+                    self._sock.close()
+                    self._sock = None
+                    if attempt:
+                        raise ServiceUnavailable(f'Inference service connection lost: {e}') from e
+                    continue
+                if reply.get('unavailable'):
+                    raise ServiceUnavailable(reply['error'])
+                return reply
+
+    def predict(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        output_shape = (len(batch), self.num_classes)
+        shm = shared_memory.SharedMemory(create=True, size=batch.nbytes + output_shape[0] * output_shape[1] * 4)
+        try:
+            np.ndarray(batch.shape, dtype=np.float32, buffer=shm.buf)[...] = batch
+            reply = self._request({'op': 'predict', 'shm': shm.name, 'shape': list(batch.shape)})
+            if not reply['ok']:
+                raise RuntimeError(reply['error'])
+            return np.ndarray(output_shape, dtype=np.float32, buffer=shm.buf, offset=batch.nbytes).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def warmup(self, batch_sizes=(1,)):
+        # Workers warm their own models when they start
+        pass
+
+
+if __name__ == '__main__':
+    InferenceService().serve_forever()
@@ -0,0 +1,78 @@
+"""
+Structured, level-controlled logging for the app.
+
+    LOG_LEVEL   DEBUG, INFO (default), WARNING or ERROR
+    LOG_FORMAT  text (default): 2026-10-18 12:00:00 INFO inference Model loaded version=v2
+                json: one JSON object per line
+
+Pass structured fields with `extra=fields(...)`; they are appended as
+key=value pairs in text output and become keys in JSON output:
+
+    log = get_logger('inference')
+    log.info("Model loaded", extra=fields(version=handle.version))
+"""
+
+import json
+import logging
+import os
+import sys
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+
+ROOT_LOGGER = 'crop_disease'
+
+
+def fields(**values):
+    """`extra` argument carrying structured fields"""
+    return {'fields': values}
+
+
+def _format_field(value):
+    text = str(value)
+    return json.dumps(text) if not text or any(c.isspace() or c in '"=' for c in text) else text
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s %(message)s', '%Y-%m-%d %H:%M:%S')
+
+    def formatMessage(self, record):
+        line = super().formatMessage(record)
+        extra = getattr(record, 'fields', None)
+        if extra:
+            line += ' ' + ' '.join(f'{key}={_format_field(value)}' for key, value in extra.items())
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def _configure():
+    root = logging.getLogger(ROOT_LOGGER)
+    if root.handlers:
+        return root
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JsonFormatter() if LOG_FORMAT == 'json' else TextFormatter())
+    root.addHandler(handler)
+    root.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+    # Our handler only; do not duplicate lines through the root logger
+    root.propagate = False
+    return root
+
+
+def get_logger(name):
+    """Logger for one module, e.g. get_logger('catalogue')"""
+    _configure()
+    return logging.getLogger(f'{ROOT_LOGGER}.{name}')
@@ -0,0 +1,255 @@
+"""
+In-process metrics with a Prometheus text endpoint.
+
+    GET /metrics    Prometheus text exposition format 0.0.4
+
+Modules declare their metrics at import time and keep a handle per label
+set, so recording on the hot path is one bisect and a locked increment:
+
+    DECODE_SECONDS = histogram('predict_stage_seconds', 'Time per predict stage',
+                               ['stage']).labels(stage='decode')
+    with DECODE_SECONDS.time():
+        ...
+
+Each process keeps its own values; with several gunicorn workers every
+worker reports only the requests it served. benchmarks/metrics_overhead.py
+measures the cost of recording.
+"""
+
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Blueprint, Response, request
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
+
+# Seconds; fits requests from sub-millisecond cache hits to slow model loads
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Timer:
+    """Observe the duration of a with-block"""
+
+    __slots__ = ('child', 'start')
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.child.observe(time.perf_counter() - self.start)
+
+
+class _HistogramChild:
+    __slots__ = ('upper_bounds', 'counts', 'sum', 'lock')
+
+    def __init__(self, upper_bounds):
+        self.upper_bounds = upper_bounds
+        # One slot per bucket plus +Inf; made cumulative when rendered
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.upper_bounds, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self):
+        return _Timer(self)
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.counts), self.sum
+
+
+class _CounterChild:
+    __slots__ = ('value', 'lock')
+
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, **labels):
+        """The child for one label set; keep it to skip this lookup on hot paths"""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            children = sorted(self._children.items())
+        for key, child in children:
+            lines.extend(self._render_child(key, child))
+        return lines
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.upper_bounds = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.upper_bounds)
+
+    def observe(self, value, **labels):
+        self.labels(**labels).observe(value)
+
+    def time(self, **labels):
+        return self.labels(**labels).time()
+
+    def _render_child(self, key, child):
+        counts, total = child.snapshot()
+        cumulative = 0
+        for upper, count in zip(self.upper_bounds + (math.inf,), counts):
+            cumulative += count
+            le = f'le="{_format_value(upper)}"'
+            yield f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}'
+        yield f'{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}'
+        yield f'{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}'
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1, **labels):
+        self.labels(**labels).inc(amount)
+
+    def _render_child(self, key, child):
+        yield f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}'
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Add `metric`, or return the one already registered under its name"""
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric '{metric.name}' is already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self):
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+def counter(name, documentation, labelnames=()):
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+REQUEST_SECONDS = histogram('http_request_duration_seconds', 'Time to build a response, per route',
+                            ['method', 'route', 'status'])
+
+
+# (method, route, status) -> histogram child; saves labels()' string handling per request
+_request_children = {}
+
+
+def _start_timer():
+    # environ instead of flask.g: each context-local proxy access costs about a microsecond
+    request.environ['metrics.start'] = time.perf_counter()
+
+
+def _record_request(response):
+    # Streamed responses (/api/predict/batch) are timed until the view returns
+    req = request._get_current_object()
+    start = req.environ.pop('metrics.start', None)
+    if start is not None:
+        # The route pattern, not the URL, keeps the number of series bounded
+        route = req.url_rule.rule if req.url_rule is not None else 'unmatched'
+        key = (req.method, route, response.status_code)
+        child = _request_children.get(key)
+        if child is None:
+            # setdefault is atomic, so racing first requests keep one shared child
+            child = _request_children.setdefault(
+                key, REQUEST_SECONDS.labels(method=key[0], route=route, status=key[2]))
+        child.observe(time.perf_counter() - start)
+    return response
+
+
+def init_app(app):
+    """Time every request and serve /metrics (unless METRICS_ENABLED=0)"""
+    if not METRICS_ENABLED:
+        return
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
+    app.register_blueprint(metrics_bp)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(REGISTRY.render(), mimetype=None, content_type=CONTENT_TYPE)
@@ -0,0 +1,294 @@
+"""
+Versioned model registry with zero-downtime reloads.
+
+    model_registry/
+        CURRENT                          name of the version to serve
+        2026-10-18/
+            crop_disease_model_best.h5   (the INFERENCE_BACKEND's model file)
+            class_labels.json
+
+A new version is loaded in a background thread, its label count checked
+against the model's output layer and warmed up, and only then swapped in by
+replacing a single reference. Requests read that reference once, so the
+forward pass and the label lookup of a batch always use the same version,
+and batches already running finish on the old model.
+
+Every worker process polls CURRENT, so changing it rolls a version out to
+all workers. The admin endpoint loads the version in the worker that
+receives the request and only writes CURRENT once it loaded and validated;
+`python model_registry.py activate <version>` writes it directly. Without a CURRENT file the model and
+class_labels.json in the project root are served, as before.
+
+    python model_registry.py add <version> <model file> <class_labels.json>
+    python model_registry.py activate <version>
+    python model_registry.py list
+"""
+
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+
+from batching import BATCH_MAX_SIZE
+from inference_backends import INFERENCE_BACKEND, MODEL_PATHS, load_backend
+from logger import fields, get_logger
+from prediction_cache import model_version_for
+
+log = get_logger('model_registry')
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_REGISTRY_DIR = os.getenv('MODEL_REGISTRY_DIR', os.path.join(BASE_DIR, 'model_registry'))
+# Seconds between checks of CURRENT; 0 disables watching
+MODEL_REGISTRY_POLL = float(os.getenv('MODEL_REGISTRY_POLL', '5'))
+LABELS_PATH = os.path.join(BASE_DIR, 'class_labels.json')
+LABELS_FILE = 'class_labels.json'
+
+
+class ModelHandle:
+    """A loaded model with the labels and version it was validated against"""
+
+    def __init__(self, version, model, class_labels, model_path):
+        self.version = version
+        self.model = model
+        self.class_labels = class_labels
+        self.model_path = model_path
+        self.loaded_at = time.time()
+
+    def info(self):
+        return {
+            'version': self.version,
+            'backend': self.model.name,
+            'model_path': self.model_path,
+            'num_classes': len(self.class_labels),
+            'loaded_at': self.loaded_at
+        }
+
+
+def read_labels(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def validate_labels(class_labels, num_classes):
+    """Raise ValueError unless the labels are exactly "0".."num_classes - 1" """
+    expected = {str(i) for i in range(num_classes)}
+    if set(class_labels) != expected:
+        raise ValueError(
+            f"{LABELS_FILE} has {len(class_labels)} labels but the model outputs {num_classes} classes"
+        )
+
+
+class ModelRegistry:
+    """Holds the model being served and swaps in new versions"""
+
+    def __init__(self, root=MODEL_REGISTRY_DIR, backend_name=INFERENCE_BACKEND,
+                 poll_interval=MODEL_REGISTRY_POLL, warmup_batch_sizes=(1, BATCH_MAX_SIZE)):
+        self.root = root
+        self.backend_name = backend_name
+        self.poll_interval = poll_interval
+        self.warmup_batch_sizes = tuple(sorted(set(warmup_batch_sizes)))
+
+        # Replaced, never mutated: readers take one reference and use it throughout
+        self.current = None
+        self.loading = None
+        self.last_error = None
+        self.history = []
+
+        self._load_lock = threading.Lock()
+        self._failed_version = None
+        self._watcher = None
+        self._watcher_lock = threading.Lock()
+
+    @property
+    def model_file(self):
+        return os.path.basename(MODEL_PATHS.get(self.backend_name, MODEL_PATHS['keras']))
+
+    def version_dir(self, version):
+        return os.path.join(self.root, version)
+
+    def versions(self):
+        """Names of the complete versions in the registry"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if os.path.isfile(os.path.join(self.root, name, self.model_file))
+            and os.path.isfile(os.path.join(self.root, name, LABELS_FILE))
+        )
+
+    def requested_version(self):
+        """Version named in CURRENT, or None to serve the project root files"""
+        try:
+            with open(os.path.join(self.root, 'CURRENT')) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def paths(self, version):
+        """(model path, labels path) of `version`; None is the project root"""
+        if version is None:
+            return MODEL_PATHS.get(self.backend_name, MODEL_PATHS['keras']), LABELS_PATH
+        if os.sep in version or version in ('.', '..'):
+            raise ValueError(f"Invalid model version '{version}'")
+        version_dir = self.version_dir(version)
+        return os.path.join(version_dir, self.model_file), os.path.join(version_dir, LABELS_FILE)
+
+    def load(self, version):
+        """Load, validate and warm up `version` without serving it"""
+        if version is not None and self.backend_name == 'service':
+            raise ValueError("Model versions are loaded by the inference service, not the web workers")
+        model_path, labels_path = self.paths(version)
+        if not os.path.exists(labels_path):
+            raise FileNotFoundError(f"Labels file not found at {labels_path}")
+
+        class_labels = read_labels(labels_path)
+        model = load_backend(self.backend_name, model_path, self.warmup_batch_sizes)
+        validate_labels(class_labels, model.num_classes)
+        return ModelHandle(version or model_version_for(model_path), model, class_labels, model_path)
+
+    def activate(self, version):
+        """Load `version` and swap it in; return the new handle or raise"""
+        with self._load_lock:
+            return self._activate(version)
+
+    def _activate(self, version):
+        # Called with _load_lock held
+        self.loading = version or 'default'
+        try:
+            handle = self.load(version)
+        except Exception as e:
+            self._failed_version = version
+            self.last_error = f"{version or 'default'}: {e}"
+            raise
+        finally:
+            self.loading = None
+
+        previous = self.current
+        self.current = handle
+        self._failed_version = None
+        self.last_error = None
+        self.history = (self.history + [{'version': handle.version, 'activated_at': handle.loaded_at}])[-10:]
+
+        if previous is None:
+            log.info("Serving model version", extra=fields(version=handle.version))
+        else:
+            log.info("Swapped model version", extra=fields(previous=previous.version, version=handle.version))
+        return handle
+
+    def activate_in_background(self, version, publish=False):
+        """Start activating `version` in a thread; False if a load is already running
+
+        With `publish`, CURRENT is pointed at the version once it has loaded
+        and validated here, so other workers only ever follow a good version.
+        """
+        # Taken here, not in the thread, so two concurrent calls cannot both start a load
+        if not self._load_lock.acquire(blocking=False):
+            return False
+
+        def run():
+            try:
+                self._activate(version)
+                if publish:
+                    self.publish(version)
+            except Exception as e:
+                log.error("Could not load model version", extra=fields(version=version, error=e))
+            finally:
+                self._load_lock.release()
+
+        try:
+            threading.Thread(target=run, name='model-reload', daemon=True).start()
+        except Exception:
+            self._load_lock.release()
+            raise
+        return True
+
+    def publish(self, version):
+        """Point CURRENT at `version` so every worker loads it"""
+        if version not in self.versions():
+            raise KeyError(version)
+        path = os.path.join(self.root, 'CURRENT')
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(version + '\n')
+        os.replace(tmp_path, path)
+
+    def add(self, version, model_path, labels_path):
+        """Copy a model file and its labels into a new registry version"""
+        self.paths(version)
+        version_dir = self.version_dir(version)
+        if os.path.exists(version_dir):
+            raise FileExistsError(f"Version '{version}' already exists")
+        tmp_dir = f'{version_dir}.tmp'
+        os.makedirs(tmp_dir)
+        shutil.copy2(model_path, os.path.join(tmp_dir, self.model_file))
+        shutil.copy2(labels_path, os.path.join(tmp_dir, LABELS_FILE))
+        # Rename last so a half-copied version is never listed
+        os.replace(tmp_dir, version_dir)
+
+    def start_watching(self):
+        """Poll CURRENT in a thread (idempotent, also after a fork)"""
+        if self.poll_interval <= 0 or (self._watcher is not None and self._watcher.is_alive()):
+            return
+        with self._watcher_lock:
+            if self._watcher is None or not self._watcher.is_alive():
+                self._watcher = threading.Thread(target=self._watch, name='model-registry', daemon=True)
+                self._watcher.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            version = self.requested_version()
+            current = self.current
+            if version is None or (current is not None and current.version == version):
+                continue
+            # A broken version is retried only after CURRENT changes
+            if version == self._failed_version or not self._load_lock.acquire(blocking=False):
+                continue
+            try:
+                self._activate(version)
+            except Exception as e:
+                log.error("Could not load model version", extra=fields(version=version, error=e))
+            finally:
+                self._load_lock.release()
+
+    def stats(self):
+        current = self.current
+        return {
+            'current': current.info() if current is not None else None,
+            'requested': self.requested_version(),
+            'loading': self.loading,
+            'last_error': self.last_error,
+            'versions': self.versions(),
+            'history': self.history
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    add = commands.add_parser('add', help='copy a model and its labels into the registry')
+    add.add_argument('version')
+    add.add_argument('model_path')
+    add.add_argument('labels_path')
+    activate = commands.add_parser('activate', help='make every worker serve a version')
+    activate.add_argument('version')
+    commands.add_parser('list', help='list versions')
+    args = parser.parse_args()
+
+    registry = ModelRegistry()
+    if args.command == 'add':
+        registry.add(args.version, args.model_path, args.labels_path)
+        print(f"✓ Added version '{args.version}' to {registry.root}")
+    elif args.command == 'activate':
+        registry.publish(args.version)
+        print(f"✓ Workers will switch to '{args.version}' within {registry.poll_interval:g}s")
+    else:
+        requested = registry.requested_version()
+        for version in registry.versions():
+            print(f"{'*' if version == requested else ' '} {version}")
+
+
+if __name__ == '__main__':
+    main()
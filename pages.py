@@ -0,0 +1,72 @@
+"""
+Static template pages (English and Hindi).
+"""
+
+from flask import Blueprint, render_template
+
+pages_bp = Blueprint('pages', __name__)
+
+# --- FRONTEND ROUTES ---
+@pages_bp.route("/weather")
+def weather():
+    return render_template('weather.html')
+
+@pages_bp.route("/")
+def home():
+    return render_template('index.html')
+
+@pages_bp.route("/explore")
+def explore():
+    return render_template('explore.html')
+
+@pages_bp.route('/detect')
+def detect():
+    return render_template('detect.html')
+
+@pages_bp.route('/contact')
+def contact():
+    return render_template('contact.html')
+
+@pages_bp.route('/help')
+def help():
+    return render_template('help.html')
+
+@pages_bp.route('/smart-farming')
+def smart_farming():
+    return render_template('smart-farming.html')
+
+@pages_bp.route('/global-impact')
+def global_impact():
+    return render_template('global-impact.html')
+
+@pages_bp.route('/dashboard')
+def dashboard():
+    return render_template('dashboard.html')
+
+@pages_bp.route('/hi')
+def homehi():
+    return render_template('index-en.html')
+
+@pages_bp.route('/explorehi')
+def explorehi():
+    return render_template('explore-hi.html')
+
+@pages_bp.route('/detecthi')
+def detecthi():
+    return render_template('detect-hi.html')
+
+@pages_bp.route('/contacthi')
+def contacthi():
+    return render_template('contact-hi.html')
+
+@pages_bp.route('/helphi')
+def helphi():
+    return render_template('help-hi.html')
+
+@pages_bp.route('/smart-farming-hi')
+def smart_farming_hi():
+    return render_template('smart-farming-hi.html')
+
+@pages_bp.route('/global-impact-hi')
+def global_impact_hi():
+    return render_template('global-impact-hi.html')
@@ -0,0 +1,93 @@
+"""
+Helpers for the PlantVillage dataset folder.
+
+The dataset folder names ("Tomato__Tomato_YellowLeaf__Curl_Virus") do not
+match class_labels.json exactly ("Tomato___Tomato_Yellow_Leaf_Curl_Virus"),
+so folders are matched to labels on a normalized name.
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, 'datasets', 'PlantVillage')
+LABELS_PATH = os.path.join(BASE_DIR, 'class_labels.json')
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+VALIDATION_SPLIT = 0.2
+
+
+def normalize_class_name(name):
+    """Lowercase and drop everything but letters and digits"""
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+
+def load_class_labels(path=LABELS_PATH):
+    """Load {"0": "Apple___Apple_scab", ...} from class_labels.json"""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def folder_label_map(class_labels, data_dir=DATA_DIR):
+    """Map each dataset folder name to its model class index (or None)"""
+    by_name = {normalize_class_name(label): int(idx) for idx, label in class_labels.items()}
+    return {
+        folder: by_name.get(normalize_class_name(folder))
+        for folder in list_classes(data_dir)
+    }
+
+
+def list_classes(data_dir=DATA_DIR):
+    """Sorted class folder names, the order flow_from_directory uses"""
+    return sorted(
+        d for d in os.listdir(data_dir)
+        if os.path.isdir(os.path.join(data_dir, d))
+    )
+
+
+def list_images(data_dir=DATA_DIR):
+    """Return sorted (path, class folder) pairs for every image"""
+    images = []
+    for folder in list_classes(data_dir):
+        folder_path = os.path.join(data_dir, folder)
+        for name in sorted(os.listdir(folder_path)):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                images.append((os.path.join(folder_path, name), folder))
+    return images
+
+
+def sample_images(per_class=20, seed=42, data_dir=DATA_DIR, exclude=()):
+    """Deterministic sample of up to `per_class` images from every folder,
+    never including a path in `exclude`
+    """
+    exclude = set(exclude)
+    by_class = {}
+    for path, folder in list_images(data_dir):
+        if path not in exclude:
+            by_class.setdefault(folder, []).append(path)
+
+    rng = random.Random(seed)
+    sample = []
+    for folder in sorted(by_class):
+        paths = by_class[folder]
+        chosen = rng.sample(paths, min(per_class, len(paths)))
+        sample.extend((path, folder) for path in sorted(chosen))
+    return sample
+
+
+def relative_image_path(path, data_dir=DATA_DIR):
+    """'Potato___healthy/img.JPG', the id of an image across machines"""
+    return os.path.relpath(path, data_dir).replace(os.sep, '/')
+
+
+def is_validation(relative_path, validation_split=VALIDATION_SPLIT):
+    """Deterministic train/validation assignment from a hash of the image path
+
+    Unlike a split by listing position, an image never changes side when
+    other images are added or removed.
+    """
+    digest = hashlib.blake2b(relative_path.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') / 2 ** 64 < validation_split
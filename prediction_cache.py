@@ -0,0 +1,190 @@
+"""
+Content-addressed cache for prediction results.
+
+Entries are keyed on a hash of the uploaded image bytes plus the model
+version. An in-memory LRU tier sits in front of an optional on-disk tier
+that survives restarts.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+PREDICTION_CACHE_SIZE = int(os.getenv('PREDICTION_CACHE_SIZE', '1024'))
+PREDICTION_CACHE_DIR = os.getenv('PREDICTION_CACHE_DIR', '')
+PREDICTION_CACHE_DISK_MB = float(os.getenv('PREDICTION_CACHE_DISK_MB', '64'))
+
+
+def model_version_for(model_path):
+    """Identify a model file by name, size and modification time"""
+    if os.getenv('MODEL_VERSION'):
+        return os.getenv('MODEL_VERSION')
+    try:
+        stat = os.stat(model_path)
+    except OSError:
+        return 'unknown'
+    return f"{os.path.basename(model_path)}:{stat.st_size}:{int(stat.st_mtime)}"
+
+
+class PredictionCache:
+    """Two-tier (memory LRU + optional disk) cache of prediction results
+
+    Values must be JSON serializable.
+    """
+
+    def __init__(self, max_entries=PREDICTION_CACHE_SIZE, cache_dir=PREDICTION_CACHE_DIR,
+                 max_disk_bytes=int(PREDICTION_CACHE_DISK_MB * 1024 * 1024)):
+        self.max_entries = max(0, int(max_entries))
+        self.cache_dir = cache_dir or None
+        self.max_disk_bytes = int(max_disk_bytes)
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+
+    @staticmethod
+    def key_hasher(model_version):
+        """sha256 primed with the model version; update() it with the upload bytes"""
+        digest = hashlib.sha256()
+        digest.update(str(model_version).encode('utf-8'))
+        digest.update(b'\0')
+        return digest
+
+    @staticmethod
+    def make_key(data, model_version):
+        """Hash the raw upload bytes together with the model version"""
+        digest = PredictionCache.key_hasher(model_version)
+        digest.update(data)
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the cached value or None"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        value = self._disk_get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._memory_put(key, value)
+        return value
+
+    def put(self, key, value):
+        """Store a value in both tiers"""
+        with self._lock:
+            self._memory_put(key, value)
+        self._disk_put(key, value)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0,
+                'evictions': self.evictions,
+                'disk_enabled': self.cache_dir is not None,
+                'disk_bytes': self._disk_bytes,
+                'max_disk_bytes': self.max_disk_bytes,
+                'disk_evictions': self.disk_evictions
+            }
+
+    # --- MEMORY TIER ---
+
+    def _memory_put(self, key, value):
+        if self.max_entries == 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    # --- DISK TIER ---
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.json')
+
+    def _disk_files(self):
+        """Return (path, size, mtime) for every entry on disk"""
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((path, stat.st_size, stat.st_mtime))
+        return files
+
+    def _disk_get(self, key):
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r') as f:
+                value = json.load(f)
+            # Touch so eviction is least-recently-used rather than oldest-written
+            os.utime(path)
+            return value
+        except (OSError, ValueError):
+            return None
+
+    def _disk_put(self, key, value):
+        if not self.cache_dir or self.max_disk_bytes <= 0:
+            return
+        path = self._disk_path(key)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(value, f)
+            existing = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+        except OSError:
+            return
+
+        with self._lock:
+            self._disk_bytes += size - existing
+            if self._disk_bytes > self.max_disk_bytes:
+                self._disk_evict()
+
+    def _disk_evict(self):
+        """Remove least recently used files until under the byte budget"""
+        # Evict down to 90% so we do not rescan the directory on every put
+        target = int(self.max_disk_bytes * 0.9)
+        files = sorted(self._disk_files(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in files)
+        for path, size, _ in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.disk_evictions += 1
+        self._disk_bytes = total
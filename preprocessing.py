@@ -0,0 +1,116 @@
+"""
+Image decode and preprocessing engine for the classifier.
+
+Produces float32 tensors scaled to [0, 1] directly into preallocated
+buffers, and uses reduced-scale JPEG decoding for large photos.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+from PIL import Image
+
+IMG_SIZE = 224
+
+# Only use draft decoding when the source is at least this many times
+# larger than the target on both sides, and decode to at least
+# DRAFT_FACTOR x the target so the final resize still has detail to work with.
+DRAFT_FACTOR = int(os.getenv('PREPROCESS_DRAFT_FACTOR', '2'))
+BUFFER_POOL_SIZE = int(os.getenv('PREPROCESS_BUFFER_POOL_SIZE', '8'))
+
+_SCALE = np.float32(1.0 / 255.0)
+
+
+class BufferPool:
+    """Reuse float32 (N, size, size, 3) arrays instead of allocating per request"""
+
+    def __init__(self, size=IMG_SIZE, max_buffers=BUFFER_POOL_SIZE):
+        self.size = size
+        self.max_buffers = max_buffers
+        self._free = {}
+        self._lock = threading.Lock()
+        self.allocations = 0
+        self.reuses = 0
+
+    def acquire(self, batch_size=1):
+        with self._lock:
+            free = self._free.get(batch_size)
+            if free:
+                self.reuses += 1
+                return free.pop()
+            self.allocations += 1
+        return np.empty((batch_size, self.size, self.size, 3), dtype=np.float32)
+
+    def release(self, buffer):
+        batch_size = buffer.shape[0]
+        with self._lock:
+            free = self._free.setdefault(batch_size, [])
+            if sum(len(buffers) for buffers in self._free.values()) < self.max_buffers:
+                free.append(buffer)
+
+    @contextmanager
+    def buffer(self, batch_size=1):
+        """Borrow a buffer for the duration of a with-block"""
+        buffer = self.acquire(batch_size)
+        try:
+            yield buffer
+        finally:
+            self.release(buffer)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'allocations': self.allocations,
+                'reuses': self.reuses,
+                'free_buffers': sum(len(buffers) for buffers in self._free.values())
+            }
+
+
+class ImagePreprocessor:
+    """Decode, resize and normalize images for the model"""
+
+    def __init__(self, size=IMG_SIZE, draft_factor=DRAFT_FACTOR, pool=None):
+        self.size = size
+        self.draft_factor = draft_factor
+        self.pool = pool if pool is not None else BufferPool(size)
+
+    def decode(self, image):
+        """Decode an opened image to RGB pixels (reduced scale for large JPEGs)"""
+        if self.draft_factor and image.format == 'JPEG':
+            draft_size = self.size * self.draft_factor
+            width, height = image.size
+            if width >= 2 * draft_size and height >= 2 * draft_size:
+                # Let libjpeg decode at 1/2, 1/4 or 1/8 scale instead of full resolution
+                image.draft('RGB', (draft_size, draft_size))
+
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        image.load()
+        return image
+
+    def resize(self, image):
+        """Resize a decoded RGB image to a (size, size, 3) uint8 array"""
+        # Same resampling filter as Image.resize's default
+        image = image.resize((self.size, self.size), Image.BICUBIC)
+        return np.asarray(image, dtype=np.uint8)
+
+    def load(self, image):
+        """Return the resized image as a (size, size, 3) uint8 array"""
+        return self.resize(self.decode(image))
+
+    def preprocess(self, image, out=None):
+        """Write one normalized float32 image into `out` (allocated if None)"""
+        if out is None:
+            out = np.empty((self.size, self.size, 3), dtype=np.float32)
+        np.multiply(self.load(image), _SCALE, out=out, casting='unsafe')
+        return out
+
+    def preprocess_batch(self, images, out=None):
+        """Preprocess a list of images into one (N, size, size, 3) float32 array"""
+        if out is None:
+            out = np.empty((len(images), self.size, self.size, 3), dtype=np.float32)
+        for i, image in enumerate(images):
+            self.preprocess(image, out=out[i])
+        return out
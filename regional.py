@@ -0,0 +1,97 @@
+"""
+Agricultural priority regions: dropdown options and search over Book1.xlsx.
+"""
+
+from flask import Blueprint, jsonify, request
+
+from logger import get_logger
+from metrics import histogram
+from regional_store import RESULT_FIELDS, RegionalStore
+
+regional_bp = Blueprint('regional', __name__)
+log = get_logger('regional')
+
+LOOKUP_SECONDS = histogram('regional_lookup_seconds', 'Book1.xlsx index lookup time per /api/search').labels()
+
+# Path to your Excel file
+EXCEL_FILE = 'Book1.xlsx'  # Change this to your actual Excel filename
+
+# Parsed once and indexed; reloaded when the file changes on disk
+store = RegionalStore(EXCEL_FILE)
+
+@regional_bp.route('/api/options', methods=['GET'])
+def get_options():
+    """Get options for all three dropdowns"""
+    try:
+        index = store.get()
+        if index is None:
+            return jsonify({'error': 'Excel file not found'}), 404
+        
+        return jsonify(index.options)
+    except Exception as e:
+        log.exception("Options failed")
+        return jsonify({'error': str(e)}), 500
+
+def _parse_count(value, name, default):
+    """Non-negative int from a request value, or a ValueError naming the field"""
+    if value is None or value == '':
+        return default
+    try:
+        count = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' must be a non-negative integer")
+    if count < 0:
+        raise ValueError(f"'{name}' must be a non-negative integer")
+    return count
+
+@regional_bp.route('/api/search', methods=['POST'])
+def search():
+    """Search data based on dropdown selections
+
+    Optional body keys: `limit` and `offset` to page through the results and
+    `fields` (a list or comma-separated string) to return only some fields.
+    """
+    try:
+        index = store.get()
+        if index is None:
+            return jsonify({'error': 'Excel file not found'}), 404
+        
+        data = request.get_json(silent=True) or {}
+        state = str(data.get('value1') or '').strip()
+        region = str(data.get('value2') or '').strip()
+        district = str(data.get('value3') or '').strip()
+        
+        try:
+            offset = _parse_count(data.get('offset'), 'offset', 0)
+            limit = _parse_count(data.get('limit'), 'limit', None)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        fields = data.get('fields')
+        if isinstance(fields, str):
+            fields = [f.strip() for f in fields.split(',') if f.strip()]
+        elif fields is not None and not (isinstance(fields, list) and all(isinstance(f, str) for f in fields)):
+            return jsonify({'error': 'fields must be a list of names or a comma-separated string'}), 400
+        if fields:
+            unknown = [f for f in fields if f not in RESULT_FIELDS]
+            if unknown:
+                return jsonify({'error': f'Unknown fields: {unknown}', 'fields': list(RESULT_FIELDS)}), 400
+        
+        # Exact match on state and region; districts match one whole name, ignoring case
+        with LOOKUP_SECONDS.time():
+            positions = index.positions(state=state, region=region, district=district)
+            total = len(positions)
+            end = None if limit is None else offset + limit
+            items = index.items(positions[offset:end], fields)
+        
+        return jsonify({
+            'success': True,
+            'items': items,
+            'count': len(items),
+            'total': total,
+            'offset': offset,
+            'limit': limit
+        })
+    except Exception as e:
+        log.exception("Search failed")
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,212 @@
+"""
+In-memory indexed store for the priority regions sheet (Book1.xlsx).
+
+The sheet is parsed once and kept with row indexes by state, by priority
+region and by district token (the `district` column holds comma-separated
+district names). It is reloaded when the file's modification time changes.
+
+Parsing xlsx is slow, so the cleaned frame is also pickled to a snapshot
+file next to the sheet; on a cold start the snapshot is used whenever it
+was built from the same version of the sheet.
+"""
+
+import os
+import pickle
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from logger import fields, get_logger
+
+log = get_logger('regional')
+
+REGIONAL_RELOAD_CHECK = float(os.getenv('REGIONAL_RELOAD_CHECK', '1'))
+
+_EMPTY = np.array([], dtype=np.int64)
+
+# /api/search result fields and the sheet column each one comes from
+RESULT_FIELDS = {
+    'state': 'states',
+    'priority_region': 'priority_region',
+    'priority_level': 'priority_level',
+    'district': 'district',
+    'target_crops': 'Target_crops',
+    'main_problem': 'main problem',
+    'notes': 'Notes',
+}
+
+
+def split_districts(value):
+    """'Khargone, Ratlam' -> ['Khargone', 'Ratlam']"""
+    return [d.strip() for d in str(value).split(',')]
+
+
+def _group_positions(keys):
+    """Map each distinct key to the sorted row positions holding it"""
+    groups = {}
+    for position, key in enumerate(keys):
+        groups.setdefault(key, []).append(position)
+    return {key: np.array(positions, dtype=np.int64) for key, positions in groups.items()}
+
+
+class RegionalIndex:
+    """One loaded version of the sheet with its lookup indexes"""
+
+    def __init__(self, df):
+        self.df = df.reset_index(drop=True)
+        self.by_state = {}
+        self.by_region = {}
+        self.by_district = {}
+
+        if 'states' in self.df.columns:
+            self.by_state = _group_positions(self.df['states'].fillna('').astype(str).str.strip())
+        if 'priority_region' in self.df.columns:
+            self.by_region = _group_positions(self.df['priority_region'].fillna('').astype(str).str.strip())
+        if 'district' in self.df.columns:
+            tokens = {}
+            for position, value in self.df['district'].items():
+                if pd.isna(value):
+                    continue
+                for district in split_districts(value):
+                    tokens.setdefault(district.lower(), set()).add(position)
+            self.by_district = {
+                token: np.array(sorted(positions), dtype=np.int64)
+                for token, positions in tokens.items()
+            }
+
+        # Result fields as string arrays so a search only gathers positions
+        self.columns = {
+            field: (self.df[column].astype(str).to_numpy(dtype=object) if column in self.df.columns
+                    else np.full(len(self.df), 'N/A', dtype=object))
+            for field, column in RESULT_FIELDS.items()
+        }
+
+        self.options = self._build_options()
+
+    def _build_options(self):
+        """Precompute the three dropdown lists served by /api/options"""
+        df = self.df
+
+        # Dropdown 1: States
+        if 'states' in df.columns:
+            states = df['states'].dropna().unique().tolist()
+            dropdown1 = [{'value': state, 'label': state} for state in states]
+        else:
+            dropdown1 = [{'value': 'MP', 'label': 'Madhya Pradesh (MP)'}]
+
+        # Dropdown 2: Priority Regions
+        if 'priority_region' in df.columns:
+            regions = df['priority_region'].dropna().unique().tolist()
+            dropdown2 = [{'value': region, 'label': region} for region in regions]
+        else:
+            dropdown2 = []
+
+        # Dropdown 3: Districts (unique comma-separated tokens, sorted)
+        dropdown3 = []
+        if 'district' in df.columns:
+            all_districts = set()
+            for districts_str in df['district'].dropna():
+                all_districts.update(split_districts(districts_str))
+            dropdown3 = [{'value': district, 'label': district} for district in sorted(all_districts)]
+
+        return {
+            'dropdown1': dropdown1,
+            'dropdown2': dropdown2,
+            'dropdown3': dropdown3
+        }
+
+    def positions(self, state='', region='', district=''):
+        """Row positions matching every non-empty filter (exact, stripped values)"""
+        result = None
+        for index, key in ((self.by_state, state), (self.by_region, region),
+                           (self.by_district, district.lower())):
+            if not key or not index:
+                continue
+            matches = index.get(key, _EMPTY)
+            result = matches if result is None else np.intersect1d(result, matches, assume_unique=True)
+        return np.arange(len(self.df)) if result is None else result
+
+    def items(self, positions, fields=None):
+        """Result dicts for the rows at `positions`, limited to `fields`"""
+        fields = list(fields or RESULT_FIELDS)
+        values = [self.columns[field][positions].tolist() for field in fields]
+        return [dict(zip(fields, row)) for row in zip(*values)]
+
+
+class RegionalStore:
+    """Serve a RegionalIndex, reloading it when the sheet changes on disk"""
+
+    def __init__(self, excel_path, snapshot_path=None, reload_check=REGIONAL_RELOAD_CHECK):
+        self.excel_path = excel_path
+        self.snapshot_path = snapshot_path or f'{excel_path}.snapshot.pkl'
+        self.reload_check = reload_check
+
+        self._index = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.snapshot_loads = 0
+
+    def _file_version(self):
+        try:
+            stat = os.stat(self.excel_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _read(self, version):
+        """Load the frame from the snapshot if it matches `version`, else the xlsx"""
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                snapshot = pickle.load(f)
+            if snapshot.get('version') == version:
+                self.snapshot_loads += 1
+                return snapshot['df']
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError):
+            pass
+
+        df = pd.read_excel(self.excel_path)
+        # Clean column names
+        df.columns = df.columns.str.strip()
+
+        tmp_path = f'{self.snapshot_path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'version': version, 'df': df}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            log.warning("Could not write Excel snapshot", extra=fields(error=e))
+        return df
+
+    def get(self):
+        """Return the current RegionalIndex, or None if the sheet cannot be loaded"""
+        now = time.monotonic()
+        if self._index is not None and now - self._checked_at < self.reload_check:
+            return self._index
+
+        with self._lock:
+            if self._index is not None and now - self._checked_at < self.reload_check:
+                return self._index
+            self._checked_at = now
+
+            version = self._file_version()
+            if version is None:
+                if self._index is None:
+                    log.error("Excel file not found", extra=fields(path=self.excel_path))
+                return self._index
+            if version == self._version:
+                return self._index
+
+            try:
+                df = self._read(version)
+                self._index = RegionalIndex(df)
+                self._version = version
+                self.loads += 1
+                log.info("Excel loaded", extra=fields(rows=len(df), columns=df.columns.tolist()))
+            except Exception as e:
+                # Keep serving the previous version if the new file is unreadable
+                log.error("Error loading Excel", extra=fields(path=self.excel_path, error=e))
+            return self._index
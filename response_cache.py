@@ -0,0 +1,152 @@
+"""
+Cache of pre-serialized JSON responses with ETag / 304 support.
+
+Each entry holds the encoded JSON body, a gzipped copy and a content-hash
+ETag, so a hit costs neither a database query nor serialization, and a
+client that already has the body gets a bodyless 304.
+
+Entries expire after `ttl` seconds. If a `version` function is given
+(e.g. a cheap change-detection query) it is called at most every
+`check_interval` seconds, and every entry is dropped when its value
+changes. If it fails, the cache falls back to the TTL alone.
+"""
+
+import gzip
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, current_app, request
+
+from logger import fields, get_logger
+
+log = get_logger('response_cache')
+
+# Bodies smaller than this are not worth a gzip header and CPU on the client
+GZIP_MIN_BYTES = 512
+
+
+class CachedBody:
+    """An encoded JSON body, its gzipped copy and ETag"""
+
+    def __init__(self, body, created_at):
+        self.body = body
+        self.gzipped = gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_BYTES else None
+        # Weak, because the gzipped and identity encodings share it
+        self.etag = 'W/"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        self.created_at = created_at
+
+
+class ResponseCache:
+    """LRU of CachedBody entries, invalidated by TTL or a version function"""
+
+    def __init__(self, ttl=300.0, max_entries=256, version=None, check_interval=10.0,
+                 cache_control='no-cache'):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version = version
+        self.check_interval = check_interval
+        self.cache_control = cache_control
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version_lock = threading.Lock()
+        self._current_version = None
+        self._checked_at = 0.0
+
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+        self.version_errors = 0
+
+    def _check_version(self):
+        """Drop every entry if the data version changed since the last check"""
+        if self.version is None or time.monotonic() - self._checked_at < self.check_interval:
+            return
+        # One caller runs the check; the others keep using the current entries
+        if not self._version_lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() - self._checked_at < self.check_interval:
+                return
+            try:
+                version = self.version()
+            except Exception as e:
+                with self._lock:
+                    self.version_errors += 1
+                log.warning("Change detection failed, relying on TTL", extra=fields(error=e))
+                version = self._current_version
+            self._checked_at = time.monotonic()
+            if version != self._current_version:
+                with self._lock:
+                    if self._current_version is not None:
+                        self.invalidations += 1
+                    self._entries.clear()
+                    self._current_version = version
+        finally:
+            self._version_lock.release()
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def get(self, key, build):
+        """Return the CachedBody for `key`, calling `build()` for its payload on a miss"""
+        self._check_version()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry.created_at < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            version = self._current_version
+
+        body = current_app.json.dumps(build(), separators=(',', ':')).encode('utf-8')
+        entry = CachedBody(body, now)
+        with self._lock:
+            # Do not store a body built from data that changed while we were building it
+            if version == self._current_version:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def respond(self, key, build):
+        """Serve `key` as a Flask response, honouring If-None-Match and Accept-Encoding"""
+        entry = self.get(key, build)
+
+        if_none_match = request.headers.get('If-None-Match', '')
+        if if_none_match.strip() == '*' or entry.etag[2:] in if_none_match:
+            with self._lock:
+                self.not_modified += 1
+            response = Response(status=304)
+        else:
+            response = Response(entry.body, mimetype='application/json')
+            if entry.gzipped is not None and 'gzip' in request.headers.get('Accept-Encoding', ''):
+                response.set_data(entry.gzipped)
+                response.headers['Content-Encoding'] = 'gzip'
+
+        response.headers['ETag'] = entry.etag
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = self.cache_control
+        return response
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': sum(len(e.body) for e in self._entries.values()),
+                'gzipped_bytes': sum(len(e.gzipped or e.body) for e in self._entries.values()),
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'not_modified': self.not_modified,
+                'invalidations': self.invalidations,
+                'version_errors': self.version_errors
+            }
@@ -9,29 +9,50 @@ const searchInput = document.getElementById('search-input');
 const filterSelect = document.getElementById('filter-crop');
 const resultsCount = document.getElementById('results-count');
 
+// Only the columns the cards and the search box use, one page at a time
+const CARD_FIELDS = 'disease_id,disease_name,crop_name,crop_image_url,symptoms,treatment_name';
+const PAGE_SIZE = 24;
+// Wait this long after the last keystroke before searching
+const SEARCH_DEBOUNCE_MS = 250;
+
 // State
 let allDiseases = [];
 let filteredDiseases = [];
+let nextCursor = null;
+let loadMoreButton = null;
+// The in-flight /api/explore/search request; a newer search aborts it
+let searchController = null;
 
 /**
  * Initialize the application
  */
 function init() {
     console.log('🚀 Initializing Crop Disease Explorer...');
+    createLoadMoreButton();
     initializeEventListeners();
-    fetchDiseases();
+    fetchCrops();
+    fetchDiseases(true);
 }
 
 /**
- * Fetch disease data from API
+ * Fetch a page of disease data from the API
+ * reset: start again from the first page (e.g. after the crop filter changed)
  */
-async function fetchDiseases() {
+async function fetchDiseases(reset) {
     try {
         showLoading(true);
         hideError();
         
-        // Ensure your Flask backend has a route: @app.route('/api/explore')
-        const response = await fetch(`${API_BASE_URL}/api/explore`);
+        const params = new URLSearchParams({ fields: CARD_FIELDS, limit: PAGE_SIZE });
+        const selectedCrop = filterSelect ? filterSelect.value : '';
+        if (selectedCrop) {
+            params.set('crop', selectedCrop);
+        }
+        if (!reset && nextCursor) {
+            params.set('after', nextCursor);
+        }
+        
+        const response = await fetch(`${API_BASE_URL}/api/explore?${params}`);
         
         if (!response.ok) {
             throw new Error(`Server Error: ${response.status}`);
@@ -39,16 +60,11 @@ async function fetchDiseases() {
         
         const result = await response.json();
         
-        // Adjust this check based on how your Python API returns data
-        // Assuming it returns { success: true, data: [...] }
-        if (result.success || Array.isArray(result)) {
-            // Handle if result is just the array or an object wrapper
-            allDiseases = result.data || result; 
-            filteredDiseases = [...allDiseases];
+        if (result.success) {
+            allDiseases = reset ? result.data : allDiseases.concat(result.data);
+            nextCursor = result.next_cursor;
             
-            populateFilterDropdown();
-            renderDiseases(filteredDiseases);
-            updateResultsCount();
+            filterDiseases();
             
             console.log(`✅ Loaded ${allDiseases.length} items`);
         } else {
@@ -63,14 +79,30 @@ async function fetchDiseases() {
     }
 }
 
+/**
+ * Fetch the crop list for the filter dropdown
+ */
+async function fetchCrops() {
+    try {
+        const response = await fetch(`${API_BASE_URL}/api/crops`);
+        if (!response.ok) {
+            throw new Error(`Server Error: ${response.status}`);
+        }
+        const result = await response.json();
+        populateFilterDropdown(result.data || []);
+    } catch (error) {
+        console.error('Error fetching crops:', error);
+    }
+}
+
 /**
  * Populate the crop filter dropdown
  */
-function populateFilterDropdown() {
+function populateFilterDropdown(crops) {
     if (!filterSelect) return;
     
     // Get unique crop names safely
-    const uniqueCrops = [...new Set(allDiseases.map(d => d.crop_name))];
+    const uniqueCrops = [...new Set(crops.map(c => c.crop_name))];
     uniqueCrops.sort();
     
     // Clear existing options (except "All Crops")
@@ -85,6 +117,30 @@ function populateFilterDropdown() {
     });
 }
 
+/**
+ * Add a "Load more" button below the results grid
+ */
+function createLoadMoreButton() {
+    if (!diseaseContainer) return;
+    
+    loadMoreButton = document.createElement('button');
+    loadMoreButton.id = 'load-more';
+    loadMoreButton.className = 'home-btn';
+    loadMoreButton.textContent = 'Load more';
+    loadMoreButton.style.cssText = 'display: none; margin: 20px auto; border: none; cursor: pointer;';
+    loadMoreButton.addEventListener('click', () => fetchDiseases(false));
+    diseaseContainer.insertAdjacentElement('afterend', loadMoreButton);
+}
+
+/**
+ * Show the "Load more" button only while the server has more pages
+ */
+function updateLoadMoreButton() {
+    if (loadMoreButton) {
+        loadMoreButton.style.display = nextCursor ? 'block' : 'none';
+    }
+}
+
 /**
  * Render disease cards
  */
@@ -139,32 +195,59 @@ function createDiseaseCard(disease) {
 }
 
 /**
- * Filter diseases by search term and crop selection
+ * Show the loaded page(s), or the server's ranked symptom search results
+ * when there is search text (the crop filter is applied by the server)
  */
-function filterDiseases() {
-    const searchTerm = searchInput ? searchInput.value.toLowerCase() : '';
-    const selectedCrop = filterSelect ? filterSelect.value : '';
+async function filterDiseases() {
+    const searchTerm = searchInput ? searchInput.value.trim() : '';
+    
+    // Only the latest search may render; an older response must not overwrite it
+    if (searchController) {
+        searchController.abort();
+        searchController = null;
+    }
     
-    filteredDiseases = allDiseases.filter(disease => {
-        // Safe null checks
-        const dName = (disease.disease_name || '').toLowerCase();
-        const cName = (disease.crop_name || '').toLowerCase();
-        const symp = (disease.symptoms || '').toLowerCase();
-
-        // Search filter
-        const matchesSearch = !searchTerm || 
-            dName.includes(searchTerm) ||
-            cName.includes(searchTerm) ||
-            symp.includes(searchTerm);
+    if (!searchTerm) {
+        filteredDiseases = allDiseases;
+        renderDiseases(filteredDiseases);
+        updateResultsCount();
+        updateLoadMoreButton();
+        return;
+    }
+    
+    try {
+        hideError();
+        const params = new URLSearchParams({ q: searchTerm, limit: 50 });
+        const selectedCrop = filterSelect ? filterSelect.value : '';
+        if (selectedCrop) {
+            params.set('crop', selectedCrop);
+        }
         
-        // Crop filter
-        const matchesCrop = !selectedCrop || disease.crop_name === selectedCrop;
+        const controller = new AbortController();
+        searchController = controller;
+        const response = await fetch(`${API_BASE_URL}/api/explore/search?${params}`, {
+            signal: controller.signal
+        });
+        if (!response.ok) {
+            throw new Error(`Server Error: ${response.status}`);
+        }
+        const result = await response.json();
         
-        return matchesSearch && matchesCrop;
-    });
-    
-    renderDiseases(filteredDiseases);
-    updateResultsCount();
+        // Superseded while the body was being read
+        if (controller.signal.aborted) return;
+        searchController = null;
+        
+        filteredDiseases = result.data || [];
+        renderDiseases(filteredDiseases);
+        updateResultsCount();
+        if (loadMoreButton) {
+            loadMoreButton.style.display = 'none';
+        }
+    } catch (error) {
+        if (error.name === 'AbortError') return;
+        console.error('Error searching diseases:', error);
+        showError(`⚠️ Search failed (${error.message})`);
+    }
 }
 
 /**
@@ -224,11 +307,11 @@ function debounce(func, wait) {
  */
 function initializeEventListeners() {
     if (searchInput) {
-        searchInput.addEventListener('input', debounce(filterDiseases, 300));
+        searchInput.addEventListener('input', debounce(filterDiseases, SEARCH_DEBOUNCE_MS));
     }
     
     if (filterSelect) {
-        filterSelect.addEventListener('change', filterDiseases);
+        filterSelect.addEventListener('change', () => fetchDiseases(true));
     }
 }
 
@@ -0,0 +1,417 @@
+"""
+Train the crop disease classifier on datasets/PlantVillage with tf.data.
+
+Same model, optimizer and callbacks as models/Untitled1.ipynb, but the
+input pipeline replaces ImageDataGenerator.flow_from_directory:
+
+- JPEG/PNG decode and resize run in parallel (num_parallel_calls=AUTOTUNE)
+- decoded, resized uint8 images are cached after the first epoch (about
+  150 KB per image in memory; pass --cache PATH to cache on disk instead)
+- augmentation runs on whole batches with Keras preprocessing layers
+- batches are prefetched so the model never waits for input
+- the train/validation split is a hash of each file's path, so it is
+  deterministic and stays stable when images are added
+
+    python train.py [--epochs 20] [--batch-size 32] [--cache memory|none|PATH]
+                    [--data-cache DIR] [--output-dir training_output]
+
+With --data-cache, images are streamed from a memory-mapped cache built by
+dataset_cache.py instead of being decoded from JPEG. With --head-only, the
+frozen MobileNetV2 base runs once per image (features cached by
+feature_cache.py) and only the Dense head is trained; the result is
+reassembled into the same full model, loadable with keras.models.load_model.
+
+Writes crop_disease_model_best.h5, crop_disease_model.h5, class_labels.json
+and training_history.png to --output-dir; copy the model and labels next to
+main.py to serve them.
+"""
+
+import argparse
+import json
+import os
+
+import tensorflow as tf
+from tensorflow import keras
+from tensorflow.keras import layers
+
+from plantvillage import (DATA_DIR, VALIDATION_SPLIT, is_validation, list_classes, list_images,
+                          relative_image_path)
+
+# Configuration
+IMG_SIZE = 224
+BATCH_SIZE = 32
+EPOCHS = 20
+SEED = 42
+
+AUTOTUNE = tf.data.AUTOTUNE
+
+
+def split_files(data_dir=DATA_DIR, validation_split=VALIDATION_SPLIT):
+    """Return (train, val) lists of (path, class index) and the class names
+
+    The split is a hash of each path (plantvillage.is_validation), so it
+    never depends on listing order or on which other files exist.
+    """
+    class_names = list_classes(data_dir)
+    class_index = {name: i for i, name in enumerate(class_names)}
+    train, val = [], []
+    for path, folder in list_images(data_dir):
+        target = val if is_validation(relative_image_path(path, data_dir), validation_split) else train
+        target.append((path, class_index[folder]))
+    return train, val, class_names
+
+
+def decode_image(path, size=IMG_SIZE):
+    """Read and resize one image to a (size, size, 3) uint8 tensor"""
+    image = tf.io.decode_image(tf.io.read_file(path), channels=3, expand_animations=False)
+    # Bicubic like the serving preprocessor (preprocessing.ImagePreprocessor).
+    # PIL widens the filter when downscaling; without antialias TF would
+    # sample the source sparsely and alias on large images.
+    image = tf.image.resize(image, (size, size), method='bicubic', antialias=True)
+    return tf.cast(tf.clip_by_value(tf.round(image), 0, 255), tf.uint8)
+
+
+def build_augmenter():
+    """Batch-wise equivalent of the notebook's ImageDataGenerator settings
+
+    Keras has no shear layer, so shear_range=0.2 is dropped.
+    """
+    return keras.Sequential([
+        layers.RandomRotation(20 / 360, fill_mode='nearest', seed=SEED),
+        layers.RandomTranslation(0.2, 0.2, fill_mode='nearest', seed=SEED),
+        layers.RandomZoom(0.2, fill_mode='nearest', seed=SEED),
+        layers.RandomFlip('horizontal', seed=SEED),
+    ], name='augmentation')
+
+
+def make_dataset(files, num_classes, batch_size=BATCH_SIZE, training=False, cache='memory', augmenter=None):
+    """tf.data pipeline yielding (float32 images in [0, 1], one-hot labels)"""
+    paths = [path for path, _ in files]
+    labels = [label for _, label in files]
+
+    ds = tf.data.Dataset.from_tensor_slices((paths, labels))
+    ds = ds.map(lambda path, label: (decode_image(path), label),
+                num_parallel_calls=AUTOTUNE, deterministic=False)
+    if cache == 'memory':
+        ds = ds.cache()
+    elif cache and cache != 'none':
+        ds = ds.cache(cache)
+    if training:
+        ds = ds.shuffle(min(len(files), 10000), seed=SEED, reshuffle_each_iteration=True)
+    ds = ds.batch(batch_size)
+    return _to_model_input(ds, num_classes, training, augmenter)
+
+
+def _to_model_input(ds, num_classes, training, augmenter):
+    """Scale uint8 batches to [0, 1], augment training batches, one-hot the labels"""
+    def to_model_input(images, labels):
+        images = tf.cast(images, tf.float32) / 255.0
+        if training and augmenter is not None:
+            images = augmenter(images, training=True)
+        return images, tf.one_hot(labels, num_classes)
+
+    ds = ds.map(to_model_input, num_parallel_calls=AUTOTUNE)
+    return ds.prefetch(AUTOTUNE)
+
+
+def make_cached_dataset(cache, indices, num_classes, batch_size=BATCH_SIZE, training=False, augmenter=None):
+    """Like make_dataset, but streaming pre-decoded images from a dataset_cache.DatasetCache"""
+    def batches():
+        # A fresh permutation every epoch
+        return cache.iter_batches(indices, batch_size, shuffle=training)
+
+    ds = tf.data.Dataset.from_generator(batches, output_signature=(
+        tf.TensorSpec((None, IMG_SIZE, IMG_SIZE, 3), tf.uint8),
+        tf.TensorSpec((None,), tf.int64),
+    ))
+    return _to_model_input(ds, num_classes, training, augmenter)
+
+
+def prepare_cached_data(cache_dir, batch_size=BATCH_SIZE):
+    """Training and validation datasets read from a dataset_cache.py build"""
+    from dataset_cache import DatasetCache
+
+    cache = DatasetCache(cache_dir)
+    train_indices, val_indices = cache.split()
+    num_classes = len(cache.classes)
+    train_ds = make_cached_dataset(cache, train_indices, num_classes, batch_size, training=True,
+                                   augmenter=build_augmenter())
+    val_ds = make_cached_dataset(cache, val_indices, num_classes, batch_size)
+    print(f"Found {len(train_indices)} training and {len(val_indices)} validation images "
+          f"in {num_classes} classes (from {cache_dir})")
+    return train_ds, val_ds, cache.classes
+
+
+def prepare_data(data_dir=DATA_DIR, batch_size=BATCH_SIZE, cache='memory'):
+    """Training and validation datasets plus the class names"""
+    train_files, val_files, class_names = split_files(data_dir)
+    num_classes = len(class_names)
+    if cache not in ('memory', 'none', ''):
+        val_cache = f'{cache}.val'
+    else:
+        val_cache = cache
+    train_ds = make_dataset(train_files, num_classes, batch_size, training=True,
+                            cache=cache, augmenter=build_augmenter())
+    val_ds = make_dataset(val_files, num_classes, batch_size, cache=val_cache)
+    print(f"Found {len(train_files)} training and {len(val_files)} validation images "
+          f"in {num_classes} classes")
+    return train_ds, val_ds, class_names
+
+
+def create_model(num_classes, base_model=None):
+    """Create a CNN model with transfer learning"""
+    if base_model is None:
+        base_model = keras.applications.MobileNetV2(
+            input_shape=(IMG_SIZE, IMG_SIZE, 3),
+            include_top=False,
+            weights='imagenet'
+        )
+
+    # Freeze base model
+    base_model.trainable = False
+
+    model = keras.Sequential([
+        base_model,
+        layers.GlobalAveragePooling2D(),
+        layers.Dropout(0.3),
+        layers.Dense(256, activation='relu'),
+        layers.Dropout(0.3),
+        layers.Dense(num_classes, activation='softmax')
+    ])
+
+    return model
+
+
+def create_head(num_classes, feature_dim):
+    """The layers create_model puts on top of the pooled backbone output"""
+    return keras.Sequential([
+        keras.Input(shape=(feature_dim,)),
+        layers.Dropout(0.3),
+        layers.Dense(256, activation='relu'),
+        layers.Dropout(0.3),
+        layers.Dense(num_classes, activation='softmax')
+    ], name='head')
+
+
+def assemble_model(head, num_classes, base_model):
+    """A full create_model network with the trained head's weights"""
+    model = create_model(num_classes, base_model)
+    dense = [layer for layer in model.layers if isinstance(layer, layers.Dense)]
+    head_dense = [layer for layer in head.layers if isinstance(layer, layers.Dense)]
+    for target, source in zip(dense, head_dense):
+        target.set_weights(source.get_weights())
+    return model
+
+
+def plot_history(history, path):
+    """Plot training history (skipped if matplotlib is not installed)"""
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib not installed, skipping training history plot")
+        return
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 4))
+
+    ax1.plot(history.history['accuracy'], label='Train Accuracy')
+    ax1.plot(history.history['val_accuracy'], label='Val Accuracy')
+    ax1.set_title('Model Accuracy')
+    ax1.set_xlabel('Epoch')
+    ax1.set_ylabel('Accuracy')
+    ax1.legend()
+    ax1.grid(True)
+
+    ax2.plot(history.history['loss'], label='Train Loss')
+    ax2.plot(history.history['val_loss'], label='Val Loss')
+    ax2.set_title('Model Loss')
+    ax2.set_xlabel('Epoch')
+    ax2.set_ylabel('Loss')
+    ax2.legend()
+    ax2.grid(True)
+
+    plt.tight_layout()
+    plt.savefig(path)
+    print(f"Training history plot saved as '{path}'")
+
+
+def save_class_labels(class_names, path):
+    """Write {"0": "Pepper__bell___Bacterial_spot", ...} like the notebook did"""
+    with open(path, 'w') as f:
+        json.dump({i: name for i, name in enumerate(class_names)}, f)
+    print(f"Class labels saved as '{path}'")
+
+
+def train_model(data_dir=DATA_DIR, output_dir='training_output', epochs=EPOCHS,
+                batch_size=BATCH_SIZE, cache='memory', data_cache=None):
+    """Main training function"""
+    os.makedirs(output_dir, exist_ok=True)
+
+    print("Preparing data...")
+    if data_cache:
+        train_ds, val_ds, class_names = prepare_cached_data(data_cache, batch_size)
+    else:
+        train_ds, val_ds, class_names = prepare_data(data_dir, batch_size, cache)
+    num_classes = len(class_names)
+
+    print("\nBuilding model...")
+    model = create_model(num_classes)
+
+    model.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=0.001),
+        loss='categorical_crossentropy',
+        metrics=['accuracy']
+    )
+
+    # Callbacks
+    callbacks = [
+        keras.callbacks.EarlyStopping(
+            monitor='val_accuracy',
+            patience=5,
+            restore_best_weights=True
+        ),
+        keras.callbacks.ReduceLROnPlateau(
+            monitor='val_loss',
+            factor=0.5,
+            patience=3,
+            min_lr=1e-7
+        ),
+        keras.callbacks.ModelCheckpoint(
+            os.path.join(output_dir, 'crop_disease_model_best.h5'),
+            monitor='val_accuracy',
+            save_best_only=True
+        )
+    ]
+
+    print("\nTraining model...")
+    history = model.fit(
+        train_ds,
+        epochs=epochs,
+        validation_data=val_ds,
+        callbacks=callbacks
+    )
+
+    # Save final model
+    model_path = os.path.join(output_dir, 'crop_disease_model.h5')
+    model.save(model_path)
+    print(f"\nModel saved as '{model_path}'")
+
+    save_class_labels(class_names, os.path.join(output_dir, 'class_labels.json'))
+    plot_history(history, os.path.join(output_dir, 'training_history.png'))
+
+    return model, history
+
+
+def train_head(data_dir=DATA_DIR, output_dir='training_output', epochs=EPOCHS,
+                batch_size=BATCH_SIZE, data_cache=None):
+    """Train only the Dense head from cached backbone features
+
+    The dataset cache and the feature cache are brought up to date first,
+    which runs the backbone only on images it has not seen. Augmentation
+    is not applied, since features are computed once per image.
+    """
+    import numpy as np
+
+    import dataset_cache
+    from feature_cache import FeatureCache, backbone_version, build_backbone, extract_features
+
+    os.makedirs(output_dir, exist_ok=True)
+    data_cache = data_cache or dataset_cache.DATASET_CACHE_DIR
+
+    print("Updating dataset cache...")
+    print(dataset_cache.build_cache(data_dir, data_cache))
+    dataset = dataset_cache.DatasetCache(data_cache)
+    train_indices, val_indices = dataset.split()
+    num_classes = len(dataset.classes)
+
+    feature_model, base_model = build_backbone(IMG_SIZE)
+    features = FeatureCache(backbone_version(base_model))
+    extract_features(dataset, features, feature_model)
+
+    x = features.load(dataset.hashes)
+    y = keras.utils.to_categorical(dataset.labels, num_classes)
+    print(f"Training head on {len(train_indices)} cached feature vectors, "
+          f"validating on {len(val_indices)}")
+
+    head = create_head(num_classes, x.shape[1])
+    head.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=0.001),
+        loss='categorical_crossentropy',
+        metrics=['accuracy']
+    )
+    history = head.fit(
+        x[train_indices], y[train_indices],
+        epochs=epochs,
+        batch_size=batch_size,
+        validation_data=(x[val_indices], y[val_indices]),
+        callbacks=[
+            keras.callbacks.EarlyStopping(
+                monitor='val_accuracy',
+                patience=5,
+                restore_best_weights=True
+            ),
+            keras.callbacks.ReduceLROnPlateau(
+                monitor='val_loss',
+                factor=0.5,
+                patience=3,
+                min_lr=1e-7
+            )
+        ]
+    )
+
+    model = assemble_model(head, num_classes, base_model)
+    model.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=0.001),
+        loss='categorical_crossentropy',
+        metrics=['accuracy']
+    )
+
+    # The assembled model must reproduce the head on raw images
+    check = val_indices[:64]
+    full = model.predict(dataset.images(check).astype(np.float32) / 255.0, verbose=0)
+    difference = float(np.max(np.abs(full - head.predict(x[check], verbose=0))))
+    print(f"Assembled model vs head on {len(check)} images: max |difference| = {difference:.2e}")
+
+    model_path = os.path.join(output_dir, 'crop_disease_model_best.h5')
+    model.save(model_path)
+    print(f"\nModel saved as '{model_path}'")
+
+    save_class_labels(dataset.classes, os.path.join(output_dir, 'class_labels.json'))
+    plot_history(history, os.path.join(output_dir, 'training_history.png'))
+
+    return model, history
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--output-dir', default='training_output')
+    parser.add_argument('--epochs', type=int, default=EPOCHS)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--cache', default='memory',
+                        help="'memory' (default), 'none', or a file path prefix for an on-disk cache")
+    parser.add_argument('--data-cache', default=None,
+                        help='read pre-decoded images from this dataset_cache.py directory instead')
+    parser.add_argument('--head-only', action='store_true',
+                        help='train only the Dense head from cached MobileNetV2 features (feature_cache.py)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.data_dir):
+        print(f"Error: Data directory '{args.data_dir}' not found!")
+        print("\nPlease download the PlantVillage dataset from Kaggle:")
+        print("https://www.kaggle.com/datasets/emmarex/plantdisease")
+        return
+
+    if args.head_only:
+        model, history = train_head(args.data_dir, args.output_dir, args.epochs, args.batch_size,
+                                    args.data_cache)
+    else:
+        model, history = train_model(args.data_dir, args.output_dir, args.epochs, args.batch_size,
+                                     args.cache, args.data_cache)
+    print("\nTraining complete!")
+    print(f"Final validation accuracy: {history.history['val_accuracy'][-1]:.4f}")
+
+
+if __name__ == '__main__':
+    main()
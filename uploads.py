@@ -0,0 +1,123 @@
+"""
+Bounded-memory handling of uploaded images.
+
+An upload is never read into memory whole. werkzeug spools request files
+over 500 KB to disk; read_upload streams that file in chunks through the
+prediction cache hash while enforcing MAX_UPLOAD_MB, and open_image lets
+PIL read only the header to reject unsupported formats and oversized
+dimensions before any pixels are decoded. Requests whose Content-Length
+already exceeds the limit are refused without reading the body, and
+werkzeug stops reading a chunked body (no Content-Length) with a 413 as
+soon as it passes the limit, before spooling the rest.
+
+    MAX_UPLOAD_MB         largest accepted image file (default 16)
+    MAX_BATCH_UPLOAD_MB   largest /api/predict/batch request body (default 256)
+    MAX_IMAGE_PIXELS      largest accepted width x height (default 64 MP)
+"""
+
+import io
+import os
+
+from PIL import Image, UnidentifiedImageError
+
+from prediction_cache import PredictionCache
+
+MAX_UPLOAD_BYTES = int(float(os.getenv('MAX_UPLOAD_MB', '16')) * 1024 * 1024)
+MAX_BATCH_UPLOAD_BYTES = int(float(os.getenv('MAX_BATCH_UPLOAD_MB', '256')) * 1024 * 1024)
+MAX_IMAGE_PIXELS = int(os.getenv('MAX_IMAGE_PIXELS', str(64 * 1000 * 1000)))
+
+ALLOWED_FORMATS = frozenset({'JPEG', 'MPO', 'PNG', 'WEBP', 'BMP', 'GIF', 'TIFF'})
+CHUNK_SIZE = 64 * 1024
+# Multipart boundaries and headers around the file itself
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadError(Exception):
+    """An upload the endpoint must reject; `status` is the HTTP status to answer with"""
+
+    status = 400
+
+
+class UploadTooLarge(UploadError):
+    status = 413
+
+
+class UnsupportedImage(UploadError):
+    status = 415
+
+
+def check_content_length(content_length, max_bytes=MAX_UPLOAD_BYTES):
+    """Refuse a request from its Content-Length header alone"""
+    if content_length is not None and content_length > max_bytes + FORM_OVERHEAD_BYTES:
+        raise UploadTooLarge(f'Upload exceeds the {max_bytes // (1024 * 1024)} MB limit')
+
+
+def limit_request(request, max_bytes=MAX_UPLOAD_BYTES):
+    """Refuse `request` by its Content-Length and cap the body werkzeug reads
+
+    Call before request.files. Past the cap the form parser raises
+    RequestEntityTooLarge. A per-request cap needs Flask 3.1; older
+    versions only have the app-wide MAX_CONTENT_LENGTH.
+    """
+    check_content_length(request.content_length, max_bytes)
+    try:
+        request.max_content_length = max_bytes + FORM_OVERHEAD_BYTES
+    except AttributeError:
+        pass
+
+
+def read_upload(stream, model_version, max_bytes=MAX_UPLOAD_BYTES):
+    """Hash a seekable upload in chunks; return its prediction cache key
+
+    Raises UploadTooLarge as soon as more than `max_bytes` have been read.
+    """
+    stream.seek(0)
+    digest = PredictionCache.key_hasher(model_version)
+    size = 0
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadTooLarge(f'Image exceeds the {max_bytes // (1024 * 1024)} MB limit')
+        digest.update(chunk)
+    if not size:
+        raise UploadError('Empty upload')
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def open_image(stream, max_pixels=MAX_IMAGE_PIXELS):
+    """Open an image reading only its header, or raise UploadError
+
+    The returned image is decoded lazily, by the preprocessor.
+    """
+    stream.seek(0)
+    try:
+        image = Image.open(stream)
+    except Image.DecompressionBombError as e:
+        raise UploadTooLarge(str(e))
+    except (UnidentifiedImageError, OSError, SyntaxError, ValueError):
+        raise UnsupportedImage('Unrecognized image file')
+
+    if image.format not in ALLOWED_FORMATS:
+        image.close()
+        raise UnsupportedImage(f'Unsupported image format {image.format}, expected one of {sorted(ALLOWED_FORMATS)}')
+    width, height = image.size
+    if width * height > max_pixels:
+        image.close()
+        raise UploadTooLarge(f'Image is {width}x{height}, over the {max_pixels} pixel limit')
+    return image
+
+
+def read_zip_member(archive, info, max_bytes=MAX_UPLOAD_BYTES):
+    """A zip member as a seekable stream, checking its size before decompressing"""
+    if info.file_size > max_bytes:
+        raise UploadTooLarge(f'Image exceeds the {max_bytes // (1024 * 1024)} MB limit')
+    with archive.open(info) as member:
+        # file_size comes from the archive and may lie; never read past the cap
+        data = member.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise UploadTooLarge(f'Image exceeds the {max_bytes // (1024 * 1024)} MB limit')
+    return io.BytesIO(data)
@@ -0,0 +1,334 @@
+"""
+Weather dashboard: current conditions plus irrigation and spray advisories
+for major cities in Madhya Pradesh, from OpenWeatherMap.
+"""
+
+from flask import Blueprint, jsonify
+import requests
+from datetime import datetime
+from advisory_engine import (
+    IRRIGATION_INCREASE, IRRIGATION_NORMAL, IRRIGATION_NOT_REQUIRED, IRRIGATION_REDUCE, IRRIGATION_STATUS,
+    OPTIMAL_SPRAY_TIME, REASONS, SPRAY_CAUTION, SPRAY_DELAY, SPRAY_RAIN, SPRAY_SAFE, SPRAY_STATUS, SPRAY_WIND,
+    advisory_timeline, current_advisories, current_advisories_many
+)
+from weather_client import WEATHER_PREFETCH, OpenWeatherClient, WeatherPrefetcher
+
+weather_bp = Blueprint('weather', __name__)
+
+# Your OpenWeatherMap API key
+API_KEY = 'OPENWEATHER_API_KEY'  # Replace with your actual API key
+WEATHER_URL = 'https://api.openweathermap.org/data/2.5/weather'
+FORECAST_URL = 'https://api.openweathermap.org/data/2.5/forecast'
+
+weather_client = OpenWeatherClient(API_KEY, WEATHER_URL, FORECAST_URL)
+
+# Major cities in Madhya Pradesh
+MP_CITIES = {
+    'Bhopal': {'lat': 23.2599, 'lon': 77.4126},
+    'Indore': {'lat': 22.7196, 'lon': 75.8577},
+    'Jabalpur': {'lat': 23.1815, 'lon': 79.9864},
+    'Gwalior': {'lat': 26.2183, 'lon': 78.1828},
+    'Ujjain': {'lat': 23.1765, 'lon': 75.7885},
+    'Sagar': {'lat': 23.8388, 'lon': 78.7378},
+    'Dewas': {'lat': 22.9676, 'lon': 76.0534},
+    'Satna': {'lat': 24.6005, 'lon': 80.8322},
+    'Ratlam': {'lat': 23.3315, 'lon': 75.0367},
+    'Rewa': {'lat': 24.5364, 'lon': 81.2961}
+}
+
+# Keeps every city warm in the cache for the bulk /api/dashboard endpoint
+prefetcher = WeatherPrefetcher(weather_client, MP_CITIES)
+
+@weather_bp.before_app_request
+def ensure_prefetcher():
+    # Started on the first request, not at import: with gunicorn --preload the
+    # app is built in the master, which must not poll OpenWeatherMap itself.
+    # Idempotent, and restarts the scheduler in each forked worker.
+    if WEATHER_PREFETCH:
+        prefetcher.start()
+
+# Reference rules. The endpoints use advisory_engine, which evaluates the same
+# thresholds over arrays; benchmarks/advisory_engine.py checks they agree.
+# Status and reason wording is advisory_engine's, so it is defined once.
+
+def calculate_irrigation_advisory(weather_data, forecast_data):
+    """Calculate irrigation advisory based on weather conditions"""
+    
+    # Extract data
+    rain_today = weather_data.get('rain', {}).get('1h', 0)
+    humidity = weather_data['main']['humidity']
+    temperature = weather_data['main']['temp']
+    
+    # Get rain forecast for next 24 hours
+    rain_forecast_24h = 0
+    for forecast in forecast_data['list'][:8]:  # Next 24 hours (3-hour intervals)
+        rain_forecast_24h += forecast.get('rain', {}).get('3h', 0)
+    
+    advisory = {
+        'status': '',
+        'recommendation': '',
+        'reasons': [],
+        'data': {
+            'rain_today': round(rain_today, 1),
+            'rain_forecast_24h': round(rain_forecast_24h, 1),
+            'humidity': humidity,
+            'temperature': round(temperature, 1)
+        }
+    }
+    
+    # STEP 1: Check Rainfall
+    if rain_today >= 5 or rain_forecast_24h >= 5:
+        advisory['status'], advisory['recommendation'] = IRRIGATION_STATUS[IRRIGATION_NOT_REQUIRED]
+        if rain_today >= 5:
+            advisory['reasons'].append(REASONS['rain_today'].format(round(rain_today, 1)))
+        if rain_forecast_24h >= 5:
+            advisory['reasons'].append(REASONS['rain_forecast_24h'].format(round(rain_forecast_24h, 1)))
+        return advisory
+    
+    # STEP 2: Check Humidity
+    if humidity >= 75:
+        advisory['status'], advisory['recommendation'] = IRRIGATION_STATUS[IRRIGATION_REDUCE]
+        advisory['reasons'].append(REASONS['humid_evaporation'].format(humidity))
+        advisory['reasons'].append(REASONS['humid_soil'])
+        return advisory
+    
+    # STEP 3: Check Temperature
+    if temperature >= 35 and humidity < 60:
+        advisory['status'], advisory['recommendation'] = IRRIGATION_STATUS[IRRIGATION_INCREASE]
+        advisory['reasons'].append(REASONS['hot'].format(round(temperature, 1)))
+        advisory['reasons'].append(REASONS['dry'].format(humidity))
+        return advisory
+    
+    # STEP 4: Default Case
+    advisory['status'], advisory['recommendation'] = IRRIGATION_STATUS[IRRIGATION_NORMAL]
+    advisory['reasons'].append(REASONS['normal_weather'])
+    advisory['reasons'].append(REASONS['normal_schedule'])
+    
+    return advisory
+
+def calculate_spray_advisory(weather_data, forecast_data):
+    """Calculate spray advisory based on weather conditions"""
+    
+    # Extract data
+    wind_speed = weather_data['wind']['speed'] * 3.6  # Convert m/s to km/h
+    humidity = weather_data['main']['humidity']
+    
+    # Check rain forecast for next 12 hours
+    rain_forecast_12h = False
+    for forecast in forecast_data['list'][:4]:  # Next 12 hours
+        if forecast.get('rain', {}).get('3h', 0) > 0:
+            rain_forecast_12h = True
+            break
+    
+    # Get current time for optimal spraying time
+    current_hour = datetime.now().hour
+    is_optimal_time = (6 <= current_hour <= 10) or (16 <= current_hour <= 19)
+    
+    advisory = {
+        'status': '',
+        'recommendation': '',
+        'reasons': [],
+        'optimal_time': OPTIMAL_SPRAY_TIME,
+        'data': {
+            'wind_speed': round(wind_speed, 1),
+            'humidity': humidity,
+            'rain_forecast_12h': rain_forecast_12h,
+            'current_time_optimal': is_optimal_time
+        }
+    }
+    
+    # STEP 1: Check Wind Speed
+    if wind_speed >= 15:
+        advisory['status'], advisory['recommendation'] = SPRAY_STATUS[SPRAY_WIND]
+        advisory['reasons'].append(REASONS['wind_drift'].format(round(wind_speed, 1)))
+        advisory['reasons'].append(REASONS['drift_damage'])
+        return advisory
+    
+    # STEP 2: Check Rain Forecast
+    if rain_forecast_12h:
+        advisory['status'], advisory['recommendation'] = SPRAY_STATUS[SPRAY_RAIN]
+        advisory['reasons'].append(REASONS['rain_expected'])
+        advisory['reasons'].append(REASONS['rain_washes'])
+        return advisory
+    
+    # STEP 3: Check Humidity
+    if humidity >= 85:
+        advisory['status'], advisory['recommendation'] = SPRAY_STATUS[SPRAY_DELAY]
+        advisory['reasons'].append(REASONS['very_humid'].format(humidity))
+        advisory['reasons'].append(REASONS['poor_absorption'])
+        return advisory
+    
+    # STEP 4: Optimal Conditions
+    if wind_speed < 10 and not rain_forecast_12h and 50 <= humidity <= 80:
+        advisory['status'], advisory['recommendation'] = SPRAY_STATUS[SPRAY_SAFE]
+        advisory['reasons'].append(REASONS['wind_safe'].format(round(wind_speed, 1)))
+        advisory['reasons'].append(REASONS['humidity_optimal'].format(humidity))
+        advisory['reasons'].append(REASONS['no_rain'])
+        if is_optimal_time:
+            advisory['reasons'].append(REASONS['time_optimal'])
+        else:
+            advisory['reasons'].append(REASONS['time_not_optimal'])
+        return advisory
+    
+    # Moderate conditions
+    advisory['status'], advisory['recommendation'] = SPRAY_STATUS[SPRAY_CAUTION]
+    advisory['reasons'].append(REASONS['acceptable'])
+    if wind_speed >= 10:
+        advisory['reasons'].append(REASONS['wind_moderate'].format(round(wind_speed, 1)))
+    if humidity < 50:
+        advisory['reasons'].append(REASONS['humidity_low'].format(humidity))
+    
+    return advisory
+
+@weather_bp.route('/api/cities', methods=['GET'])
+def get_cities():
+    """Return list of available cities"""
+    return jsonify({
+        'success': True,
+        'cities': list(MP_CITIES.keys())
+    })
+
+def build_dashboard(city, weather_data, forecast_data, advisories=None):
+    """Build the dashboard payload for one city from OpenWeatherMap data
+
+    `advisories` is the city's (irrigation, spray) pair if already computed.
+    """
+    # Extract weather information
+    weather_info = {
+        'city': city,
+        'temperature': round(weather_data['main']['temp'], 1),
+        'feels_like': round(weather_data['main']['feels_like'], 1),
+        'humidity': weather_data['main']['humidity'],
+        'pressure': weather_data['main']['pressure'],
+        'wind_speed': round(weather_data['wind']['speed'] * 3.6, 1),
+        'wind_direction': weather_data['wind'].get('deg', 0),
+        'description': weather_data['weather'][0]['description'].title(),
+        'icon': weather_data['weather'][0]['icon'],
+        'visibility': round(weather_data.get('visibility', 0) / 1000, 1),
+        'clouds': weather_data['clouds']['all'],
+        'rainfall': weather_data.get('rain', {}).get('1h', 0),
+        'sunrise': weather_data['sys']['sunrise'],
+        'sunset': weather_data['sys']['sunset']
+    }
+    
+    # Calculate advisories
+    if advisories is None:
+        advisories = current_advisories(weather_data, forecast_data)
+    irrigation_advisory, spray_advisory = advisories
+    
+    return {
+        'success': True,
+        'weather': weather_info,
+        'irrigation_advisory': irrigation_advisory,
+        'spray_advisory': spray_advisory
+    }
+
+@weather_bp.route('/api/dashboard/<city>', methods=['GET'])
+def get_dashboard_data(city):
+    """Fetch complete dashboard data for a city"""
+    
+    if city not in MP_CITIES:
+        return jsonify({
+            'success': False,
+            'error': 'City not found'
+        }), 404
+    
+    try:
+        coords = MP_CITIES[city]
+        
+        # Current weather and forecast, cached per city and fetched concurrently
+        result = weather_client.get(city, coords['lat'], coords['lon'])
+        
+        data = build_dashboard(city, result.weather, result.forecast)
+        data['cache'] = result.meta()
+        return jsonify(data)
+        
+    except requests.exceptions.RequestException as e:
+        return jsonify({
+            'success': False,
+            'error': f'Failed to fetch data: {str(e)}'
+        }), 500
+    except KeyError as e:
+        return jsonify({
+            'success': False,
+            'error': f'Invalid data received: {str(e)}'
+        }), 500
+
+@weather_bp.route('/api/dashboard/<city>/timeline', methods=['GET'])
+def get_advisory_timeline(city):
+    """Irrigation/spray advisory for every 3-hour step of the 5-day forecast"""
+    
+    if city not in MP_CITIES:
+        return jsonify({
+            'success': False,
+            'error': 'City not found'
+        }), 404
+    
+    try:
+        coords = MP_CITIES[city]
+        result = weather_client.get(city, coords['lat'], coords['lon'])
+        
+        return jsonify({
+            'success': True,
+            'city': city,
+            'timeline': advisory_timeline(result.forecast),
+            'cache': result.meta()
+        })
+        
+    except requests.exceptions.RequestException as e:
+        return jsonify({
+            'success': False,
+            'error': f'Failed to fetch data: {str(e)}'
+        }), 500
+    except KeyError as e:
+        return jsonify({
+            'success': False,
+            'error': f'Invalid data received: {str(e)}'
+        }), 500
+
+@weather_bp.route('/api/dashboard', methods=['GET'])
+def get_all_dashboards():
+    """Dashboard data for every city from the prefetched snapshot
+
+    Never calls OpenWeatherMap on the request path; cities that have not
+    been fetched yet are returned with 'success': False.
+    """
+    results = {city: weather_client.cached(city) for city in MP_CITIES}
+    
+    # Advisories for every fetched city in one pass of the rule engine
+    fetched = [city for city, result in results.items() if result is not None]
+    try:
+        advisories = dict(zip(fetched, current_advisories_many(
+            [(results[city].weather, results[city].forecast) for city in fetched]
+        )))
+    except KeyError:
+        # A malformed payload; evaluate city by city so only that one fails
+        advisories = {}
+    
+    cities = {}
+    for city, result in results.items():
+        status = prefetcher.status(city)
+        
+        if result is None:
+            data = {'success': False, 'error': status['last_error'] or 'Not fetched yet'}
+        else:
+            try:
+                data = build_dashboard(city, result.weather, result.forecast, advisories.get(city))
+            except KeyError as e:
+                data = {'success': False, 'error': f'Invalid data received: {str(e)}'}
+        
+        data['age_seconds'] = round(result.age, 1) if result is not None else None
+        data['last_refresh'] = status['last_success']
+        data['last_error'] = status['last_error']
+        cities[city] = data
+    
+    return jsonify({
+        'success': True,
+        'prefetch_enabled': WEATHER_PREFETCH,
+        'cities': cities
+    })
+
+@weather_bp.route('/api/dashboard/cache', methods=['GET'])
+def get_dashboard_cache_stats():
+    """Weather cache and upstream fetch counters"""
+    return jsonify(weather_client.stats())
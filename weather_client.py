@@ -0,0 +1,331 @@
+"""
+Cached OpenWeatherMap client for the weather dashboard.
+
+- Current weather and forecast are fetched concurrently over one pooled
+  keep-alive session, with timeouts.
+- Results are cached per city for WEATHER_CACHE_TTL seconds.
+- Concurrent requests for the same city share one upstream fetch
+  (single-flight).
+- If a refresh fails, the last good data is served for up to
+  WEATHER_STALE_MAX seconds, marked as stale.
+
+WeatherPrefetcher keeps every city warm in the background for the bulk
+all-cities endpoint.
+"""
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from logger import fields, get_logger
+from metrics import counter, histogram
+
+log = get_logger('weather')
+
+WEATHER_CACHE_TTL = float(os.getenv('WEATHER_CACHE_TTL', '300'))
+WEATHER_STALE_MAX = float(os.getenv('WEATHER_STALE_MAX', '3600'))
+WEATHER_TIMEOUT = float(os.getenv('WEATHER_TIMEOUT', '5'))
+WEATHER_POOL_SIZE = int(os.getenv('WEATHER_POOL_SIZE', '10'))
+
+OPENWEATHER_SECONDS = histogram('openweather_request_seconds', 'OpenWeatherMap call latency', ['endpoint'])
+OPENWEATHER_ERRORS = counter('openweather_errors_total', 'Failed OpenWeatherMap calls', ['endpoint', 'reason'])
+
+
+class WeatherResult:
+    """Weather + forecast payloads for one city and where they came from"""
+
+    def __init__(self, weather, forecast, fetched_at, cached=False, stale=False, error=None):
+        self.weather = weather
+        self.forecast = forecast
+        self.fetched_at = fetched_at
+        self.cached = cached
+        self.stale = stale
+        self.error = error
+
+    @property
+    def age(self):
+        return time.time() - self.fetched_at
+
+    def meta(self):
+        return {
+            'cached': self.cached,
+            'stale': self.stale,
+            'age_seconds': round(self.age, 1),
+            'error': self.error
+        }
+
+
+class OpenWeatherClient:
+    """Fetch current weather and 5-day forecast with caching and coalescing"""
+
+    def __init__(self, api_key, weather_url, forecast_url, ttl=WEATHER_CACHE_TTL,
+                 stale_max=WEATHER_STALE_MAX, timeout=WEATHER_TIMEOUT, pool_size=WEATHER_POOL_SIZE):
+        self.api_key = api_key
+        self.weather_url = weather_url
+        self.forecast_url = forecast_url
+        self.ttl = ttl
+        self.stale_max = stale_max
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.pool_size = pool_size
+        # Created on first use in each process: a pool made before a fork has no threads in the child
+        self._executor = None
+        self._executor_pid = None
+
+        self._cache = {}      # key -> WeatherResult
+        self._inflight = {}   # key -> Future
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.upstream_fetches = 0
+        self.upstream_errors = 0
+        self.stale_served = 0
+
+    def _get_json(self, url, params):
+        endpoint = 'weather' if url == self.weather_url else 'forecast'
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.HTTPError as e:
+            OPENWEATHER_ERRORS.inc(endpoint=endpoint, reason=e.response.status_code)
+            raise
+        except Exception as e:
+            OPENWEATHER_ERRORS.inc(endpoint=endpoint, reason=type(e).__name__)
+            raise
+        finally:
+            OPENWEATHER_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
+
+    def _pool(self):
+        pid = os.getpid()
+        with self._lock:
+            if self._executor is None or self._executor_pid != pid:
+                self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix='openweather')
+                self._executor_pid = pid
+            return self._executor
+
+    def fetch_upstream(self, lat, lon):
+        """Fetch weather and forecast concurrently; return (weather, forecast)
+
+        Raises requests.exceptions.Timeout if both are not back within
+        two request timeouts, so a stuck call cannot hold the city's
+        single-flight slot forever.
+        """
+        params = {
+            'lat': lat,
+            'lon': lon,
+            'appid': self.api_key,
+            'units': 'metric'
+        }
+        pool = self._pool()
+        weather_future = pool.submit(self._get_json, self.weather_url, params)
+        forecast_future = pool.submit(self._get_json, self.forecast_url, params)
+        deadline = time.monotonic() + 2 * self.timeout
+        try:
+            weather = weather_future.result(timeout=max(0.0, deadline - time.monotonic()))
+            forecast = forecast_future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeout:
+            weather_future.cancel()
+            forecast_future.cancel()
+            raise requests.exceptions.Timeout(f'OpenWeatherMap did not answer within {2 * self.timeout:g}s')
+        return weather, forecast
+
+    def cached(self, key):
+        """Return the cached WeatherResult for `key` (fresh or not), or None"""
+        with self._lock:
+            return self._cache.get(key)
+
+    def get(self, key, lat, lon, max_age=None):
+        """Return a WeatherResult for `key`, refreshing it if older than the TTL
+
+        Raises requests.exceptions.RequestException if upstream fails and
+        there is no usable stale copy.
+        """
+        max_age = self.ttl if max_age is None else max_age
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry.age < max_age:
+                self.hits += 1
+                return WeatherResult(entry.weather, entry.forecast, entry.fetched_at, cached=True)
+            self.misses += 1
+
+        try:
+            return self.refresh(key, lat, lon)
+        except requests.exceptions.RequestException as e:
+            if entry is not None and entry.age < self.stale_max:
+                with self._lock:
+                    self.stale_served += 1
+                return WeatherResult(entry.weather, entry.forecast, entry.fetched_at,
+                                     cached=True, stale=True, error=str(e))
+            raise
+
+    def refresh(self, key, lat, lon):
+        """Fetch `key` from upstream now, sharing the fetch with concurrent callers
+
+        Raises on failure instead of falling back to stale data.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.coalesced += 1
+
+        if leader:
+            self._refresh(key, lat, lon, future)
+        return future.result()
+
+    def _refresh(self, key, lat, lon, future):
+        with self._lock:
+            self.upstream_fetches += 1
+        try:
+            weather, forecast = self.fetch_upstream(lat, lon)
+        except Exception as e:
+            with self._lock:
+                self.upstream_errors += 1
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            return
+
+        result = WeatherResult(weather, forecast, time.time())
+        with self._lock:
+            self._cache[key] = result
+            self._inflight.pop(key, None)
+        future.set_result(result)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'cached_cities': len(self._cache),
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'upstream_fetches': self.upstream_fetches,
+                'upstream_errors': self.upstream_errors,
+                'stale_served': self.stale_served
+            }
+
+
+WEATHER_PREFETCH = os.getenv('WEATHER_PREFETCH', '1') == '1'
+WEATHER_PREFETCH_INTERVAL = float(os.getenv('WEATHER_PREFETCH_INTERVAL', '300'))
+WEATHER_PREFETCH_CONCURRENCY = int(os.getenv('WEATHER_PREFETCH_CONCURRENCY', '3'))
+WEATHER_PREFETCH_JITTER = float(os.getenv('WEATHER_PREFETCH_JITTER', '0.1'))
+# OpenWeatherMap's free tier allows 60 calls/minute; each city refresh is 2 calls
+WEATHER_MAX_CALLS_PER_MINUTE = float(os.getenv('WEATHER_MAX_CALLS_PER_MINUTE', '50'))
+
+
+class WeatherPrefetcher:
+    """Refresh every city in the background so requests never wait on upstream
+
+    Each cycle refreshes all cities with bounded concurrency and a random
+    start delay, spaces upstream calls to stay under the rate limit, and
+    pauses all refreshes when OpenWeatherMap answers 429.
+    """
+
+    def __init__(self, client, cities, interval=WEATHER_PREFETCH_INTERVAL,
+                 concurrency=WEATHER_PREFETCH_CONCURRENCY, jitter=WEATHER_PREFETCH_JITTER,
+                 max_calls_per_minute=WEATHER_MAX_CALLS_PER_MINUTE):
+        self.client = client
+        self.cities = cities
+        self.interval = interval
+        self.concurrency = max(1, concurrency)
+        self.jitter = jitter
+        # Two upstream calls per refresh
+        self.min_spacing = 2 * 60.0 / max_calls_per_minute if max_calls_per_minute > 0 else 0.0
+
+        self._status = {
+            city: {'last_attempt': None, 'last_success': None, 'last_error': None}
+            for city in cities
+        }
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self._paused_until = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self.cycles = 0
+
+    def start(self):
+        """Start the scheduler thread (idempotent, also after a fork)"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='weather-prefetch', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _wait_for_slot(self):
+        """Sleep until the rate limiter and any 429 back-off allow a refresh"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot, self._paused_until)
+            self._next_slot = slot + self.min_spacing
+        self._stop.wait(max(0.0, slot - time.monotonic()))
+
+    def _back_off(self, error):
+        response = getattr(error, 'response', None)
+        if response is None or response.status_code != 429:
+            return
+        try:
+            delay = float(response.headers.get('Retry-After', 60))
+        except ValueError:
+            delay = 60.0
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        log.warning("OpenWeatherMap rate limit hit, pausing refreshes", extra=fields(seconds=round(delay)))
+
+    def refresh_city(self, city):
+        # Spread the cycle's refreshes out instead of hitting upstream in a burst
+        self._stop.wait(random.uniform(0, self.jitter * self.interval / max(1, len(self.cities))))
+        self._wait_for_slot()
+        if self._stop.is_set():
+            return
+
+        coords = self.cities[city]
+        with self._lock:
+            self._status[city]['last_attempt'] = time.time()
+        try:
+            self.client.refresh(city, coords['lat'], coords['lon'])
+            error = None
+        except Exception as e:
+            self._back_off(e)
+            error = str(e)
+
+        with self._lock:
+            if error is None:
+                self._status[city]['last_success'] = time.time()
+            self._status[city]['last_error'] = error
+
+    def refresh_all(self):
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='weather-prefetch') as pool:
+            list(pool.map(self.refresh_city, list(self.cities)))
+        self.cycles += 1
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.refresh_all()
+            delay = self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+            self._stop.wait(max(0.0, delay - (time.monotonic() - started)))
+
+    def status(self, city):
+        """Refresh bookkeeping for one city"""
+        with self._lock:
+            return dict(self._status[city])